@@ -0,0 +1,147 @@
+"""
+Carga no /chat de um worker da API, com um agente falso e o SEI falso.
+
+O agente falso alterna `--ferramentas` vezes uma espera de `--llm` segundos
+(a chamada ao LLM) e a ferramenta `get_usuario`, que consulta o SEI falso com
+`--latencia` segundos por resposta. Para cada valor de `chat_max_concorrencia`
+são enviados `--chats` chats simultâneos; o resultado mostra a vazão, a duração
+média de um chat e a latência de uma requisição leve (/openapi.json) durante a
+carga, que só cresce se o loop da API estiver bloqueado.
+
+As ferramentas de uma execução são síncronas: cada chamada ao SEI bloqueia a
+thread do agente até a resposta (ver `agent._sei`). Por isso a duração de um
+chat fica próxima de `ferramentas * (llm + latencia)`, e a concorrência vem do
+número de execuções simultâneas, não de ferramentas sobrepostas.
+
+Requer o ADK da OCI (`oci.addons.adk`) instalado.
+
+    python benchmarks/carga_chat.py [--chats 64] [--concorrencia 1 8 64]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+import types
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(RAIZ / "src"), str(RAIZ)]
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from tests.fake_sei import FakeSei  # noqa: E402
+
+try:
+    import agent  # noqa: E402
+except ImportError as e:
+    sys.exit(f"Não foi possível importar a API do agente: {e}")
+from settings import get_settings  # noqa: E402
+
+
+class AgenteFalso:
+    def __init__(self, ferramentas: int, llm: float):
+        self.ferramentas = ferramentas
+        self.llm = llm
+        self.duracoes: list[float] = []
+
+    def create_session(self, nome):
+        return "sessao"
+
+    def run(self, input, session_id):
+        inicio = time.perf_counter()
+        for _ in range(self.ferramentas):
+            time.sleep(self.llm)
+            agent.get_usuario("110047993", "100000001")
+        self.duracoes.append(time.perf_counter() - inicio)
+        return types.SimpleNamespace(final_output="ok", session_id=session_id)
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _carga(base: str, chats: int) -> tuple[float, list[float]]:
+    limites = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base, timeout=600, limits=limites) as client:
+
+        async def sondar(fim: asyncio.Event) -> list[float]:
+            latencias = []
+            while not fim.is_set():
+                inicio = time.perf_counter()
+                await client.get("/openapi.json")
+                latencias.append(time.perf_counter() - inicio)
+                await asyncio.sleep(0.05)
+            return latencias
+
+        fim = asyncio.Event()
+        sonda = asyncio.create_task(sondar(fim))
+        inicio = time.perf_counter()
+        respostas = await asyncio.gather(
+            *(client.post("/chat", json={"message": "m", "session_id": "s"}) for _ in range(chats))
+        )
+        total = time.perf_counter() - inicio
+        fim.set()
+        latencias = await sonda
+
+    falhas = [r for r in respostas if r.status_code != 200]
+    if falhas:
+        raise RuntimeError(f"{len(falhas)} chats falharam: {falhas[0].text}")
+    return total, latencias
+
+
+def medir(sei: FakeSei, args, concorrencia: int) -> None:
+    os.environ["SEI_IA_CHAT_MAX_CONCORRENCIA"] = str(concorrencia)
+    get_settings.cache_clear()
+    agente = AgenteFalso(args.ferramentas, args.llm)
+    agent.agent = agente
+
+    porta = _porta_livre()
+    server = uvicorn.Server(uvicorn.Config(agent.app, port=porta, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        total, latencias = asyncio.run(_carga(f"http://127.0.0.1:{porta}", args.chats))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    print(
+        f"  {concorrencia:12} {args.chats / total:9.1f} {statistics.mean(agente.duracoes) * 1000:13.0f}"
+        f" {statistics.median(latencias) * 1000:12.1f} {max(latencias) * 1000:12.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chats", type=int, default=64)
+    parser.add_argument("--concorrencia", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--ferramentas", type=int, default=3)
+    parser.add_argument("--llm", type=float, default=0.3)
+    parser.add_argument("--latencia", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with FakeSei(latencia=args.latencia) as sei:
+        os.environ["SEI_IA_SEI_URL"] = sei.url
+        agent.indice = types.SimpleNamespace(resolver_unidade=lambda id_unidade: id_unidade)
+
+        print(
+            f"{args.chats} chats, {args.ferramentas} ferramentas por chat,"
+            f" LLM {args.llm * 1000:.0f} ms, SEI {args.latencia * 1000:.0f} ms"
+        )
+        print(f"  {'concorrencia':>12} {'chats/s':>9} {'chat médio ms':>13} {'sonda p50 ms':>12} {'sonda max ms':>12}")
+        for concorrencia in args.concorrencia:
+            medir(sei, args, concorrencia)
+
+
+if __name__ == "__main__":
+    main()
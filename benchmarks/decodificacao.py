@@ -0,0 +1,70 @@
+"""
+Tempo de decodificação de uma resposta de `listarAndamentos` pelo zeep
+(`process_reply` + `serialize_object`) e pelo decodificador lxml
+(`python_sei.decoder`), com e sem a criação dos modelos.
+
+    python benchmarks/decodificacao.py [--quantidade 10000] [--repeticoes 5]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(RAIZ / "src"), str(RAIZ)]
+
+from zeep.helpers import serialize_object  # noqa: E402
+
+from python_sei import Client  # noqa: E402
+from python_sei.decoder import parse_response  # noqa: E402
+from python_sei.models import Andamento  # noqa: E402
+from tests.fake_sei import FakeSei, resposta_andamentos  # noqa: E402
+
+
+def medir(funcao, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quantidade", type=int, default=10_000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    content = resposta_andamentos(args.quantidade)
+    response = SimpleNamespace(
+        status_code=200,
+        content=content,
+        headers={"Content-Type": "text/xml; charset=utf-8"},
+        encoding="utf-8",
+    )
+
+    with FakeSei() as sei:
+        client = Client(sei.url, "SEI", "chave", wsdl_cache=False)
+    binding = client._service._binding
+    operation = binding.get("listarAndamentos")
+    shape = client._response_shape("listarAndamentos")
+
+    def zeep():
+        return serialize_object(binding.process_reply(client.client, operation, response))
+
+    def lxml():
+        return parse_response(content, shape)
+
+    print(f"listarAndamentos com {args.quantidade} itens ({len(content) / 2**20:.1f} MB)")
+    for nome, decodificar in (("zeep", zeep), ("lxml", lxml)):
+        registros = medir(decodificar, args.repeticoes)
+        modelos = medir(lambda: Andamento.from_many_records(decodificar()), args.repeticoes)
+        print(f"  {nome}  registros {registros * 1000:8.1f} ms  modelos {modelos * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Tempo de criação dos modelos com decodificação completa e preguiçosa (`lazy`),
+sem acessar os objetos aninhados, acessando um campo e acessando todos.
+
+    python benchmarks/decodificacao_preguicosa.py [--quantidade 10000]
+
+Os registros são decodificados das respostas de `tests/data/respostas` e de
+`tests.fake_sei.resposta_andamentos`, sem acesso à rede.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(RAIZ / "src"), str(RAIZ)]
+
+from python_sei.decoder import parse_response  # noqa: E402
+from python_sei.models import Andamento, RetornoConsultaProcedimento  # noqa: E402
+from tests.fake_sei import DATA, resposta_andamentos  # noqa: E402
+
+
+def medir(registros: list, from_record, lazy: bool, acessar) -> float:
+    inicio = time.perf_counter()
+    for registro in registros:
+        acessar(from_record(registro, lazy=lazy))
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quantidade", type=int, default=10_000)
+    args = parser.parse_args()
+
+    procedimento = parse_response((DATA / "respostas" / "consultarProcedimento.xml").read_bytes())
+    casos = {
+        "RetornoConsultaProcedimento": (
+            [procedimento] * args.quantidade,
+            RetornoConsultaProcedimento.from_record,
+            lambda p: p.ultimo_andamento,
+        ),
+        "Andamento": (
+            parse_response(resposta_andamentos(args.quantidade)),
+            Andamento.from_record,
+            lambda a: a.unidade,
+        ),
+    }
+
+    for nome, (registros, from_record, um_campo) in casos.items():
+        print(f"{nome} ({len(registros)} registros)")
+        for rotulo, acessar in (
+            ("sem acesso", lambda _: None),
+            ("um campo", um_campo),
+            ("todos os campos", lambda m: [getattr(m, c) for c in type(m)._lazy_fields]),
+        ):
+            completo = medir(registros, from_record, False, acessar)
+            preguicoso = medir(registros, from_record, True, acessar)
+            print(
+                f"  {rotulo:16} completo {completo * 1000:8.1f} ms"
+                f"  preguiçoso {preguicoso * 1000:8.1f} ms"
+                f"  ({completo / preguicoso:4.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
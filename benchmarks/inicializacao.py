@@ -0,0 +1,62 @@
+"""
+Tempo de criação do `Client` com o WSDL baixado a cada vez (frio), lido do
+`WsdlCache` em disco (quente) e lido de um arquivo local (`wsdl=`).
+
+    python benchmarks/inicializacao.py [--repeticoes 20]
+
+Usa o servidor falso de `tests/fake_sei.py`; com um SEI real o ganho do cache
+inclui também a latência da rede até o servidor.
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(RAIZ / "src"), str(RAIZ)]
+
+from python_sei import Client  # noqa: E402
+from python_sei.wsdl import WsdlCache  # noqa: E402
+from tests.fake_sei import FakeSei  # noqa: E402
+
+
+def medir(criar, repeticoes: int) -> list[float]:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        criar()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    with FakeSei() as sei, tempfile.TemporaryDirectory() as tmp:
+        cache = WsdlCache(Path(tmp) / "wsdl")
+        wsdl = sei.salvar_wsdl(Path(tmp))
+        # Preenche o cache antes das medições do cenário quente.
+        Client(sei.url, "SEI", "chave", wsdl_cache=cache)
+
+        cenarios = {
+            "frio (sem cache)": lambda: Client(sei.url, "SEI", "chave", wsdl_cache=False),
+            "quente (WsdlCache)": lambda: Client(sei.url, "SEI", "chave", wsdl_cache=cache),
+            "arquivo local": lambda: Client(sei.endereco, "SEI", "chave", wsdl=wsdl, wsdl_cache=False),
+        }
+        for nome, criar in cenarios.items():
+            downloads = sum(sei.downloads.values())
+            tempos = medir(criar, args.repeticoes)
+            print(
+                f"{nome:20} mediana {statistics.median(tempos) * 1000:7.2f} ms"
+                f"  mín {min(tempos) * 1000:7.2f} ms"
+                f"  downloads (WSDL e XSD) {sum(sei.downloads.values()) - downloads}"
+            )
+
+
+if __name__ == "__main__":
+    main()
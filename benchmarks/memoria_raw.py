@@ -0,0 +1,52 @@
+"""
+Memória retida por `Andamento`s decodificados em cada modo de `keep_raw`
+(`full`, `compact` e `none`), medida com `tracemalloc`.
+
+    python benchmarks/memoria_raw.py [--quantidade 10000]
+
+Os registros são decodificados de `tests.fake_sei.resposta_andamentos` dentro
+da medição e descartados em seguida; o valor reportado é o que continua
+alocado enquanto os modelos existem.
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(RAIZ / "src"), str(RAIZ)]
+
+from python_sei.decoder import parse_response  # noqa: E402
+from python_sei.models import Andamento, raw_mode  # noqa: E402
+from tests.fake_sei import resposta_andamentos  # noqa: E402
+
+
+def medir(resposta: bytes, modo: str) -> tuple[float, float]:
+    """Retorna a memória retida e o pico, em MB"""
+    gc.collect()
+    tracemalloc.start()
+    with raw_mode(modo):
+        andamentos = Andamento.from_many_records(parse_response(resposta))
+    gc.collect()
+    retida, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del andamentos
+    return retida / 2**20, pico / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quantidade", type=int, default=10_000)
+    args = parser.parse_args()
+
+    resposta = resposta_andamentos(args.quantidade)
+    print(f"{args.quantidade} Andamentos")
+    for modo in ("full", "compact", "none"):
+        retida, pico = medir(resposta, modo)
+        print(f"  {modo:8} retida {retida:6.1f} MB  pico {pico:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Tempo de decodificação de uma resposta de `listarUnidades` com muitas unidades:
+leitura do XML (`python_sei.decoder`) e criação dos modelos `Unidade`, além das
+conversões S/N e de `NivelAcesso` isoladas.
+
+    python benchmarks/unidades.py [--quantidade 100000] [--repeticoes 5]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import timeit
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(RAIZ / "src"), str(RAIZ)]
+
+from python_sei.decoder import parse_response  # noqa: E402
+from python_sei.enums import NivelAcesso  # noqa: E402
+from python_sei.models import Unidade  # noqa: E402
+from python_sei.sin import decode_sin  # noqa: E402
+from tests.fake_sei import ENVELOPE_FIM, ENVELOPE_INICIO  # noqa: E402
+
+SIGLAS = ["SGA", "SGA-DTI", "SGA-PROT", "SEFAZ", "SEDUC", "PGE", "CASA-CIVIL", "DETRAN"]
+
+
+def resposta_unidades(n: int) -> bytes:
+    itens = "".join(
+        '<item xsi:type="ns1:Unidade">'
+        f'<IdUnidade xsi:type="xsd:string">{110000000 + i}</IdUnidade>'
+        f'<Sigla xsi:type="xsd:string">{SIGLAS[i % len(SIGLAS)]}</Sigla>'
+        f'<Descricao xsi:type="xsd:string">Unidade {i}</Descricao>'
+        f'<SinProtocolo xsi:type="xsd:string">{"SN"[i % 2]}</SinProtocolo>'
+        '<SinArquivamento xsi:type="xsd:string">N</SinArquivamento>'
+        '<SinOuvidoria xsi:type="xsd:string">N</SinOuvidoria>'
+        "</item>"
+        for i in range(n)
+    )
+    return (
+        ENVELOPE_INICIO
+        + "<ns1:listarUnidadesResponse>"
+        + f'<parametros SOAP-ENC:arrayType="ns1:Unidade[{n}]" xsi:type="SOAP-ENC:Array">'
+        + itens
+        + "</parametros></ns1:listarUnidadesResponse>"
+        + ENVELOPE_FIM
+    ).encode()
+
+
+def medir(funcao, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quantidade", type=int, default=100_000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    content = resposta_unidades(args.quantidade)
+    registros = parse_response(content)
+    unidades = Unidade.from_many_records(registros)
+
+    print(f"listarUnidades com {args.quantidade} unidades ({len(content) / 2**20:.1f} MB)")
+    for nome, funcao in (
+        ("XML -> registros", lambda: parse_response(content)),
+        ("registros -> Unidade", lambda: Unidade.from_many_records(registros)),
+    ):
+        print(f"  {nome:20} {medir(funcao, args.repeticoes) * 1000:8.1f} ms")
+    print(f"  siglas distintas em memória: {len({id(u.sigla) for u in unidades})}")
+
+    for nome, instrucao in (
+        ("decode_sin", lambda: decode_sin("S")),
+        ("NivelAcesso.from_str", lambda: NivelAcesso.from_str("1")),
+    ):
+        print(f"  {nome:20} {timeit.timeit(instrucao, number=1_000_000):.3f} s / 1M chamadas")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,242 +1,683 @@
 import asyncio
-from fastapi import FastAPI, HTTPException
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import asdict
+from datetime import datetime
+from functools import partial, wraps
+import inspect
+import json
+import re
+import threading
+import time
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-import random
+from conversao import ConversaoCache, ConversorOcupado, PoolConversao
+from jobs import JobManager, JobsOcupado, TipoJobDesconhecido
+from python_sei.async_client import AsyncClient
 from python_sei.client import Client
-from python_sei.models import Usuario, RetornoConsultaProcedimento, RetornoConsultaDocumento, Andamento
-import zeep
+from python_sei.dates import agrupar_andamentos, format_data
+from python_sei.index import ReferenceIndex
+from python_sei.models import Usuario, Andamento
+from rag import HashingEmbedder, IndiceVetorial, Ingestor, SentenceTransformerEmbedder
+from resumo import get_chain, resumir
+from settings import get_settings
+from similaridade import IndiceSimilaridade, secoes_em_comum, similaridade_processos
 from oci.addons.adk import Agent, AgentClient, tool
-from typing import Dict, Any
-from oci.addons.adk import Agent, AgentClient, tool
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.chat_models import ChatOCIGenAI
-from langchain.chains.combine_documents.map_reduce import MapReduceDocumentsChain
-from langchain.prompts import PromptTemplate
-from langchain.chains.llm import LLMChain
-from langchain.chains.combine_documents.stuff import StuffDocumentsChain
-from langchain.chains.combine_documents.reduce import ReduceDocumentsChain
-from langchain_docling.loader import ExportType, DoclingLoader
-from oci.addons.adk.tool.prebuilt import AgenticRagTool
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, Literal, TypeVar
 import uvicorn
-from python_sei.client import Client
-from python_sei.models import Usuario, RetornoConsultaProcedimento, RetornoConsultaDocumento, Andamento
-import zeep
-import nest_asyncio
 
+T = TypeVar("T")
+
+SSE_KEEPALIVE = 15.0
+"""Intervalo, em segundos, dos comentarios enviados pelo /chat/stream enquanto nao ha eventos."""
+
+SSE_VERIFICAR_DESCONEXAO = 1.0
+"""Intervalo, em segundos, entre as verificacoes de desconexao do cliente do /chat/stream."""
+
+_emitir_evento: ContextVar[Callable[[str, dict], None] | None] = ContextVar("_emitir_evento", default=None)
+
+_ocupados: ContextVar[list[Exception] | None] = ContextVar("_ocupados", default=None)
+"""Falhas por falta de vagas (conversao, jobs) nas ferramentas da execucao do agente em andamento."""
+
+_cancelada: ContextVar[threading.Event | None] = ContextVar("_cancelada", default=None)
+"""Sinaliza as ferramentas de uma execucao do agente cujo cliente desistiu da resposta."""
+
+RECURSOS_OCUPADOS = (ConversorOcupado, JobsOcupado)
+
+
+class ExecucaoCancelada(Exception):
+    """O cliente desconectou e a execucao do agente foi cancelada"""
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Cria, no loop da API, o cliente assincrono do SEI usado pelas ferramentas e o
+    executor dedicado as execucoes do agente.
+    """
+    global loop_api, sei_async, chat_executor, chat_semaforo
+
+    settings = get_settings()
+    loop_api = asyncio.get_running_loop()
+    sei_async = AsyncClient(
+        url=settings.sei_url,
+        sigla_sistema=settings.sei_sigla_sistema,
+        identificacao_servico=settings.sei_identificacao_servico,
+    )
+    # agent.run e sincrono e dura todo o ciclo de chamadas ao LLM e as
+    # ferramentas; roda em threads proprias, limitadas por chat_max_concorrencia,
+    # para nao ocupar o threadpool do FastAPI nem bloquear o loop.
+    chat_executor = ThreadPoolExecutor(
+        max_workers=settings.chat_max_concorrencia, thread_name_prefix="agent"
+    )
+    chat_semaforo = asyncio.Semaphore(settings.chat_max_concorrencia)
+    try:
+        yield
+    finally:
+        chat_executor.shutdown(wait=False, cancel_futures=True)
+        await sei_async.aclose()
 
-app = FastAPI()
 
+app = FastAPI(lifespan=lifespan)
+
+
+def _sei(chamada: Awaitable[T]) -> T:
+    """
+    Executa uma chamada do `AsyncClient` no loop da API e aguarda o resultado.
+    As ferramentas rodam nas threads do agente; as requisicoes ao SEI de todas
+    as execucoes sao multiplexadas no loop, sem uma thread bloqueada por conexao.
+
+    A thread do agente fica bloqueada ate a resposta: as ferramentas de uma
+    mesma execucao continuam sincronas, uma apos a outra, e a concorrencia vem
+    do numero de execucoes simultaneas (chat_max_concorrencia). O efeito e
+    medido por benchmarks/carga_chat.py.
+    """
+    return asyncio.run_coroutine_threadsafe(chamada, loop_api).result()
+
+
+async def _executar_agente(funcao, *args, **kwargs):
+    """
+    Executa `funcao` em uma thread do agente. O ADK entrega ao LLM as excecoes
+    das ferramentas em vez de propaga-las; se alguma ferramenta falhou por falta
+    de vagas, a excecao e levantada ao fim da execucao, e a requisicao termina
+    com 503 em vez de uma resposta do LLM sobre o erro.
+
+    A thread do agente nao pode ser interrompida: se a tarefa for cancelada, as
+    ferramentas chamadas dali em diante falham com `ExecucaoCancelada`, sem
+    acessar o SEI, ate o ADK encerrar a execucao.
+    """
+    ocupados: list[Exception] = []
+    _ocupados.set(ocupados)
+    cancelada = threading.Event()
+    _cancelada.set(cancelada)
+    # O contexto e copiado para a thread do agente para que as ferramentas
+    # enxerguem o _emitir_evento, a lista de _ocupados e o sinal de
+    # cancelamento da requisicao.
+    contexto = copy_context()
+    async with chat_semaforo:
+        try:
+            resultado = await loop_api.run_in_executor(chat_executor, contexto.run, partial(funcao, *args, **kwargs))
+        except asyncio.CancelledError:
+            cancelada.set()
+            raise
+    if ocupados:
+        raise ocupados[0]
+    return resultado
+
+
+def _com_eventos(funcao):
+    """
+    Emite os eventos tool_start e tool_end da ferramenta para o /chat/stream da
+    requisicao em andamento. Fora do /chat/stream a ferramenta roda sem eventos.
+    Falhas por falta de vagas sao registradas em _ocupados (ver _executar_agente).
+    """
+    assinatura = inspect.signature(funcao)
+
+    def executar(*args, **kwargs):
+        cancelada = _cancelada.get()
+        if cancelada is not None and cancelada.is_set():
+            raise ExecucaoCancelada("Execucao cancelada: o cliente desconectou")
+        try:
+            return funcao(*args, **kwargs)
+        except RECURSOS_OCUPADOS as e:
+            ocupados = _ocupados.get()
+            if ocupados is not None:
+                ocupados.append(e)
+            raise
+
+    @wraps(funcao)
+    def wrapper(*args, **kwargs):
+        emitir = _emitir_evento.get()
+        if emitir is None:
+            return executar(*args, **kwargs)
+
+        nome = funcao.__name__
+        emitir("tool_start", {"ferramenta": nome, "argumentos": assinatura.bind(*args, **kwargs).arguments})
+        inicio = time.perf_counter()
+        try:
+            resultado = executar(*args, **kwargs)
+        except Exception as e:
+            emitir("tool_end", {"ferramenta": nome, "duracao": round(time.perf_counter() - inicio, 3), "erro": str(e)})
+            raise
+        emitir("tool_end", {"ferramenta": nome, "duracao": round(time.perf_counter() - inicio, 3)})
+        return resultado
+
+    return wrapper
+
+
+@app.exception_handler(ConversorOcupado)
+@app.exception_handler(JobsOcupado)
+def conversor_ocupado(request: Request, exc: Exception) -> JSONResponse:
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "30"})
 
-id_unidade_teste = "110047993"
-id_usuario_teste = "00029443830"
 
 class Message(BaseModel):
     message: str
     session_id: str
 
 @app.post("/session")
-def create_session() -> Dict[str, Any]:
-    session_id = agent.create_session("sei-ai-session")
-    output = Message(message="session created" ,session_id=session_id),  
+async def create_session() -> Dict[str, Any]:
+    session_id = await _executar_agente(agent.create_session, "sei-ai-session")
     return {"session_id": session_id, "message": "Session created successfully."}
 
 
-@app.post("/chat")  
-def chat(input: Message) -> Dict[str, Any]:
-    
-    response = agent.run(input=input.message, session_id=input.session_id)
-    output = Message(message=response.final_output,session_id=response.session_id),  
+@app.post("/chat")
+async def chat(input: Message) -> Dict[str, Any]:
+    response = await _executar_agente(agent.run, input=input.message, session_id=input.session_id)
     return {"message": response.final_output, "session_id": response.session_id}
-    
+
+
+def _sse(evento: str, dados: dict) -> str:
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False, default=str)}\n\n"
+
+
+def _partes_resposta(texto: str, palavras: int = 8) -> list[str]:
+    trechos = re.findall(r"\S+\s*", texto)
+    return ["".join(trechos[i : i + palavras]) for i in range(0, len(trechos), palavras)]
+
+
+async def _eventos_chat(input: Message, request: Request) -> AsyncIterator[str]:
+    fila: asyncio.Queue = asyncio.Queue()
+
+    def emitir(evento: str, dados: dict) -> None:
+        loop_api.call_soon_threadsafe(fila.put_nowait, (evento, dados))
+
+    async def executar():
+        _emitir_evento.set(emitir)
+        try:
+            return await _executar_agente(agent.run, input=input.message, session_id=input.session_id)
+        finally:
+            # Os eventos das ferramentas foram agendados antes do fim da
+            # execucao, entao o marcador de fim chega depois de todos eles.
+            fila.put_nowait(None)
+
+    execucao = asyncio.create_task(executar())
+    try:
+        yield _sse("inicio", {"session_id": input.session_id})
+
+        ultimo_envio = time.monotonic()
+        while True:
+            try:
+                item = await asyncio.wait_for(fila.get(), SSE_VERIFICAR_DESCONEXAO)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                if time.monotonic() - ultimo_envio >= SSE_KEEPALIVE:
+                    ultimo_envio = time.monotonic()
+                    yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            ultimo_envio = time.monotonic()
+            yield _sse(*item)
+
+        try:
+            response = await execucao
+        except RECURSOS_OCUPADOS as e:
+            # A resposta ja comecou com 200; o cliente recebe o 503 no evento.
+            yield _sse("erro", {"detail": str(e), "status": 503})
+            return
+        except Exception as e:
+            yield _sse("erro", {"detail": str(e)})
+            return
+
+        # O ADK so devolve a resposta completa, ao fim da execucao; ela e
+        # enviada em partes apenas para limitar o tamanho de cada evento.
+        for parte in _partes_resposta(response.final_output or ""):
+            yield _sse("resposta_final", {"texto": parte})
+        yield _sse("fim", {"session_id": response.session_id})
+    finally:
+        # Cliente desconectado (ou gerador encerrado pelo servidor): a execucao
+        # do agente nao tem mais quem aguarde o resultado.
+        execucao.cancel()
+
+
+@app.post("/chat/stream")
+async def chat_stream(input: Message, request: Request) -> StreamingResponse:
+    """
+    Versao do /chat com Server-Sent Events: inicio, tool_start e tool_end a
+    cada ferramenta executada, resposta_final e fim.
+
+    O texto do LLM nao e transmitido a medida que e gerado: o ADK so o devolve
+    ao fim da execucao, e os eventos resposta_final trazem essa resposta
+    completa dividida em partes. A execucao e cancelada se o cliente
+    desconectar antes do fim.
+    """
+    return StreamingResponse(
+        _eventos_chat(input, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class JobRequest(BaseModel):
+    tipo: Literal["resumo", "conversao", "linha_do_tempo"]
+    id_unidade: str
+    protocolo: str
+    """Protocolo do documento (resumo e conversao) ou do processo (linha_do_tempo)."""
+
+
+@app.post("/jobs", status_code=202)
+async def criar_job(input: JobRequest) -> Dict[str, Any]:
+    """
+    Executa o resumo, a conversao ou a linha do tempo em segundo plano. Pedidos
+    repetidos para o mesmo alvo retornam o job ja existente.
+    """
+    # A unidade e resolvida antes do job para que a sigla e o id da mesma
+    # unidade identifiquem o mesmo job.
+    try:
+        id_unidade = indice.resolver_unidade(input.id_unidade)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
+    try:
+        job = await asyncio.to_thread(jobs.submeter, input.tipo, id_unidade, input.protocolo)
+    except TipoJobDesconhecido as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return asdict(job)
+
+
+@app.get("/jobs/{id}")
+async def obter_job(id: str) -> Dict[str, Any]:
+    job = await asyncio.to_thread(jobs.obter, id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job nao encontrado")
+    return asdict(job)
+
 @tool
+@_com_eventos
 def get_usuario(id_unidade: str, id_usuario:str) -> list[Usuario]:
     """
     retorna informacoes sobre o usuario lotado em uma unidade.
 
     Args:
-    id_unidade(str): id da unidade do usuario
+    id_unidade(str): id ou sigla da unidade do usuario
     id_usuario(str): id do usuario
     """
 
-    usuarios = sei_client.listar_usuarios(id_unidade=id_unidade_teste, id_usuario=id_usuario_teste)
+    usuarios = _sei(sei_async.listar_usuarios(id_unidade=indice.resolver_unidade(id_unidade), id_usuario=id_usuario))
 
     return usuarios
 
 @tool
+@_com_eventos
 def get_processo(id_unidade: str, protocolo_processo: str) -> Any:
     """
         retorna informacoes sobre um processo do SEI.
 
         Args:
-            id_unidade(str): id da unidade do usuario
+            id_unidade(str): id ou sigla da unidade do usuario
             protocolo_processo(str): numero do protocolo do processo.
     """
-    
 
-    procedimento = sei_client.consultar_procedimento(id_unidade_teste, protocolo_processo, True, True, True, True, True, True, True, True, True)
+
+    procedimento = _sei(
+        sei_async.consultar_procedimento(
+            indice.resolver_unidade(id_unidade), protocolo_processo, True, True, True, True, True, True, True, True, True
+        )
+    )
     return procedimento
 
 @tool
+@_com_eventos
 def get_documento(id_unidade: str, protocolo_documento: str) -> Any:
     """
         retorno informacoes sobre um documento do SEI.
 
         Args:
-        id_unidade: sigla da unidade do usuario
+        id_unidade: id ou sigla da unidade do usuario
         protocolo_documento: numero do protocolo do documento.
     """
-    
-    documento = sei_client.consultar_documento(id_unidade_teste, protocolo_documento, True, True, False, True)
+
+    documento = _sei(sei_async.consultar_documento(indice.resolver_unidade(id_unidade), protocolo_documento, True, True, False, True))
     return documento
 
 
+def _resumir_documento(id_unidade: str, protocolo_documento: str) -> str:
+    documento = _sei(sei_async.consultar_documento(indice.resolver_unidade(id_unidade), protocolo_documento))
+
+    # Conversao com docling, reaproveitada do cache quando o documento nao mudou
+    conversao = conversoes.converter(documento.id_documento, documento.link_acesso)
+
+    # O LLM e as chains sao criados uma unica vez e reaproveitados
+    return resumir(conversao.chunks)
+
+
 @tool
+@_com_eventos
 def resumir_documento(id_unidade: str, protocolo_documento: str) -> Any:
     """
         resume o conteudo de um documento do sei.
 
         Args:
-        sigla_unidade: sigla da unidade do usuario
-        protocolo_documento: numero do protocolo do documento. 
-    """
-    documento = sei_client.consultar_documento(id_unidade_teste, protocolo_documento)
-    
-    # Load document from URL using docling
-    loader = DoclingLoader(file_path=documento.link_acesso)
-    docs = loader.load()
-
-    
-    # Initialize the Oracle Cloud Generative AI LLM
-    llm = ChatOCIGenAI(
-        model_id="meta.llama-3.3-70b-instruct",
-        service_endpoint="https://inference.generativeai.sa-saopaulo-1.oci.oraclecloud.com",
-        #alterar para o compartment_id do ambiente desejado
-        compartment_id="ocid1.compartment.oc1..aaaaaaaamrvydbfbzcb3ys7dln2sl2giax43iuf6zi6uny3inhtu46ummv7a",
-        model_kwargs={"temperature": 0},
-    )
+        id_unidade: id ou sigla da unidade do usuario
+        protocolo_documento: numero do protocolo do documento.
+    """
+    return _resumir_documento(id_unidade, protocolo_documento)
 
-    # This controls how each document will be formatted. Specifically,
-    # it will be passed to `format_document` - see that function for more
-    # details.
-    document_prompt = PromptTemplate(
-        input_variables=["page_content"],
-        template="{page_content}"
-    )
 
-    document_variable_name = "context"
-    prompt = PromptTemplate.from_template(
-        "crie um breve resumo do seguinte documento: {context}"
-    )
-    llm_chain = LLMChain(llm=llm, prompt=prompt)
-    # We now define how to combine these summaries
-    reduce_prompt = PromptTemplate.from_template(
-    "combine esses resumos: {context}"
-    )
-    reduce_llm_chain = LLMChain(llm=llm, prompt=reduce_prompt)
-    combine_documents_chain = StuffDocumentsChain(
-    llm_chain=reduce_llm_chain,
-    document_prompt=document_prompt,
-    document_variable_name=document_variable_name
-    )
-    reduce_documents_chain = ReduceDocumentsChain(
-    combine_documents_chain=combine_documents_chain,
-    )
-    chain = MapReduceDocumentsChain(
-    llm_chain=llm_chain,
-    reduce_documents_chain=reduce_documents_chain,
-    )
-    # If we wanted to, we could also pass in collapse_documents_chain
-    # which is specifically aimed at collapsing documents BEFORE
-    # the final call.
-    prompt = PromptTemplate.from_template(
-    "junte esse conteudo em um resumo conciso, depois traduza para portugues do brasil: {context}"
-    )
-    llm_chain = LLMChain(llm=llm, prompt=prompt)
-    collapse_documents_chain = StuffDocumentsChain(
-    llm_chain=llm_chain,
-    document_prompt=document_prompt,
-    document_variable_name=document_variable_name
-    )
-    reduce_documents_chain = ReduceDocumentsChain(
-    combine_documents_chain=combine_documents_chain,
-    collapse_documents_chain=collapse_documents_chain,
-    )
-    chain = MapReduceDocumentsChain(
-    llm_chain=llm_chain,
-    reduce_documents_chain=reduce_documents_chain,
-    )
+def _converter_documento(id_unidade: str, protocolo_documento: str) -> dict:
+    documento = _sei(sei_async.consultar_documento(indice.resolver_unidade(id_unidade), protocolo_documento))
 
-    # Run the chain
-    summary = chain.invoke(docs)
-    return summary.get("output_text")
+    # Conversao com docling, reaproveitada do cache quando o documento nao mudou
+    conversao = conversoes.converter(documento.id_documento, documento.link_acesso)
+    return {"content": conversao.chunks}
 
 
 @tool
+@_com_eventos
 def convert_documento(id_unidade: str, protocolo_documento: str) -> Any:
     """
         converte o conteudo de um documento do sei para texto plano.
 
         Args:
-        id_unidade: id da unidade do usuario
+        id_unidade: id ou sigla da unidade do usuario
         protocolo_documento: numero do protocolo do documento.
     """
-    
-    
-    documento = sei_client.consultar_documento(id_unidade_teste, protocolo_documento)
-    
-    # Load document from URL using docling
-    loader = DoclingLoader(file_path=documento.link_acesso)
-    docs = loader.load()
-    content = [doc.page_content for doc in docs]
-    return {"content": content}
+    return _converter_documento(id_unidade, protocolo_documento)
+
+
+@tool
+@_com_eventos
+def indexar_documento(id_unidade: str, protocolo_documento: str) -> Any:
+    """
+        adiciona o conteudo de um documento do sei ao indice de pesquisa semantica.
+
+        Args:
+        id_unidade: id ou sigla da unidade do usuario
+        protocolo_documento: numero do protocolo do documento.
+    """
+    documento = _sei(sei_async.consultar_documento(indice.resolver_unidade(id_unidade), protocolo_documento))
+    alterado = ingestor.ingerir(documento)
+    return {"documento": documento.documento_formatado, "indexado": True, "atualizado": alterado}
+
+
+@tool
+@_com_eventos
+def buscar_trechos(pergunta: str, protocolos_documentos: list[str] | None = None, quantidade: int = 5) -> Any:
+    """
+        pesquisa semanticamente os trechos mais relevantes dos documentos indexados.
+
+        Args:
+        pergunta: texto da pergunta ou assunto pesquisado.
+        protocolos_documentos: limita a pesquisa aos documentos com esses protocolos. os documentos precisam ter
+            sido indexados com a ferramenta indexar_documento.
+        quantidade: quantidade de trechos retornados.
+    """
+    resultados = indice_vetorial.buscar(pergunta, k=quantidade, documentos_formatados=protocolos_documentos)
+    return [
+        {
+            "documento": resultado.chunk.documento_formatado,
+            "processo": resultado.chunk.procedimento_formatado,
+            "score": round(resultado.score, 3),
+            "trecho": resultado.chunk.texto,
+        }
+        for resultado in resultados
+    ]
+
+
+def _assinar_documento(id_unidade: str, protocolo_documento: str):
+    documento = _sei(sei_async.consultar_documento(indice.resolver_unidade(id_unidade), protocolo_documento))
+    conversao = conversoes.converter(documento.id_documento, documento.link_acesso)
+    indice_similaridade.adicionar(documento.id_documento, conversao.sha256, conversao.markdown, documento.documento_formatado)
+    return documento, conversao
+
+
+@tool
+@_com_eventos
+def comparar_documentos(id_unidade: str, protocolo_documento_a: str, protocolo_documento_b: str) -> Any:
+    """
+        compara o conteudo de dois documentos do sei e retorna a similaridade (de 0 a 1) e os trechos em comum.
+
+        Args:
+        id_unidade: id ou sigla da unidade do usuario
+        protocolo_documento_a: numero do protocolo do primeiro documento.
+        protocolo_documento_b: numero do protocolo do segundo documento.
+    """
+    documento_a, conversao_a = _assinar_documento(id_unidade, protocolo_documento_a)
+    documento_b, conversao_b = _assinar_documento(id_unidade, protocolo_documento_b)
+    secoes = secoes_em_comum(conversao_a.chunks, conversao_b.chunks)
+    return {
+        "similaridade": round(indice_similaridade.similaridade(documento_a.id_documento, documento_b.id_documento), 3),
+        "secoes_em_comum": [
+            {"similaridade": round(secao.similaridade, 3), "trecho_a": secao.trecho_a[:500], "trecho_b": secao.trecho_b[:500]}
+            for secao in secoes
+        ],
+    }
+
+
+@tool
+@_com_eventos
+def documentos_semelhantes(id_unidade: str, protocolo_documento: str, quantidade: int = 5) -> Any:
+    """
+        lista os documentos ja analisados mais semelhantes a um documento do sei.
+
+        Args:
+        id_unidade: id ou sigla da unidade do usuario
+        protocolo_documento: numero do protocolo do documento.
+        quantidade: quantidade maxima de documentos retornados.
+    """
+    documento, _ = _assinar_documento(id_unidade, protocolo_documento)
+    return [
+        {"documento": semelhante.rotulo, "similaridade": round(semelhante.similaridade, 3)}
+        for semelhante in indice_similaridade.semelhantes(documento.id_documento, limite=quantidade)
+    ]
+
+
+@tool
+@_com_eventos
+def comparar_processos(id_unidade: str, protocolo_processo_a: str, protocolo_processo_b: str) -> Any:
+    """
+        compara os metadados (tipo, assuntos, interessados e especificacao) de dois processos do sei. retorna a
+        similaridade de cada campo e a geral, de 0 a 1.
+
+        Args:
+        id_unidade: id ou sigla da unidade do usuario
+        protocolo_processo_a: numero do protocolo do primeiro processo.
+        protocolo_processo_b: numero do protocolo do segundo processo.
+    """
+    id_unidade = indice.resolver_unidade(id_unidade)
+    processos = [
+        _sei(sei_async.consultar_procedimento(id_unidade, protocolo, retornar_assuntos=True, retornar_interessados=True))
+        for protocolo in (protocolo_processo_a, protocolo_processo_b)
+    ]
+    return similaridade_processos(*processos)
+
+
+async def _listar_andamentos(id_unidade: str, protocolo_processo: str) -> list[Andamento]:
+    return [andamento async for andamento in sei_async.iterar_andamentos(id_unidade, protocolo_processo)]
+
+
+def _linha_do_tempo(id_unidade: str, protocolo_processo: str, periodo: str = "dia") -> dict:
+    andamentos = _sei(_listar_andamentos(indice.resolver_unidade(id_unidade), protocolo_processo))
+    grupos = agrupar_andamentos(andamentos, periodo)
+
+    dias_desde_ultimo_andamento = None
+    if grupos:
+        ultimo = list(grupos.values())[-1][-1]
+        dias_desde_ultimo_andamento = (datetime.now() - ultimo.data_hora_datetime).days
+
+    return {
+        "dias_desde_ultimo_andamento": dias_desde_ultimo_andamento,
+        "periodos": [
+            {
+                "inicio": format_data(inicio),
+                "andamentos": [
+                    {
+                        "data_hora": andamento.data_hora,
+                        "descricao": andamento.descricao,
+                        "unidade": andamento.unidade.sigla if andamento.unidade else None,
+                    }
+                    for andamento in andamentos_periodo
+                ],
+            }
+            for inicio, andamentos_periodo in grupos.items()
+        ],
+    }
+
+
+@tool
+@_com_eventos
+def linha_do_tempo(id_unidade: str, protocolo_processo: str, periodo: str = "dia") -> Any:
+    """
+        retorna os andamentos de um processo do SEI em ordem cronologica, agrupados por periodo.
+
+        Args:
+        id_unidade: id ou sigla da unidade do usuario
+        protocolo_processo: numero do protocolo do processo.
+        periodo: agrupamento dos andamentos: "dia", "semana" ou "mes".
+    """
+    return _linha_do_tempo(id_unidade, protocolo_processo, periodo)
+
+
+@tool
+@_com_eventos
+def buscar_unidade(nome: str) -> Any:
+    """
+        busca unidades do SEI pelo inicio de qualquer palavra do nome ou pela sigla.
+
+        Args:
+        nome: sigla ou parte do nome da unidade.
+    """
+    unidade = indice.unidade(nome)
+    if unidade is not None:
+        return [unidade]
+    return indice.buscar_unidades(nome)
 
 
 def executar_api():
     """
     Executa a API do agente SEI.
     """
-  
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+
+    settings = get_settings()
+    uvicorn.run(app, host=settings.host, port=settings.port)
 
 def main():
     """ Main function to run the SeiAgentClient API.
     """
-    nest_asyncio.apply()
+    global sei_client, indice, pool_conversao, conversoes, indice_vetorial, ingestor, indice_similaridade, jobs, agent_client, agent
+
+    # Configuracao lida das variaveis de ambiente SEI_IA_* (ver settings.py)
+    settings = get_settings()
+    settings.validar()
 
-    global sei_client, agent_client, agent
-          
+    # Cliente sincrono usado apenas pela atualizacao do indice de referencias,
+    # que roda em uma thread propria; as ferramentas usam o AsyncClient criado
+    # no lifespan da API.
     sei_client = Client(
-        #alterar para o ambiente desejado
-        url="https://homologacaoia.sei.sp.gov.br/sei/controlador_ws.php?servico=sei",
-        sigla_sistema="ORACLE",
-        identificacao_servico="8d1db23b8a93f414580c54db9699a67e202816abc14ee782470ea01728d09aba52b34ee9"
+        url=settings.sei_url,
+        sigla_sistema=settings.sei_sigla_sistema,
+        identificacao_servico=settings.sei_identificacao_servico,
     )
 
+    indice = ReferenceIndex(sei_client, unidades=settings.unidades_indice or (settings.sei_id_unidade,))
+    indice.iniciar()
+
+    pool_conversao = PoolConversao(
+        max_workers=settings.conversao_workers,
+        max_fila=settings.conversao_max_fila,
+        timeout=settings.conversao_timeout,
+    )
+    conversoes = ConversaoCache(conversor=pool_conversao.converter)
+
+    if settings.rag_modelo:
+        embedder = SentenceTransformerEmbedder(settings.rag_modelo)
+    else:
+        embedder = HashingEmbedder(settings.rag_dimensao)
+    indice_vetorial = IndiceVetorial(embedder)
+    ingestor = Ingestor(indice_vetorial, conversoes, chunk_tokens=settings.rag_chunk_tokens)
+    indice_similaridade = IndiceSimilaridade()
+
+    # Operacoes longas pedidas pelo POST /jobs, fora das requisicoes de chat
+    jobs = JobManager(
+        {
+            "resumo": _resumir_documento,
+            "conversao": _converter_documento,
+            "linha_do_tempo": _linha_do_tempo,
+        },
+        max_workers=settings.jobs_workers,
+        max_fila=settings.jobs_max_fila,
+        validade=settings.jobs_validade,
+        lease=settings.jobs_lease,
+    )
+
+    # Cria o LLM e as chains de resumo antes da primeira requisicao
+    get_chain()
+
     agent_client = AgentClient(
-        auth_type="api_key",
-        profile="DEFAULT",
-        region="sa-saopaulo-1",
+        auth_type=settings.oci_auth_type,
+        profile=settings.oci_profile,
+        region=settings.oci_region,
         debug=True,
     )
 
     agent = Agent(
         client=agent_client,
         display_name="sei-ai",
-        #alterar para o compartment_id do ambiente desejado
-        compartment_id="ocid1.compartment.oc1..aaaaaaaamrvydbfbzcb3ys7dln2sl2giax43iuf6zi6uny3inhtu46ummv7a",
-        #alterar para o agent_endpoint_id do ambiente desejado
-        agent_endpoint_id="ocid1.genaiagentendpoint.oc1.sa-saopaulo-1.amaaaaaa6g6dsrya5v5x2tonqcww7kfhr6xfqousu7tiib4lzievvypdhm2q",
+        compartment_id=settings.compartment_id,
+        agent_endpoint_id=settings.agent_endpoint_id,
         description="Um agente para interagir com o sistema SEI.",
-        instructions="O id do usuario  e '00029443830'. o id da unidade e 110047993. Use as ferramentas disponíveis para obter informações sobre processos e documentos no sistema SEI. Use a ferramenta rag para pesquisar semanticamente os documentos. Para obter informações sobre um processo, utilize a ferramenta get_processo. Para obter informações sobre um documento, utilize a ferramenta get_documento. Para resumir o conteúdo de um documento, utilize a ferramenta resumir_documento. Para converter o conteúdo de um documento para texto plano, utilize a ferramenta convert_documento. Sempre que possível, forneça respostas detalhadas e completas.",
-
-        tools=[get_processo, get_documento, resumir_documento, convert_documento],
+        instructions=(
+            f"O id do usuario  e '{settings.sei_id_usuario}'. o id da unidade e {settings.sei_id_unidade}. Use as "
+            "ferramentas disponíveis para obter informações sobre processos e documentos no sistema SEI. Para responder "
+            "perguntas sobre o conteudo de documentos, indexe-os com a ferramenta indexar_documento e pesquise os trechos "
+            "relevantes com a ferramenta buscar_trechos, em vez de converter o documento inteiro. Para saber se documentos "
+            "sao semelhantes, utilize as ferramentas comparar_documentos e documentos_semelhantes; para processos, utilize "
+            "a ferramenta comparar_processos. Para obter informações sobre um processo, utilize a ferramenta get_processo. "
+            "Para obter informações sobre um documento, utilize a ferramenta get_documento. Para resumir o conteúdo de um "
+            "documento, utilize a ferramenta resumir_documento. Para converter o conteúdo de um documento para texto plano, "
+            "utilize a ferramenta convert_documento. Para encontrar uma unidade pelo nome ou pela sigla, utilize a "
+            "ferramenta buscar_unidade. Para obter a linha do tempo de um processo, com os andamentos ja ordenados por "
+            "data, utilize a ferramenta linha_do_tempo. Sempre que possível, forneça respostas detalhadas e completas."
+        ),
+
+        tools=[
+            get_processo,
+            get_documento,
+            resumir_documento,
+            convert_documento,
+            buscar_unidade,
+            linha_do_tempo,
+            indexar_documento,
+            buscar_trechos,
+            comparar_documentos,
+            documentos_semelhantes,
+            comparar_processos,
+        ],
     )
 
     # Setup the agent
     agent.setup()
 
-    executar_api()
-    
+    try:
+        executar_api()
+    finally:
+        indice.parar()
+        jobs.shutdown(wait=False)
+        pool_conversao.shutdown(wait=False)
+
 
 if __name__ == "__main__":
     main()
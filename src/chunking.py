@@ -0,0 +1,89 @@
+"""
+Agrupamento dos trechos convertidos pelo Docling em chunks próximos de um
+orçamento de tokens, para reduzir o número de chamadas ao LLM por documento.
+"""
+
+from dataclasses import dataclass
+from typing import Callable
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+SEPARADOR = "\n\n"
+
+ContadorTokens = Callable[[str], int]
+
+
+def contar_tokens_aproximado(texto: str) -> int:
+    """Estimativa de ~4 caracteres por token, sem depender de um tokenizador"""
+    return len(texto) // 4 + 1
+
+
+@dataclass
+class EstatisticasChunks:
+    trechos: int
+    """Trechos recebidos do Docling."""
+    chunks: int
+    """Chunks produzidos."""
+    divididos: int
+    """Trechos maiores que o orçamento, divididos em vários chunks."""
+    tokens_total: int
+    tokens_min: int
+    tokens_max: int
+    tokens_medio: float
+
+
+def empacotar(
+    trechos: list[str],
+    token_alvo: int,
+    contar_tokens: ContadorTokens = contar_tokens_aproximado,
+) -> tuple[list[str], EstatisticasChunks]:
+    """
+    Junta trechos consecutivos enquanto o total couber em `token_alvo` tokens,
+    sem quebrar os limites estruturais (seções, tabelas, listas) definidos pelo
+    Docling. Apenas trechos maiores que `token_alvo` são divididos, por
+    parágrafos, linhas e palavras.
+    """
+    divisor = RecursiveCharacterTextSplitter(
+        chunk_size=token_alvo, chunk_overlap=0, length_function=contar_tokens
+    )
+    tokens_separador = contar_tokens(SEPARADOR)
+
+    chunks: list[str] = []
+    tokens_chunks: list[int] = []
+    atual: list[str] = []
+    tokens_atual = 0
+    divididos = 0
+
+    def fechar():
+        nonlocal atual, tokens_atual
+        if atual:
+            chunks.append(SEPARADOR.join(atual))
+            tokens_chunks.append(tokens_atual)
+            atual, tokens_atual = [], 0
+
+    for trecho in trechos:
+        tokens = contar_tokens(trecho)
+        if tokens > token_alvo:
+            fechar()
+            divididos += 1
+            for parte in divisor.split_text(trecho):
+                chunks.append(parte)
+                tokens_chunks.append(contar_tokens(parte))
+            continue
+
+        if atual and tokens_atual + tokens_separador + tokens > token_alvo:
+            fechar()
+        tokens_atual += tokens if not atual else tokens_separador + tokens
+        atual.append(trecho)
+    fechar()
+
+    estatisticas = EstatisticasChunks(
+        trechos=len(trechos),
+        chunks=len(chunks),
+        divididos=divididos,
+        tokens_total=sum(tokens_chunks),
+        tokens_min=min(tokens_chunks, default=0),
+        tokens_max=max(tokens_chunks, default=0),
+        tokens_medio=sum(tokens_chunks) / len(tokens_chunks) if tokens_chunks else 0.0,
+    )
+    return chunks, estatisticas
@@ -0,0 +1,259 @@
+"""
+Conversão dos documentos do SEI para texto com o Docling, com cache em disco.
+
+Cada documento possui um índice em `documentos/<id_documento>.json` com o ETag
+e o hash SHA-256 do conteúdo baixado; a conversão é gravada uma única vez em
+`conversoes/<sha256>.json`. Um documento já convertido é baixado novamente
+apenas para confirmar que não mudou (ou nem isso, quando o servidor responde
+`304 Not Modified` ao ETag), e o Docling não é executado.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import asdict, dataclass
+from functools import cache
+from io import BytesIO
+from pathlib import Path
+from typing import Callable
+
+import requests
+
+from python_sei.singleflight import SingleFlight
+from python_sei.wsdl import DEFAULT_CACHE_DIR, escrever_atomico
+
+DEFAULT_TIMEOUT = 60
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_FILA = 8
+DEFAULT_TIMEOUT_CONVERSAO = 300
+
+Conversor = Callable[[str, bytes], tuple[str, list[str]]]
+
+
+class ConversorOcupado(Exception):
+    """Todas as posições da fila de conversão estão ocupadas"""
+
+
+class TempoConversaoEsgotado(TimeoutError):
+    """A conversão excedeu o tempo limite"""
+
+
+@dataclass
+class Conversao:
+    sha256: str
+    markdown: str
+    chunks: list[str]
+
+
+@cache
+def _docling():
+    # Os modelos do Docling são carregados uma única vez por processo.
+    from docling.chunking import HybridChunker
+    from docling.document_converter import DocumentConverter
+
+    return DocumentConverter(), HybridChunker()
+
+
+def converter_conteudo(nome: str, conteudo: bytes) -> tuple[str, list[str]]:
+    """
+    Converte o documento com o Docling e retorna o markdown e os trechos
+    (chunks) do documento, obtidos de uma única conversão
+    """
+    from docling.datamodel.base_models import DocumentStream
+
+    converter, chunker = _docling()
+    resultado = converter.convert(DocumentStream(name=nome, stream=BytesIO(conteudo)))
+    documento = resultado.document
+
+    chunks = [chunker.contextualize(chunk=chunk) for chunk in chunker.chunk(dl_doc=documento)]
+    return documento.export_to_markdown(), chunks
+
+
+def _tempo_esgotado(signum, frame):
+    raise TempoConversaoEsgotado("Tempo limite da conversão esgotado")
+
+
+def _converter_no_worker(
+    conversor: Conversor, nome: str, conteudo: bytes, timeout: float | None
+) -> tuple[str, list[str]]:
+    # As tarefas rodam na thread principal do worker, então o alarme interrompe
+    # a própria conversão e libera o processo para a próxima tarefa.
+    if timeout is not None and hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _tempo_esgotado)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return conversor(nome, conteudo)
+    finally:
+        if timeout is not None and hasattr(signal, "SIGALRM"):
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class PoolConversao:
+    """
+    Executa as conversões do Docling em processos separados, para que uma
+    conversão longa não bloqueie as demais requisições da API.
+
+    Até `max_fila` conversões podem estar em execução ou aguardando; além disso,
+    `converter` falha imediatamente com `ConversorOcupado`. Conversões que
+    excedem `timeout` segundos são interrompidas com `TempoConversaoEsgotado`.
+    `conversor` precisa ser uma função de módulo, para ser enviada aos workers.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_WORKERS,
+        max_fila: int = DEFAULT_MAX_FILA,
+        timeout: float | None = DEFAULT_TIMEOUT_CONVERSAO,
+        conversor: Conversor = converter_conteudo,
+    ):
+        self.max_workers = max_workers
+        self.max_fila = max_fila
+        self.timeout = timeout
+        self.conversor = conversor
+        self._vagas = threading.BoundedSemaphore(max_fila)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # `spawn` evita herdar as threads e conexões do processo da API.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def submeter(self, nome: str, conteudo: bytes) -> Future:
+        if not self._vagas.acquire(blocking=False):
+            raise ConversorOcupado(
+                f"Fila de conversão cheia ({self.max_fila} documentos em andamento)"
+            )
+        try:
+            future = self.executor.submit(_converter_no_worker, self.conversor, nome, conteudo, self.timeout)
+        except BaseException:
+            self._vagas.release()
+            raise
+        # A vaga só é liberada quando o worker termina, mesmo que quem aguardava
+        # tenha desistido antes.
+        future.add_done_callback(lambda _: self._vagas.release())
+        return future
+
+    def converter(self, nome: str, conteudo: bytes) -> tuple[str, list[str]]:
+        """Equivalente a `converter_conteudo`, executado em um worker do pool"""
+        future = self.submeter(nome, conteudo)
+        # Margem para o worker interromper a conversão e devolver o erro.
+        timeout = None if self.timeout is None else self.timeout + 5
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TempoConversaoEsgotado("Tempo limite da conversão esgotado") from None
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+
+class ConversaoCache:
+    """
+    Conversões dos documentos do SEI, indexadas pelo conteúdo. `conversor`
+    executa as conversões que não estão no cache, por exemplo
+    `PoolConversao.converter`.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike | None = None,
+        session: requests.Session | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        conversor: Conversor = converter_conteudo,
+    ):
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_DIR / "docling"
+        self.session = session if session is not None else requests.Session()
+        self.timeout = timeout
+        self.conversor = conversor
+        self._documentos = self.path / "documentos"
+        self._conversoes = self.path / "conversoes"
+        self._documentos.mkdir(parents=True, exist_ok=True)
+        self._conversoes.mkdir(parents=True, exist_ok=True)
+        self._inflight = SingleFlight()
+
+    def _indice(self, id_documento: str) -> Path:
+        return self._documentos / f"{hashlib.sha256(id_documento.encode()).hexdigest()}.json"
+
+    def _ler_indice(self, id_documento: str) -> dict | None:
+        try:
+            indice = json.loads(self._indice(id_documento).read_bytes())
+        except (FileNotFoundError, ValueError):
+            return None
+        return indice if indice.get("id_documento") == id_documento else None
+
+    def _ler_conversao(self, sha256: str) -> Conversao | None:
+        try:
+            return Conversao(**json.loads((self._conversoes / f"{sha256}.json").read_bytes()))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+
+    def _gravar(self, id_documento: str, etag: str | None, conversao: Conversao) -> None:
+        conversao_path = self._conversoes / f"{conversao.sha256}.json"
+        if not conversao_path.exists():
+            escrever_atomico(conversao_path, json.dumps(asdict(conversao)).encode())
+
+        indice = {"id_documento": id_documento, "etag": etag, "sha256": conversao.sha256}
+        escrever_atomico(self._indice(id_documento), json.dumps(indice).encode())
+
+    def baixar(self, url: str, etag: str | None = None) -> requests.Response:
+        headers = {"If-None-Match": etag} if etag else {}
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    def converter(self, id_documento: str, url: str) -> Conversao:
+        """
+        Retorna a conversão do documento `id_documento`, disponível em `url`.
+        Chamadas simultâneas para o mesmo documento compartilham a conversão.
+        """
+        return self._inflight.do(id_documento, lambda: self._converter(id_documento, url))
+
+    def _converter(self, id_documento: str, url: str) -> Conversao:
+        indice = self._ler_indice(id_documento)
+        response = self.baixar(url, indice and indice["etag"])
+
+        if response.status_code == 304:
+            conversao = self._ler_conversao(indice["sha256"])
+            if conversao is not None:
+                return conversao
+            response = self.baixar(url)
+
+        conteudo = response.content
+        sha256 = hashlib.sha256(conteudo).hexdigest()
+        conversao = self._ler_conversao(sha256)
+        if conversao is None:
+            markdown, chunks = self.conversor(self._nome(id_documento, response), conteudo)
+            conversao = Conversao(sha256=sha256, markdown=markdown, chunks=chunks)
+
+        self._gravar(id_documento, response.headers.get("ETag"), conversao)
+        return conversao
+
+    @staticmethod
+    def _nome(id_documento: str, response: requests.Response) -> str:
+        # O Docling identifica o formato pela extensão do nome.
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+        extensao = {
+            "application/pdf": ".pdf",
+            "text/html": ".html",
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document": ".docx",
+        }.get(content_type)
+        if extensao is None:
+            extensao = Path(response.url.split("?")[0]).suffix or ".html"
+        return f"{id_documento}{extensao}"
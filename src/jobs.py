@@ -0,0 +1,262 @@
+"""
+Execução em segundo plano das operações longas do agente (resumo, conversão e
+linha do tempo), para que não dependam de uma requisição HTTP aberta.
+
+Os jobs são executados por um pool de threads limitado e gravados em um banco
+SQLite, de modo que o resultado pode ser consultado depois e sobrevive a um
+reinício da API. Um job pedido novamente para o mesmo alvo, enquanto ainda está
+em andamento ou depois de concluído há menos de `validade` segundos, não é
+executado de novo: o job existente é retornado.
+
+O banco pode ser compartilhado pelos workers da API. Cada job em andamento tem
+um dono (o `JobManager` que o executa) e um lease, renovado enquanto o dono
+está ativo; jobs com o lease vencido são de um worker que parou e ficam com
+erro, para que um novo pedido os execute de novo.
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from python_sei.wsdl import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_FILA = 32
+DEFAULT_VALIDADE = 3600.0
+DEFAULT_LEASE = 60.0
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+
+Executor = Callable[[str, str], Any]
+"""Executa um tipo de job a partir de `id_unidade` e `protocolo`."""
+
+
+class JobsOcupado(Exception):
+    """Todas as posições da fila de jobs estão ocupadas"""
+
+
+class TipoJobDesconhecido(ValueError):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    tipo: str
+    id_unidade: str
+    protocolo: str
+    status: str
+    criado_em: float
+    iniciado_em: float | None = None
+    concluido_em: float | None = None
+    resultado: Any = None
+    erro: str | None = None
+
+
+_COLUNAS = "id, tipo, id_unidade, protocolo, status, criado_em, iniciado_em, concluido_em, resultado, erro"
+
+
+def _job_from_row(row: tuple) -> Job:
+    job = Job(*row)
+    if job.resultado is not None:
+        job.resultado = json.loads(job.resultado)
+    return job
+
+
+class JobManager:
+    """
+    Executa os jobs com até `max_workers` threads. Até `max_fila` jobs podem
+    estar em execução ou aguardando; além disso, `submeter` falha imediatamente
+    com `JobsOcupado`. `executores` associa cada tipo de job à função que o
+    executa, e o resultado dela precisa ser serializável em JSON.
+    """
+
+    def __init__(
+        self,
+        executores: dict[str, Executor],
+        path: str | os.PathLike | None = None,
+        max_workers: int = DEFAULT_WORKERS,
+        max_fila: int = DEFAULT_MAX_FILA,
+        validade: float = DEFAULT_VALIDADE,
+        lease: float = DEFAULT_LEASE,
+    ):
+        self.executores = executores
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_DIR / "jobs.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_fila = max_fila
+        self.validade = validade
+        self.lease = lease
+        self._dono = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._vagas = threading.BoundedSemaphore(max_fila)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    tipo TEXT NOT NULL,
+                    id_unidade TEXT NOT NULL,
+                    protocolo TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    criado_em REAL NOT NULL,
+                    iniciado_em REAL,
+                    concluido_em REAL,
+                    resultado TEXT,
+                    erro TEXT,
+                    dono TEXT,
+                    lease_ate REAL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS jobs_alvo
+                ON jobs (tipo, id_unidade, protocolo, criado_em)
+                """
+            )
+            # Um único job em andamento por alvo, entre todos os workers.
+            self._conn.execute(
+                f"""
+                CREATE UNIQUE INDEX IF NOT EXISTS jobs_ativos
+                ON jobs (tipo, id_unidade, protocolo) WHERE status IN ('{PENDENTE}', '{EXECUTANDO}')
+                """
+            )
+            self._expirar()
+
+        self._parar = threading.Event()
+        self._renovacao = threading.Thread(target=self._renovar, name="job-lease", daemon=True)
+        self._renovacao.start()
+
+    def _expirar(self) -> None:
+        """Marca com erro os jobs em andamento cujo lease venceu. Chamado em uma transação."""
+        agora = time.time()
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, erro = ?, concluido_em = ? WHERE status IN (?, ?) AND lease_ate < ?",
+            (ERRO, "Interrompido: o worker da API que executava o job parou", agora, PENDENTE, EXECUTANDO, agora),
+        )
+
+    def _renovar(self) -> None:
+        while not self._parar.wait(self.lease / 3):
+            try:
+                with self._lock, self._conn:
+                    self._conn.execute(
+                        "UPDATE jobs SET lease_ate = ? WHERE dono = ? AND status IN (?, ?)",
+                        (time.time() + self.lease, self._dono, PENDENTE, EXECUTANDO),
+                    )
+            except sqlite3.Error:
+                logger.exception("Falha ao renovar o lease dos jobs")
+
+    def obter(self, id: str) -> Job | None:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_COLUNAS} FROM jobs WHERE id = ?", (id,)).fetchone()
+        return None if row is None else _job_from_row(row)
+
+    def _existente(self, tipo: str, id_unidade: str, protocolo: str) -> Job | None:
+        """Job em andamento, ou concluído dentro da validade, para o mesmo alvo"""
+        row = self._conn.execute(
+            f"""
+            SELECT {_COLUNAS} FROM jobs
+            WHERE tipo = ? AND id_unidade = ? AND protocolo = ?
+              AND (status IN (?, ?) OR (status = ? AND concluido_em >= ?))
+            ORDER BY criado_em DESC LIMIT 1
+            """,
+            (tipo, id_unidade, protocolo, PENDENTE, EXECUTANDO, CONCLUIDO, time.time() - self.validade),
+        ).fetchone()
+        return None if row is None else _job_from_row(row)
+
+    def submeter(self, tipo: str, id_unidade: str, protocolo: str) -> Job:
+        """
+        Enfileira o job, ou retorna o job existente para o mesmo alvo. Falha com
+        `TipoJobDesconhecido` ou `JobsOcupado`.
+        """
+        if tipo not in self.executores:
+            raise TipoJobDesconhecido(f"Tipo de job desconhecido: {tipo}")
+
+        with self._lock:
+            with self._conn:
+                self._expirar()
+            existente = self._existente(tipo, id_unidade, protocolo)
+            if existente is not None:
+                return existente
+
+            if not self._vagas.acquire(blocking=False):
+                raise JobsOcupado(f"Fila de jobs cheia ({self.max_fila} jobs em andamento)")
+            job = Job(uuid.uuid4().hex, tipo, id_unidade, protocolo, PENDENTE, time.time())
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        """
+                        INSERT INTO jobs (id, tipo, id_unidade, protocolo, status, criado_em, dono, lease_ate)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        (
+                            job.id, job.tipo, job.id_unidade, job.protocolo, job.status, job.criado_em,
+                            self._dono, job.criado_em + self.lease,
+                        ),
+                    )
+            except sqlite3.IntegrityError:
+                # Outro worker criou o job para o mesmo alvo depois da consulta.
+                self._vagas.release()
+                existente = self._existente(tipo, id_unidade, protocolo)
+                if existente is None:
+                    raise
+                return existente
+            except BaseException:
+                self._vagas.release()
+                raise
+            try:
+                self._executor.submit(self._executar, job)
+            except BaseException:
+                self._vagas.release()
+                raise
+        return job
+
+    def _atualizar(self, id: str, status_atual: str | None = None, **campos) -> bool:
+        """Atualiza o job, opcionalmente apenas se ainda estiver em `status_atual`"""
+        atribuicoes = ", ".join(f"{campo} = ?" for campo in campos)
+        sql, parametros = f"UPDATE jobs SET {atribuicoes} WHERE id = ?", [*campos.values(), id]
+        if status_atual is not None:
+            sql += " AND status = ?"
+            parametros.append(status_atual)
+        with self._lock, self._conn:
+            return self._conn.execute(sql, parametros).rowcount == 1
+
+    def _executar(self, job: Job) -> None:
+        try:
+            # Um job expirado enquanto aguardava (lease não renovado) não é executado.
+            if not self._atualizar(job.id, PENDENTE, status=EXECUTANDO, iniciado_em=time.time()):
+                return
+            try:
+                resultado = self.executores[job.tipo](job.id_unidade, job.protocolo)
+                resultado = json.dumps(resultado, ensure_ascii=False, default=str)
+            except Exception as e:
+                logger.exception("Job %s (%s %s) falhou", job.id, job.tipo, job.protocolo)
+                self._atualizar(job.id, status=ERRO, erro=str(e) or type(e).__name__, concluido_em=time.time())
+            else:
+                self._atualizar(job.id, status=CONCLUIDO, resultado=resultado, concluido_em=time.time())
+        finally:
+            self._vagas.release()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._parar.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        if wait:
+            self._conn.close()
@@ -1 +1,6 @@
+from .async_client import AsyncClient  # noqa
+from .batch import ResultadoLote  # noqa
+from .cache import MemoryBackend, ResponseCache, SqliteBackend  # noqa
 from .client import Client  # noqa
+from .sync import AndamentoStore, Sincronizador  # noqa
+from .index import ReferenceIndex  # noqa
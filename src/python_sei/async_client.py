@@ -0,0 +1,135 @@
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, Callable
+
+import httpx
+import zeep
+import zeep.exceptions
+import zeep.proxy
+import zeep.xsd
+
+from .batch import executar_lote_async
+from .cache import cache_key
+from .client import STREAM_CHUNK_SIZE, BaseClient, is_read_only
+from .decoder import ArrayStreamParser
+from .models import Andamento
+from .singleflight import AsyncSingleFlight
+from .transport import TransportStats, build_async_transport
+
+
+class AsyncClient(BaseClient):
+    """
+    Versão assíncrona de `Client`, sobre o transporte httpx do zeep.
+
+    Possui os mesmos métodos e assinaturas de `Client`, mas cada método retorna
+    uma corrotina:
+
+        async with AsyncClient(url, sigla_sistema, identificacao_servico) as client:
+            procedimento = await client.consultar_procedimento(id_unidade, protocolo)
+    """
+
+    _zeep_client_class = zeep.AsyncClient
+    _service_proxy_class = zeep.proxy.AsyncServiceProxy
+    _single_flight_class = AsyncSingleFlight
+    _retryable_errors = (httpx.TransportError, zeep.exceptions.TransportError)
+
+    def _build_transport(self, cache):
+        return build_async_transport(self.transport_options, cache=cache)
+
+    @property
+    def transport_stats(self) -> TransportStats:
+        """O httpx não expõe o uso do pool de conexões; apenas `retries` é contabilizado."""
+        return TransportStats(retries=self._retries.value)
+
+    async def _send(self, operation: str, params: dict, fast: bool = False):
+        if fast:
+            async def method(**params):
+                response = await self.client.transport.post_xml(
+                    *self._raw_request(operation, params)
+                )
+                return self._parse_raw(operation, response)
+        else:
+            method = getattr(self._service, operation)
+
+        tentativa = 0
+        while True:
+            try:
+                return await method(**params)
+            except self._retryable_errors as e:
+                if not self._should_retry(operation, tentativa, e):
+                    raise
+
+            self._retries.increment()
+            await asyncio.sleep(self.transport_options.backoff(tentativa))
+            tentativa += 1
+
+    async def _fetch(self, operation: str, decode: Callable | None, params: dict):
+        fast = self._is_fast(operation, decode)
+        value = self._decode(decode, await self._send(operation, params, fast), fast)
+        self._cache_update(operation, decode, params, value)
+        return value
+
+    async def _call(self, operation: str, decode: Callable | None, **kwargs):
+        params = self._params(kwargs)
+        hit, value, fetch_params = self._cache_lookup(operation, decode, params)
+        if hit:
+            return value
+
+        if self.inflight is None or not is_read_only(operation):
+            value = await self._fetch(operation, decode, fetch_params)
+        else:
+            value = await self.inflight.do(
+                cache_key(operation, fetch_params),
+                lambda: self._fetch(operation, decode, fetch_params),
+            )
+        return self._project(operation, params, fetch_params, value)
+
+    async def _batch(self, protocolos, funcao, max_concorrencia):
+        return await executar_lote_async(protocolos, funcao, max_concorrencia)
+
+    async def iterar_andamentos(
+        self,
+        id_unidade: str,
+        protocolo_procedimento: str,
+        retornar_atributos: bool = False,
+        andamentos: list[str] = zeep.xsd.SkipValue,
+        tarefas: list[str] = zeep.xsd.SkipValue,
+        tarefas_modulos: list[str] = zeep.xsd.SkipValue,
+        desde: datetime | None = None,
+        ate: datetime | None = None,
+    ) -> AsyncIterator[Andamento]:
+        """Versão assíncrona de `Client.iterar_andamentos`"""
+        address, message, headers = self._stream_request(
+            id_unidade,
+            protocolo_procedimento,
+            retornar_atributos,
+            andamentos,
+            tarefas,
+            tarefas_modulos,
+        )
+        transport = self.client.transport
+        async with transport.client.stream(
+            "POST", address, content=message, headers=headers
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                self._stream_error(transport.new_response(response))
+
+            parser = ArrayStreamParser()
+            async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                for element in parser.feed(chunk):
+                    andamento = self._andamento_from_element(element, tarefas, desde, ate)
+                    if andamento is not None:
+                        yield andamento
+
+    async def aclose(self) -> None:
+        transport = self.client.transport
+        await transport.aclose()
+        # O `AsyncTransport` do zeep fecha apenas o cliente assíncrono.
+        transport.wsdl_client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,80 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_MAX_CONCORRENCIA = 8
+
+
+@dataclass
+class ResultadoLote(Generic[T]):
+    """Resultado de um item de uma consulta em lote"""
+
+    protocolo: str
+    resultado: T | None = None
+    erro: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.erro is None
+
+
+def _validar_concorrencia(max_concorrencia: int) -> None:
+    if max_concorrencia < 1:
+        raise ValueError(f"max_concorrencia deve ser positivo: {max_concorrencia}")
+
+
+def _montar_resultados(
+    protocolos: list[str], resultados: dict[str, ResultadoLote]
+) -> list[ResultadoLote]:
+    return [resultados[protocolo] for protocolo in protocolos]
+
+
+def executar_lote(
+    protocolos: list[str],
+    funcao: Callable[[str], T],
+    max_concorrencia: int = DEFAULT_MAX_CONCORRENCIA,
+) -> list[ResultadoLote[T]]:
+    """
+    Executa `funcao` para cada protocolo em threads, com no máximo
+    `max_concorrencia` chamadas simultâneas. Protocolos repetidos são consultados
+    uma única vez e os resultados seguem a ordem de `protocolos`.
+    """
+    _validar_concorrencia(max_concorrencia)
+    unicos = list(dict.fromkeys(protocolos))
+    if not unicos:
+        return []
+
+    def executar(protocolo: str) -> ResultadoLote[T]:
+        try:
+            return ResultadoLote(protocolo, resultado=funcao(protocolo))
+        except Exception as e:
+            return ResultadoLote(protocolo, erro=e)
+
+    with ThreadPoolExecutor(max_workers=min(max_concorrencia, len(unicos))) as executor:
+        resultados = dict(zip(unicos, executor.map(executar, unicos)))
+
+    return _montar_resultados(protocolos, resultados)
+
+
+async def executar_lote_async(
+    protocolos: list[str],
+    funcao: Callable[[str], Awaitable[T]],
+    max_concorrencia: int = DEFAULT_MAX_CONCORRENCIA,
+) -> list[ResultadoLote[T]]:
+    """Equivalente assíncrono de `executar_lote`"""
+    _validar_concorrencia(max_concorrencia)
+    unicos = list(dict.fromkeys(protocolos))
+    semaforo = asyncio.Semaphore(max_concorrencia)
+
+    async def executar(protocolo: str) -> ResultadoLote[T]:
+        async with semaforo:
+            try:
+                return ResultadoLote(protocolo, resultado=await funcao(protocolo))
+            except Exception as e:
+                return ResultadoLote(protocolo, erro=e)
+
+    resultados = await asyncio.gather(*(executar(protocolo) for protocolo in unicos))
+    return _montar_resultados(protocolos, dict(zip(unicos, resultados)))
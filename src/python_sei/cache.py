@@ -0,0 +1,395 @@
+import copy
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from .wsdl import DEFAULT_CACHE_DIR
+
+DEFAULT_TTLS: dict[str, float] = {
+    "listarUnidades": 60 * 60,
+    "listarSeries": 60 * 60,
+    "listarMarcadoresUnidade": 60 * 60,
+    "listarUsuarios": 15 * 60,
+    "consultarProcedimento": 60,
+    "consultarDocumento": 60,
+    "listarAndamentos": 60,
+}
+"""TTL padrão, em segundos, de cada operação. Operações ausentes não são armazenadas."""
+
+INVALIDATIONS: dict[str, tuple[str, ...]] = {
+    "definirControlePrazo": ("consultarProcedimento", "listarAndamentos"),
+}
+"""Operações de escrita e as operações de leitura afetadas por elas."""
+
+PROJECTIONS: dict[str, dict[str, tuple[str, type]]] = {
+    "consultarProcedimento": {
+        "SinRetornarAssuntos": ("assuntos", list),
+        "SinRetornarInteressados": ("interessados", list),
+        "SinRetornarObservacoes": ("observacoes", list),
+        "SinRetornarAndamentoGeracao": ("andamento_geracao", type(None)),
+        "SinRetornarAndamentoConclusao": ("andamento_conclusao", type(None)),
+        "SinRetornarUltimoAndamento": ("ultimo_andamento", type(None)),
+        "SinRetornarUnidadesProcedimentoAberto": ("unidades_procedimento_aberto", list),
+        "SinRetornarProcedimentosRelacionados": ("procedimentos_relacionados", list),
+        "SinRetornarProcedimentosAnexados": ("procedimentos_anexados", list),
+    },
+    "consultarDocumento": {
+        "SinRetornarAndamentoGeracao": ("andamento_geracao", type(None)),
+        "SinRetornarAssinaturas": ("assinaturas", list),
+        "SinRetornarPublicacao": ("publicacao", type(None)),
+        "SinRetornarCampos": ("campos", list),
+    },
+}
+"""
+Flags `SinRetornar*` de cada operação, com o campo do retorno controlado pela
+flag e o tipo do valor retornado pelo SEI quando a flag é `N`. Uma resposta obtida
+com um conjunto de flags atende qualquer subconjunto delas.
+"""
+
+_HASHED_PARAMS = frozenset({"IdentificacaoServico"})
+"""Parâmetros que entram na chave apenas como hash, para não serem gravados no cache."""
+
+
+def _hash(value: Any) -> str:
+    return hashlib.sha256(str(value).encode()).hexdigest()
+
+
+def _encode_params(params: dict) -> dict:
+    return {
+        name: _hash(value) if name in _HASHED_PARAMS else value
+        for name, value in params.items()
+    }
+
+
+def cache_key(operation: str, params: dict, endpoint: str = "") -> str:
+    """
+    Chave de cache da chamada: o endereço do serviço, o nome da operação e os
+    parâmetros, incluindo as flags `Sin*` e o hash da identificação do serviço.
+    Assim, clientes de ambientes ou credenciais diferentes não compartilham
+    respostas.
+    """
+    encoded = json.dumps(_encode_params(params), sort_keys=True, default=repr)
+    return f"{endpoint}|{operation}:{encoded}"
+
+
+def enabled_flags(operation: str, params: dict) -> frozenset[str]:
+    return frozenset(
+        flag for flag in PROJECTIONS.get(operation, ()) if params.get(flag) == "S"
+    )
+
+
+def _storage_key(operation: str, params: dict, endpoint: str) -> str:
+    flags = PROJECTIONS.get(operation)
+    if flags:
+        params = {name: value for name, value in params.items() if name not in flags}
+    return cache_key(operation, params, endpoint)
+
+
+def project(operation: str, params: dict, value: Any, flags: frozenset[str]) -> Any:
+    """
+    Adapta `value`, obtido com as flags `flags`, para a resposta que o SEI daria
+    às flags de `params`, esvaziando os campos das flags não solicitadas.
+    """
+    extra = flags - enabled_flags(operation, params)
+    if not extra or value is None:
+        return value
+
+    projected = copy.copy(value)
+    for flag in extra:
+        field, empty = PROJECTIONS[operation][flag]
+        setattr(projected, field, empty())
+    return projected
+
+
+@dataclass
+class _Projectable:
+    flags: frozenset[str]
+    value: Any
+
+
+def _matches(params: dict, filters: dict) -> bool:
+    return all(params.get(name) == value for name, value in filters.items())
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    """Entradas removidas por falta de espaço."""
+    expirations: int = 0
+    invalidations: int = 0
+
+
+class CacheBackend:
+    """
+    Armazenamento das respostas. `get` retorna `(encontrado, valor)`. As
+    implementações protegem o armazenamento e `stats` com `_lock`.
+    """
+
+    stats: CacheStats
+    _lock: threading.Lock
+
+    def increment(self, stat: str, amount: int = 1) -> None:
+        """Incrementa o contador `stat` de `stats` sob o lock do backend"""
+        with self._lock:
+            setattr(self.stats, stat, getattr(self.stats, stat) + amount)
+
+    def get(self, key: str) -> tuple[bool, Any]: ...
+
+    def set(self, key: str, operation: str, params: dict, value: Any, ttl: float) -> None: ...
+
+    def invalidate(self, operations: Iterable[str] | None, filters: dict) -> int: ...
+
+    def clear(self) -> None: ...
+
+
+@dataclass
+class _Entry:
+    operation: str
+    params: dict
+    value: Any
+    expires: float
+
+
+class MemoryBackend(CacheBackend):
+    """Cache LRU em memória, limitado a `max_size` entradas"""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry.expires < time.monotonic():
+                del self._entries[key]
+                self.stats.expirations += 1
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry.value
+
+    def set(self, key, operation, params, value, ttl):
+        with self._lock:
+            self._entries[key] = _Entry(operation, params, value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, operations, filters):
+        operations = None if operations is None else set(operations)
+        with self._lock:
+            keys = [
+                key
+                for key, entry in self._entries.items()
+                if (operations is None or entry.operation in operations)
+                and _matches(entry.params, filters)
+            ]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SqliteBackend(CacheBackend):
+    """
+    Cache LRU em um banco SQLite local, compartilhado entre processos (por exemplo,
+    os workers do uvicorn). Os valores são armazenados com `pickle`.
+    """
+
+    def __init__(self, path: str | os.PathLike | None = None, max_size: int = 10_000):
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_DIR / "responses.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    operation TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    expires REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)"
+            )
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return False, None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.stats.expirations += 1
+                return False, None
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return True, pickle.loads(row[0])
+
+    def set(self, key, operation, params, value, ttl):
+        now = time.time()
+        params = json.dumps(_encode_params(params), default=repr)
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (key, operation, params, blob, now + ttl, now),
+            )
+            evicted = self._conn.execute(
+                """
+                DELETE FROM entries WHERE key IN (
+                    SELECT key FROM entries ORDER BY accessed DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_size,),
+            ).rowcount
+            self.stats.evictions += evicted
+
+    def invalidate(self, operations, filters):
+        query = "SELECT key, params FROM entries"
+        args: tuple = ()
+        if operations is not None:
+            operations = tuple(operations)
+            query += f" WHERE operation IN ({', '.join('?' * len(operations))})"
+            args = operations
+
+        with self._lock, self._conn:
+            keys = [
+                (key,)
+                for key, params in self._conn.execute(query, args)
+                if _matches(json.loads(params), filters)
+            ]
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", keys)
+        return len(keys)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+
+
+class ResponseCache:
+    """
+    Cache das respostas já decodificadas das operações de leitura do SEI.
+
+    `ttls` define o tempo de vida, em segundos, de cada operação; operações sem
+    TTL não são armazenadas. Os objetos retornados são compartilhados entre as
+    chamadas e não devem ser alterados.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend | None = None,
+        ttls: dict[str, float] | None = None,
+    ):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.backend.stats
+
+    def is_cacheable(self, operation: str) -> bool:
+        return operation in self.ttls
+
+    def lookup(self, operation: str, params: dict, endpoint: str = "") -> tuple[bool, Any, dict]:
+        """
+        Retorna `(encontrado, valor, parametros_busca)` da chamada a `operation` no
+        serviço `endpoint` (ver `cache_key`). Em operações com flags
+        `SinRetornar*`, uma entrada obtida com mais flags também atende a chamada;
+        quando faltam flags, `parametros_busca` combina as flags da entrada com as
+        solicitadas, para que a nova resposta substitua a entrada anterior.
+        """
+        hit, stored = self.backend.get(_storage_key(operation, params, endpoint))
+        fetch_params = params
+
+        if hit and isinstance(stored, _Projectable):
+            requested = enabled_flags(operation, params)
+            if requested <= stored.flags:
+                stored = project(operation, params, stored.value, stored.flags)
+            else:
+                hit = False
+                fetch_params = {
+                    **params,
+                    **{flag: "S" for flag in stored.flags | requested},
+                }
+
+        if hit:
+            self.backend.increment("hits")
+            return True, stored, fetch_params
+
+        self.backend.increment("misses")
+        return False, None, fetch_params
+
+    def get(self, operation: str, params: dict, endpoint: str = "") -> tuple[bool, Any]:
+        hit, value, _ = self.lookup(operation, params, endpoint)
+        return hit, value
+
+    def set(self, operation: str, params: dict, value: Any, endpoint: str = "") -> None:
+        stored = value
+        if operation in PROJECTIONS:
+            stored = _Projectable(enabled_flags(operation, params), value)
+        self.backend.set(
+            _storage_key(operation, params, endpoint),
+            operation,
+            params,
+            stored,
+            self.ttls[operation],
+        )
+
+    def invalidate(self, operations: Iterable[str] | str | None = None, **filters) -> int:
+        """
+        Remove as entradas das operações `operations` (todas, se `None`) cujos
+        parâmetros possuem os valores de `filters`, por exemplo
+        `invalidate("consultarProcedimento", ProtocoloProcedimento="...")`.
+        """
+        if isinstance(operations, str):
+            operations = (operations,)
+        removed = self.backend.invalidate(operations, filters)
+        self.backend.increment("invalidations", removed)
+        return removed
+
+    def invalidate_after_write(self, operation: str, params: dict) -> None:
+        """Remove as entradas afetadas pela operação de escrita `operation`"""
+        affected = INVALIDATIONS.get(operation)
+        if affected is None:
+            return
+
+        if operation == "definirControlePrazo":
+            for definicao in params.get("Definicoes") or []:
+                # Itens do SOAP-ENC:Array chegam como `zeep.xsd.AnyObject`.
+                definicao = getattr(definicao, "value", definicao)
+                self.invalidate(
+                    affected, ProtocoloProcedimento=definicao["ProtocoloProcedimento"]
+                )
+        else:
+            self.invalidate(affected)
+
+    def clear(self) -> None:
+        self.backend.clear()
@@ -1,34 +1,340 @@
+import abc
+import logging
+import os
+import time
+from datetime import datetime
+from functools import partial
+from typing import Callable, Iterator
+
+import requests
 import zeep
+import zeep.cache
+import zeep.exceptions
+import zeep.proxy
 import zeep.xsd
 from zeep.helpers import serialize_object
+from zeep.wsdl.utils import etree_to_string
 
+from .batch import DEFAULT_MAX_CONCORRENCIA, ResultadoLote, executar_lote
+from .cache import ResponseCache, cache_key, enabled_flags, project
+from .dates import parse_data_hora
+from .decoder import FAST_OPERATIONS, ArrayStreamParser, Shape, element_to_value, parse_response
 from .models import (
     Andamento,
     DefinicaoControlePrazo,
     Marcador,
+    RawMode,
     RetornoConsultaDocumento,
     RetornoConsultaProcedimento,
     Serie,
     Unidade,
     Usuario,
+    raw_mode,
 )
 from .sin import encode_sin
+from .singleflight import SingleFlight
+from .transport import AtomicCounter, TransportOptions, TransportStats, build_transport
+from .wsdl import WsdlCache
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = frozenset({502, 503, 504})
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def is_read_only(operation: str) -> bool:
+    """Indica se a operação SOAP apenas consulta dados (`consultar*`/`listar*`)"""
+    return operation.startswith(("consultar", "listar"))
+
 
+def _discard(_) -> None:
+    return None
 
-class Client:
+
+def _shape(xsd_type, memo: dict[int, dict]) -> Shape:
+    """Formato (`python_sei.decoder.Shape`) dos valores do tipo `xsd_type` do WSDL"""
+    array_type = getattr(xsd_type, "_array_type", None)
+    if array_type is not None:
+        return (_shape(getattr(array_type, "array_type", None), memo),)
+    if not isinstance(xsd_type, zeep.xsd.ComplexType):
+        return None
+
+    shape = memo.get(id(xsd_type))
+    if shape is None:
+        shape = memo[id(xsd_type)] = {}
+        for name, element in xsd_type.elements:
+            shape[name] = _shape(element.type, memo)
+    return shape
+
+
+class BaseClient(abc.ABC):
     """
+    Implementação comum de `Client` e `AsyncClient`.
+
+    Cada método público monta os parâmetros da operação SOAP e delega a chamada
+    para `_call`, que é síncrono em `Client` e assíncrono em `AsyncClient`. Assim
+    as duas classes expõem exatamente os mesmos métodos, assinaturas e modelos.
+
     TODO: Verificar os valores das constantes tarefas e taferas internas listadas
     no arquivo `TarefaRN.php`.
     """
 
-    def __init__(self, url: str, sigla_sistema: str, identificacao_servico: str):
+    _zeep_client_class: type[zeep.Client] = zeep.Client
+    _service_proxy_class: type[zeep.proxy.ServiceProxy] = zeep.proxy.ServiceProxy
+    _single_flight_class = SingleFlight
+    _retryable_errors: tuple[type[Exception], ...] = (zeep.exceptions.TransportError,)
+
+    def __init__(
+        self,
+        url: str,
+        sigla_sistema: str,
+        identificacao_servico: str,
+        wsdl: str | os.PathLike | None = None,
+        wsdl_cache: zeep.cache.Base | bool = True,
+        transport_options: TransportOptions | None = None,
+        cache: ResponseCache | None = None,
+        coalesce: bool = True,
+        lazy: bool = False,
+        keep_raw: RawMode = "full",
+        fast_decode: bool = False,
+    ):
+        """
+        `url` é o endereço do WSDL do SEI. Quando `wsdl` é informado, o WSDL é lido
+        desse arquivo local (gravado com `python_sei.wsdl.salvar_wsdl`) e `url` é
+        usado apenas como endereço do serviço, sem nenhum acesso ao SEI na criação
+        do cliente.
+
+        `wsdl_cache` controla o cache em disco dos documentos WSDL/XSD: `True` usa
+        um `WsdlCache` com as configurações padrão, `False` desativa o cache e uma
+        instância de cache do zeep é usada diretamente.
+
+        `transport_options` define o pool de conexões, os timeouts e a política de
+        novas tentativas das operações idempotentes.
+
+        `cache` ativa o cache das respostas das operações de leitura.
+
+        `coalesce` faz com que chamadas de leitura idênticas e simultâneas sejam
+        atendidas por uma única requisição ao SEI.
+
+        `lazy` ativa a decodificação preguiçosa de `RetornoConsultaProcedimento`,
+        `RetornoConsultaDocumento` e `Andamento`: os objetos aninhados são criados
+        apenas no primeiro acesso.
+
+        `keep_raw` define como os modelos guardam o registro de origem, acessível
+        por `raw_value`: `full` (padrão), `compact` (serializado, decodificado sob
+        demanda, apenas no objeto principal) ou `none`. O modo `none` não pode ser
+        usado com `lazy`, pois os campos preguiçosos são decodificados a partir do
+        registro.
+
+        `fast_decode` decodifica as respostas de `FAST_OPERATIONS` diretamente do
+        XML (ver `python_sei.decoder`), sem criar os objetos do zeep.
+        """
+        if lazy and keep_raw == "none":
+            raise ValueError("keep_raw='none' não é compatível com lazy=True")
+
         self.sigla_sistema = sigla_sistema
         self.identificacao_servico = identificacao_servico
-        self.client = zeep.Client(url)
+        self.cache = cache
+        self.inflight = self._single_flight_class() if coalesce else None
+        self.lazy = lazy
+        self.keep_raw = keep_raw
+        self.fast_decode = fast_decode
+        self._shapes: dict[str, Shape] = {}
+
+        if wsdl_cache is True:
+            wsdl_cache = WsdlCache()
+        elif wsdl_cache is False:
+            wsdl_cache = None
+
+        self.transport_options = transport_options or TransportOptions()
+        self._retries = AtomicCounter()
+        transport = self._build_transport(wsdl_cache)
+        if wsdl is None:
+            self.client = self._zeep_client_class(url, transport=transport)
+            self._service_proxy = self.client.service
+        else:
+            self.client = self._zeep_client_class(os.fspath(wsdl), transport=transport)
+            self._service_proxy = self._bind_service(url)
+        self.endpoint: str = self._service._binding_options["address"]
+        """Endereço do serviço SOAP, que faz parte das chaves do cache de respostas."""
+
+    @abc.abstractmethod
+    def _build_transport(self, cache: zeep.cache.Base | None):
+        raise NotImplementedError
+
+    def _bind_service(self, address: str):
+        service = next(iter(self.client.wsdl.services.values()))
+        port = next(iter(service.ports.values()))
+        return self._service_proxy_class(self.client, port.binding, address=address)
 
     @property
     def _service(self):
-        return self.client.service
+        return self._service_proxy
+
+    def _params(self, kwargs: dict) -> dict:
+        return {
+            "SiglaSistema": self.sigla_sistema,
+            "IdentificacaoServico": self.identificacao_servico,
+            **kwargs,
+        }
+
+    def _should_retry(self, operation: str, tentativa: int, error: Exception) -> bool:
+        """
+        Indica se a chamada deve ser repetida. Apenas operações idempotentes são
+        repetidas, em caso de falhas de conexão, timeouts ou respostas 502/503/504.
+        """
+        if not is_read_only(operation) or tentativa >= self.transport_options.retries:
+            return False
+        if isinstance(error, zeep.exceptions.TransportError):
+            return error.status_code in RETRYABLE_STATUS
+        return True
+
+    def _array_param(self, operation: str, part: str, records: list[dict]):
+        """
+        Valor do parâmetro `part`, um SOAP-ENC:Array de structs, com os itens em
+        `records`. O zeep não converte dicts nos itens desses arrays, que são
+        declarados como `xsd:any`.
+        """
+        body = self._service._binding.get(operation).input.body
+        array = dict(body.type.elements)[part].type
+        item_type = array._array_type.array_type
+        item = zeep.xsd.Element("item", item_type)
+        return array([zeep.xsd.AnyObject(item, item_type(**record)) for record in records])
+
+    def _is_fast(self, operation: str, decode: Callable | None) -> bool:
+        return self.fast_decode and decode is not None and operation in FAST_OPERATIONS
+
+    def _response_shape(self, operation: str) -> Shape:
+        """Formato do valor de retorno de `operation` no WSDL, usado pelo `fast_decode`"""
+        if operation not in self._shapes:
+            body = self._service._binding.get(operation).output.body
+            elements = body.type.elements if body is not None else []
+            self._shapes[operation] = _shape(elements[0][1].type, {}) if elements else None
+        return self._shapes[operation]
+
+    def _raw_request(self, operation: str, params: dict):
+        """Monta o envelope da operação, para envio sem o processamento da resposta pelo zeep"""
+        binding = self._service._binding
+        options = self._service._binding_options
+        envelope, headers = binding._create(
+            operation, (), params, client=self.client, options=options
+        )
+        return options["address"], envelope, headers
+
+    def _parse_raw(self, operation: str, response):
+        """
+        Decodifica a resposta HTTP obtida com `_raw_request`. Respostas de erro são
+        processadas pelo zeep, que levanta `Fault` ou `TransportError`.
+        """
+        if response.status_code == 200:
+            return parse_response(response.content, self._response_shape(operation))
+
+        binding = self._service._binding
+        result = binding.process_reply(self.client, binding.get(operation), response)
+        return serialize_object(result)
+
+    def _stream_request(
+        self,
+        id_unidade: str,
+        protocolo_procedimento: str,
+        retornar_atributos: bool,
+        andamentos: list[str],
+        tarefas: list[str],
+        tarefas_modulos: list[str],
+    ):
+        address, envelope, headers = self._raw_request(
+            "listarAndamentos",
+            self._params(
+                {
+                    "IdUnidade": id_unidade,
+                    "ProtocoloProcedimento": protocolo_procedimento,
+                    "SinRetornarAtributos": encode_sin(retornar_atributos),
+                    "Andamentos": andamentos,
+                    "Tarefas": tarefas,
+                    "TarefasModulos": tarefas_modulos,
+                }
+            ),
+        )
+        return address, etree_to_string(envelope), headers
+
+    def _stream_error(self, response):
+        self._parse_raw("listarAndamentos", response)
+        raise zeep.exceptions.TransportError(
+            status_code=response.status_code, content=response.content
+        )
+
+    def _andamento_from_element(
+        self,
+        element,
+        tarefas: list[str],
+        desde: datetime | None,
+        ate: datetime | None,
+    ) -> Andamento | None:
+        """
+        Decodifica o item da resposta, ou retorna `None` se ele não passa pelos
+        filtros. Com `desde`/`ate`, itens com `DataHora` inválida são descartados.
+        """
+        if tarefas is not zeep.xsd.SkipValue and element.findtext("IdTarefa") not in tarefas:
+            return None
+
+        if desde is not None or ate is not None:
+            try:
+                data_hora = parse_data_hora(element.findtext("DataHora"))
+            except ValueError as e:
+                logger.warning("Andamento %s ignorado: %s", element.findtext("IdAndamento"), e)
+                return None
+            if data_hora is None:
+                return None
+            if (desde is not None and data_hora < desde) or (ate is not None and data_hora > ate):
+                return None
+
+        shape = self._response_shape("listarAndamentos")
+        return self._decode(
+            partial(Andamento.from_record, lazy=self.lazy),
+            element_to_value(element, shape[0] if shape else None),
+            fast=True,
+        )
+
+    def _decode(self, decode: Callable | None, result, fast: bool = False):
+        if decode is None:
+            return result
+        if self.keep_raw == "full":
+            return decode(result if fast else serialize_object(result))
+        with raw_mode(self.keep_raw):
+            return decode(result if fast else serialize_object(result))
+
+    def _cache_lookup(self, operation: str, decode: Callable | None, params: dict):
+        """Retorna `(encontrado, valor, parametros_busca)`, ver `ResponseCache.lookup`"""
+        if self.cache is None or decode is None or not self.cache.is_cacheable(operation):
+            return False, None, params
+        return self.cache.lookup(operation, params, self.endpoint)
+
+    def _cache_update(self, operation: str, decode: Callable | None, params: dict, value):
+        if self.cache is None:
+            return
+        if not is_read_only(operation):
+            self.cache.invalidate_after_write(operation, params)
+        elif decode is not None and self.cache.is_cacheable(operation):
+            self.cache.set(operation, params, value, self.endpoint)
+
+    @staticmethod
+    def _project(operation: str, params: dict, fetch_params: dict, value):
+        if fetch_params is params:
+            return value
+        return project(operation, params, value, enabled_flags(operation, fetch_params))
+
+    @abc.abstractmethod
+    def _call(self, operation: str, decode: Callable | None, **kwargs):
+        """
+        Executa a operação SOAP `operation` e transforma o resultado com `decode`
+        (`None` retorna o objeto do zeep sem conversão).
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _batch(self, protocolos: list[str], funcao: Callable, max_concorrencia: int):
+        raise NotImplementedError
 
     def listar_unidades(
         self,
@@ -36,13 +342,12 @@ class Client:
         id_serie: str = "",
     ) -> list[Unidade]:
         """Retorna a lista de unidades cadastradas no SEI"""
-        records = self._service.listarUnidades(
-            SiglaSistema=self.sigla_sistema,
-            IdentificacaoServico=self.identificacao_servico,
+        return self._call(
+            "listarUnidades",
+            Unidade.from_many_records,
             IdTipoProcedimento=id_tipo_procedimento,
             IdSerie=id_serie,
         )
-        return Unidade.from_many_records(serialize_object(records))
 
     def listar_usuarios(
         self,
@@ -50,13 +355,12 @@ class Client:
         id_usuario: str = "",
     ) -> list[Usuario]:
         """Retorna a lista de usuários de uma unidade"""
-        records = self._service.listarUsuarios(
-            SiglaSistema=self.sigla_sistema,
-            IdentificacaoServico=self.identificacao_servico,
+        return self._call(
+            "listarUsuarios",
+            Usuario.from_many_records,
             IdUnidade=id_unidade,
             IdUsuario=id_usuario,
         )
-        return Usuario.from_many_records(serialize_object(records))
 
     def consultar_procedimento(
         self,
@@ -72,9 +376,9 @@ class Client:
         retornar_procedimentos_relacionados: bool = False,
         retornar_procedimentos_anexados: bool = False,
     ) -> RetornoConsultaProcedimento:
-        record = self._service.consultarProcedimento(
-            SiglaSistema=self.sigla_sistema,
-            IdentificacaoServico=self.identificacao_servico,
+        return self._call(
+            "consultarProcedimento",
+            partial(RetornoConsultaProcedimento.from_record, lazy=self.lazy),
             IdUnidade=id_unidade,
             ProtocoloProcedimento=protocolo_procedimento,
             SinRetornarAssuntos=encode_sin(retornar_assuntos),
@@ -93,28 +397,48 @@ class Client:
                 retornar_procedimentos_anexados
             ),
         )
-        return RetornoConsultaProcedimento.from_record(serialize_object(record))
+
+    def consultar_procedimentos_em_lote(
+        self,
+        id_unidade: str,
+        protocolos_procedimentos: list[str],
+        max_concorrencia: int = DEFAULT_MAX_CONCORRENCIA,
+        **retornar,
+    ) -> list[ResultadoLote[RetornoConsultaProcedimento]]:
+        """
+        Consulta vários procedimentos simultaneamente. Aceita os mesmos parâmetros
+        `retornar_*` de `consultar_procedimento`. Os resultados seguem a ordem de
+        `protocolos_procedimentos` e erros são informados individualmente em cada item.
+        """
+        return self._batch(
+            protocolos_procedimentos,
+            lambda protocolo: self.consultar_procedimento(id_unidade, protocolo, **retornar),
+            max_concorrencia,
+        )
 
     def definir_controle_prazo(
         self,
         id_unidade: str,
         definicoes: list[DefinicaoControlePrazo],
     ) -> None:
-        self._service.definirControlePrazo(
-            SiglaSistema=self.sigla_sistema,
-            IdentificacaoServico=self.identificacao_servico,
+        return self._call(
+            "definirControlePrazo",
+            _discard,
             IdUnidade=id_unidade,
-            Definicoes=[definicao.to_record() for definicao in definicoes],
+            Definicoes=self._array_param(
+                "definirControlePrazo",
+                "Definicoes",
+                [definicao.to_record() for definicao in definicoes],
+            ),
         )
 
     def listar_marcadores_unidade(self, id_unidade: str) -> list[Marcador]:
         """Lista todos os marcadores de uma unidade."""
-        records = self._service.listarMarcadoresUnidade(
-            SiglaSistema=self.sigla_sistema,
-            IdentificacaoServico=self.identificacao_servico,
+        return self._call(
+            "listarMarcadoresUnidade",
+            Marcador.from_many_records,
             IdUnidade=id_unidade,
         )
-        return Marcador.from_many_records(serialize_object(records))
 
     def listar_series(
         self,
@@ -125,13 +449,12 @@ class Client:
         Lista todas as séries, que são tipos de documentos como `Memorando`, `Despacho`, etc,
         disponíveis no SEI
         """
-        records = self._service.listarSeries(
-            SiglaSistema=self.sigla_sistema,
-            IdentificacaoServico=self.identificacao_servico,
+        return self._call(
+            "listarSeries",
+            Serie.from_many_records,
             IdUnidade=id_unidade,
             IdTipoProcedimento=id_tipo_procedimento,
         )
-        return Serie.from_many_records(serialize_object(records))
 
     def consultar_documento(
         self,
@@ -142,9 +465,9 @@ class Client:
         retornar_publicacao: bool = False,
         retornar_campos: bool = False,
     ):
-        record = self._service.consultarDocumento(
-            SiglaSistema=self.sigla_sistema,
-            IdentificacaoServico=self.identificacao_servico,
+        return self._call(
+            "consultarDocumento",
+            partial(RetornoConsultaDocumento.from_record, lazy=self.lazy),
             IdUnidade=id_unidade,
             ProtocoloDocumento=protocolo_documento,
             SinRetornarAndamentoGeracao=encode_sin(retornar_andamento_geracao),
@@ -153,7 +476,19 @@ class Client:
             SinRetornarCampos=encode_sin(retornar_campos),
         )
 
-        return RetornoConsultaDocumento.from_record(serialize_object(record))
+    def consultar_documentos_em_lote(
+        self,
+        id_unidade: str,
+        protocolos_documentos: list[str],
+        max_concorrencia: int = DEFAULT_MAX_CONCORRENCIA,
+        **retornar,
+    ) -> list[ResultadoLote[RetornoConsultaDocumento]]:
+        """Equivalente a `consultar_procedimentos_em_lote` para `consultar_documento`"""
+        return self._batch(
+            protocolos_documentos,
+            lambda protocolo: self.consultar_documento(id_unidade, protocolo, **retornar),
+            max_concorrencia,
+        )
 
     def listar_andamentos(
         self,
@@ -164,9 +499,9 @@ class Client:
         tarefas: list[str] = zeep.xsd.SkipValue,
         tarefas_modulos: list[str] = zeep.xsd.SkipValue,
     ):
-        records = self._service.listarAndamentos(
-            SiglaSistema=self.sigla_sistema,
-            IdentificacaoServico=self.identificacao_servico,
+        return self._call(
+            "listarAndamentos",
+            partial(Andamento.from_many_records, lazy=self.lazy),
             IdUnidade=id_unidade,
             ProtocoloProcedimento=protocolo_procedimento,
             SinRetornarAtributos=encode_sin(retornar_atributos),
@@ -175,22 +510,122 @@ class Client:
             TarefasModulos=tarefas_modulos,
         )
 
-        return Andamento.from_many_records(serialize_object(records))
-
     def listar_andamentos_marcadores(
         self,
         id_unidade: str,
         protocolo_procedimento: str,
         marcadores: list[str] = zeep.xsd.SkipValue,
     ):
-        records = self._service.listarAndamentosMarcadores(
-            SiglaSistema=self.sigla_sistema,
-            IdentificacaoServico=self.identificacao_servico,
+        return self._call(
+            "listarAndamentosMarcadores",
+            None,
             IdUnidade=id_unidade,
             ProtocoloProcedimento=protocolo_procedimento,
             Marcadores=marcadores,
         )
 
-        return records
 
+class Client(BaseClient):
+    _retryable_errors = (
+        requests.ConnectionError,
+        requests.Timeout,
+        zeep.exceptions.TransportError,
+    )
+
+    def _build_transport(self, cache):
+        transport, self._adapter = build_transport(self.transport_options, cache=cache)
+        return transport
+
+    @property
+    def transport_stats(self) -> TransportStats:
+        hits, misses = self._adapter.pool_stats()
+        return TransportStats(pool_hits=hits, pool_misses=misses, retries=self._retries.value)
+
+    def _send(self, operation: str, params: dict, fast: bool = False):
+        if fast:
+            def method(**params):
+                response = self.client.transport.post_xml(*self._raw_request(operation, params))
+                return self._parse_raw(operation, response)
+        else:
+            method = getattr(self._service, operation)
+
+        tentativa = 0
+        while True:
+            try:
+                return method(**params)
+            except self._retryable_errors as e:
+                if not self._should_retry(operation, tentativa, e):
+                    raise
+
+            self._retries.increment()
+            time.sleep(self.transport_options.backoff(tentativa))
+            tentativa += 1
+
+    def _fetch(self, operation: str, decode: Callable | None, params: dict):
+        fast = self._is_fast(operation, decode)
+        value = self._decode(decode, self._send(operation, params, fast), fast)
+        self._cache_update(operation, decode, params, value)
+        return value
+
+    def _call(self, operation: str, decode: Callable | None, **kwargs):
+        params = self._params(kwargs)
+        hit, value, fetch_params = self._cache_lookup(operation, decode, params)
+        if hit:
+            return value
+
+        if self.inflight is None or not is_read_only(operation):
+            value = self._fetch(operation, decode, fetch_params)
+        else:
+            value = self.inflight.do(
+                cache_key(operation, fetch_params),
+                lambda: self._fetch(operation, decode, fetch_params),
+            )
+        return self._project(operation, params, fetch_params, value)
+
+    def _batch(self, protocolos, funcao, max_concorrencia):
+        return executar_lote(protocolos, funcao, max_concorrencia)
+
+    def iterar_andamentos(
+        self,
+        id_unidade: str,
+        protocolo_procedimento: str,
+        retornar_atributos: bool = False,
+        andamentos: list[str] = zeep.xsd.SkipValue,
+        tarefas: list[str] = zeep.xsd.SkipValue,
+        tarefas_modulos: list[str] = zeep.xsd.SkipValue,
+        desde: datetime | None = None,
+        ate: datetime | None = None,
+    ) -> Iterator[Andamento]:
+        """
+        Equivalente a `listar_andamentos`, mas retorna os andamentos à medida que a
+        resposta é recebida e decodificada. Andamentos fora das `tarefas` ou do
+        intervalo `desde`/`ate` são descartados antes de serem decodificados.
+        Interromper a iteração encerra a conexão sem ler o restante da resposta.
+
+        Respostas parciais não são repetidas nem armazenadas em cache.
+        """
+        address, message, headers = self._stream_request(
+            id_unidade,
+            protocolo_procedimento,
+            retornar_atributos,
+            andamentos,
+            tarefas,
+            tarefas_modulos,
+        )
+        transport = self.client.transport
+        with transport.session.post(
+            address,
+            data=message,
+            headers=headers,
+            timeout=transport.operation_timeout,
+            stream=True,
+        ) as response:
+            if response.status_code != 200:
+                self._stream_error(response)
 
+            parser = ArrayStreamParser()
+            for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                for element in parser.feed(chunk):
+                    andamento = self._andamento_from_element(element, tarefas, desde, ate)
+                    if andamento is not None:
+                        yield andamento
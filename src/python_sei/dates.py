@@ -0,0 +1,144 @@
+"""
+Conversão das datas retornadas pelo SEI (`dd/mm/aaaa` e `dd/mm/aaaa hh:mm:ss`) e
+funções para ordenar e agrupar andamentos por data.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, Literal, Protocol, TypeVar
+
+logger = logging.getLogger(__name__)
+
+FORMATO_DATA = "%d/%m/%Y"
+FORMATO_DATA_HORA = "%d/%m/%Y %H:%M:%S"
+
+Periodo = Literal["dia", "semana", "mes"]
+
+
+@lru_cache(maxsize=65536)
+def _parse(value: str) -> datetime:
+    # Os formatos usados pelo SEI têm posições fixas; fatiar a string é bem mais
+    # rápido que `strptime`, usado apenas para formatos inesperados.
+    try:
+        if len(value) == 19 and value[2] == "/" and value[10] == " ":
+            return datetime(
+                int(value[6:10]),
+                int(value[3:5]),
+                int(value[0:2]),
+                int(value[11:13]),
+                int(value[14:16]),
+                int(value[17:19]),
+            )
+        if len(value) == 10 and value[2] == "/":
+            return datetime(int(value[6:10]), int(value[3:5]), int(value[0:2]))
+    except ValueError:
+        pass
+
+    for formato in (FORMATO_DATA_HORA, "%d/%m/%Y %H:%M", FORMATO_DATA):
+        try:
+            return datetime.strptime(value, formato)
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida: {value!r}")
+
+
+def parse_data_hora(value: str | None) -> datetime | None:
+    """
+    Converte uma data do SEI em `datetime`. Datas sem horário resultam em
+    meia-noite; valores vazios resultam em `None`.
+    """
+    if not value:
+        return None
+    return _parse(value)
+
+
+def parse_data(value: str | None) -> date | None:
+    data_hora = parse_data_hora(value)
+    return None if data_hora is None else data_hora.date()
+
+
+def format_data_hora(value: datetime) -> str:
+    return value.strftime(FORMATO_DATA_HORA)
+
+
+def format_data(value: date) -> str:
+    return value.strftime(FORMATO_DATA)
+
+
+class _ComDataHora(Protocol):
+    @property
+    def data_hora_datetime(self) -> datetime | None: ...
+
+
+A = TypeVar("A", bound=_ComDataHora)
+
+
+def ordenar_andamentos(andamentos: Iterable[A], reverso: bool = False) -> list[A]:
+    """
+    Ordena os andamentos por data; andamentos sem data ficam no final e
+    andamentos com data inválida são descartados
+    """
+    com_data: list[tuple[datetime, A]] = []
+    sem_data: list[A] = []
+    for andamento in andamentos:
+        try:
+            data_hora = andamento.data_hora_datetime
+        except ValueError as e:
+            logger.warning("Andamento %s ignorado: %s", getattr(andamento, "id_andamento", None), e)
+            continue
+        if data_hora is None:
+            sem_data.append(andamento)
+        else:
+            com_data.append((data_hora, andamento))
+    com_data.sort(key=lambda item: item[0], reverse=reverso)
+    return [andamento for _, andamento in com_data] + sem_data
+
+
+def inicio_periodo(value: datetime, periodo: Periodo) -> date:
+    """Primeiro dia do dia, da semana (segunda-feira) ou do mês de `value`"""
+    dia = value.date()
+    match periodo:
+        case "dia":
+            return dia
+        case "semana":
+            return dia - timedelta(days=dia.weekday())
+        case "mes":
+            return dia.replace(day=1)
+        case _:
+            raise ValueError(f"Período inválido: {periodo!r}")
+
+
+def agrupar_andamentos(
+    andamentos: Iterable[A], periodo: Periodo = "dia"
+) -> dict[date, list[A]]:
+    """
+    Agrupa os andamentos pelo início do período em que ocorreram, em ordem
+    cronológica. Andamentos sem data ou com data inválida são ignorados.
+    """
+    grupos: dict[date, list[A]] = {}
+    for andamento in ordenar_andamentos(andamentos):
+        data_hora = andamento.data_hora_datetime
+        if data_hora is None:
+            continue
+        grupos.setdefault(inicio_periodo(data_hora, periodo), []).append(andamento)
+    return grupos
+
+
+def somar_dias(inicio: date, dias: int, dias_uteis: bool = False) -> date:
+    """
+    Data `dias` dias após `inicio` (antes, se `dias` é negativo). Com
+    `dias_uteis`, conta apenas os dias de segunda a sexta-feira; feriados não
+    são considerados.
+    """
+    if not dias_uteis:
+        return inicio + timedelta(days=dias)
+
+    data = inicio
+    passo = timedelta(days=1 if dias > 0 else -1)
+    restantes = abs(dias)
+    while restantes > 0:
+        data += passo
+        if data.weekday() < 5:
+            restantes -= 1
+    return data
@@ -0,0 +1,145 @@
+"""
+Decodificação direta do XML das respostas SOAP do SEI, sem criar os objetos do
+zeep nem passar por `serialize_object`.
+
+O SEI usa SOAP RPC/encoded: listas são elementos `SOAP-ENC:Array` com um filho
+por item e estruturas são elementos com um filho por campo. O resultado tem o
+mesmo formato dos registros produzidos pelo zeep e pode ser passado diretamente
+para `Model.from_record`.
+
+Sem o WSDL não é possível distinguir uma estrutura ou lista nula (`xsi:nil`) de
+um texto nulo. O zeep decodifica esses elementos como uma estrutura com todos os
+campos `None` ou uma lista vazia; para obter o mesmo resultado, informe o formato
+(`Shape`) do valor esperado, obtido do WSDL.
+"""
+
+import sys
+from typing import Iterator
+
+from lxml import etree
+
+SOAP_ENV = "http://schemas.xmlsoap.org/soap/envelope/"
+SOAP_ENC = "http://schemas.xmlsoap.org/soap/encoding/"
+XSI = "http://www.w3.org/2001/XMLSchema-instance"
+
+_BODY = f"{{{SOAP_ENV}}}Body"
+_ARRAY_TYPE = f"{{{SOAP_ENC}}}arrayType"
+_XSI_TYPE = f"{{{XSI}}}type"
+_XSI_NIL = f"{{{XSI}}}nil"
+
+FAST_OPERATIONS = frozenset({"listarAndamentos", "consultarProcedimento", "listarUsuarios"})
+"""Operações decodificadas diretamente do XML quando `fast_decode` está ativo."""
+
+Shape = dict | tuple | None
+"""
+Formato esperado de um valor: `dict` com o formato de cada campo de uma
+estrutura, tupla `(formato_do_item,)` de uma lista ou `None` para textos e
+valores de formato desconhecido.
+"""
+
+_NO_FIELDS: dict = {}
+
+_parser = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=True)
+
+
+class Record(dict):
+    """Registro decodificado do XML. Campos ausentes na resposta valem `None`, como no zeep."""
+
+    __slots__ = ()
+
+    def __missing__(self, key):
+        return None
+
+
+_local_names: dict[str, str] = {}
+"""Nomes locais já calculados para cada tag, compartilhados por todos os registros."""
+
+
+def _local_name(tag: str) -> str:
+    name = _local_names.get(tag)
+    if name is None:
+        name = _local_names[tag] = sys.intern(tag.rpartition("}")[2])
+    return name
+
+
+def is_array(element: etree._Element) -> bool:
+    if element.get(_ARRAY_TYPE) is not None:
+        return True
+    xsi_type = element.get(_XSI_TYPE)
+    return xsi_type is not None and xsi_type.endswith(":Array")
+
+
+def element_to_value(element: etree._Element, shape: Shape = None):
+    """Converte um elemento em `str`, `list`, `Record` ou `None`, no formato `shape`"""
+    if shape is not None and len(element) == 0:
+        # Como no zeep: sem filhos nem atributos o valor é `None`; com algum
+        # atributo (`xsi:nil`, `xsi:type`) é uma lista vazia ou uma estrutura
+        # com todos os campos `None`.
+        if not element.attrib:
+            return None
+        return [] if type(shape) is tuple else Record.fromkeys(shape)
+
+    if element.get(_XSI_NIL) in ("true", "1"):
+        return None
+    if type(shape) is tuple or is_array(element):
+        item = shape[0] if type(shape) is tuple else None
+        return [element_to_value(child, item) for child in element if isinstance(child.tag, str)]
+    if len(element) == 0:
+        return element.text
+
+    fields = shape if type(shape) is dict else _NO_FIELDS
+    return Record(
+        (name, element_to_value(child, fields.get(name)))
+        for child in element
+        if isinstance(child.tag, str)
+        for name in (_local_name(child.tag),)
+    )
+
+
+def parse_response(content: bytes, shape: Shape = None):
+    """
+    Retorna o valor de retorno (`parametros`) do envelope SOAP `content`, no
+    formato `shape`
+    """
+    root = etree.fromstring(content, _parser)
+    body = root.find(_BODY)
+    if body is None or len(body) == 0:
+        return None
+
+    response = body[0]
+    if len(response) == 0:
+        return None
+    return element_to_value(response[0], shape)
+
+
+class ArrayStreamParser:
+    """
+    Lê incrementalmente os itens da lista retornada em uma resposta SOAP, à medida
+    que os trechos do corpo HTTP são recebidos, sem carregar a resposta inteira.
+    """
+
+    # Envelope > Body > <operacao>Response > parametros > item
+    ITEM_DEPTH = 5
+
+    def __init__(self):
+        self._parser = etree.XMLPullParser(
+            events=("start", "end"),
+            resolve_entities=False,
+            no_network=True,
+            huge_tree=True,
+        )
+        self._depth = 0
+
+    def feed(self, chunk: bytes) -> Iterator[etree._Element]:
+        """Processa `chunk` e retorna os itens completos encontrados nele"""
+        self._parser.feed(chunk)
+        for event, element in self._parser.read_events():
+            if event == "start":
+                self._depth += 1
+                continue
+
+            self._depth -= 1
+            if self._depth == self.ITEM_DEPTH - 1 and isinstance(element.tag, str):
+                yield element
+                # Libera os itens já processados.
+                element.getparent().remove(element)
@@ -9,30 +9,13 @@ class Aplicabilidade(Enum):
 
     @staticmethod
     def from_str(value: str):
-        match value:
-            case "T":
-                return Aplicabilidade.DOCUMENTOS_INTERNOS_EXTERNOS
-            case "I":
-                return Aplicabilidade.DOCUMENTOS_INTERNOS
-            case "E":
-                return Aplicabilidade.DOCUMENTOS_EXTERNOS
-            case "F":
-                return Aplicabilidade.FORMULARIOS
-            case _:
-                raise ValueError("Invalid Aplicabilidade value")
+        try:
+            return _APLICABILIDADE_FROM_STR[value]
+        except KeyError:
+            raise ValueError("Invalid Aplicabilidade value") from None
 
     def to_str(self) -> str:
-        match self:
-            case Aplicabilidade.DOCUMENTOS_INTERNOS_EXTERNOS:
-                return "T"
-            case Aplicabilidade.DOCUMENTOS_INTERNOS:
-                return "I"
-            case Aplicabilidade.DOCUMENTOS_EXTERNOS:
-                return "E"
-            case Aplicabilidade.FORMULARIOS:
-                return "F"
-            case _:
-                raise ValueError("Invalid Aplicabilidade value")
+        return _APLICABILIDADE_TO_STR[self]
 
 
 class NivelAcesso(Enum):
@@ -42,23 +25,29 @@ class NivelAcesso(Enum):
 
     @staticmethod
     def from_str(value: str):
-        match value:
-            case "0":
-                return NivelAcesso.PUBLICO
-            case "1":
-                return NivelAcesso.RESTRITO
-            case "2":
-                return NivelAcesso.SIGILOSO
-            case _:
-                raise ValueError("Invalid NivelAcesso value")
+        try:
+            return _NIVEL_ACESSO_FROM_STR[value]
+        except KeyError:
+            raise ValueError("Invalid NivelAcesso value") from None
 
     def to_str(self) -> str:
-        match self:
-            case NivelAcesso.PUBLICO:
-                return "0"
-            case NivelAcesso.RESTRITO:
-                return "1"
-            case NivelAcesso.SIGILOSO:
-                return "2"
-            case _:
-                raise ValueError("Invalid NivelAcesso")
+        return _NIVEL_ACESSO_TO_STR[self]
+
+
+# Tabelas de conversão, definidas fora das classes para não virarem membros
+# das enumerações.
+
+_APLICABILIDADE_TO_STR = {
+    Aplicabilidade.DOCUMENTOS_INTERNOS_EXTERNOS: "T",
+    Aplicabilidade.DOCUMENTOS_INTERNOS: "I",
+    Aplicabilidade.DOCUMENTOS_EXTERNOS: "E",
+    Aplicabilidade.FORMULARIOS: "F",
+}
+_APLICABILIDADE_FROM_STR = {code: value for value, code in _APLICABILIDADE_TO_STR.items()}
+
+_NIVEL_ACESSO_TO_STR = {
+    NivelAcesso.PUBLICO: "0",
+    NivelAcesso.RESTRITO: "1",
+    NivelAcesso.SIGILOSO: "2",
+}
+_NIVEL_ACESSO_FROM_STR = {code: value for value, code in _NIVEL_ACESSO_TO_STR.items()}
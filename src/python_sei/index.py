@@ -0,0 +1,236 @@
+"""
+Índice em memória dos dados de referência do SEI (unidades, usuários, séries e
+marcadores), para resolver identificadores, siglas e nomes sem consultar o SEI.
+"""
+
+import logging
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Callable, Generic, Iterable, TypeVar
+
+from .client import Client
+from .models import Marcador, Serie, Unidade, Usuario
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_INTERVALO = 60 * 60
+"""Intervalo padrão, em segundos, entre as atualizações em segundo plano."""
+
+
+def normalizar(texto: str | None) -> str:
+    """Remove acentos, converte para minúsculas e junta os espaços repetidos"""
+    if not texto:
+        return ""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.casefold().split())
+
+
+class Tabela(Generic[T]):
+    """
+    Itens indexados por identificador e por sigla, com busca por prefixo de
+    qualquer palavra do nome, sem diferenciar maiúsculas nem acentos.
+    """
+
+    def __init__(
+        self,
+        itens: Iterable[T],
+        id: Callable[[T], str],
+        sigla: Callable[[T], str | None],
+        nome: Callable[[T], str | None],
+    ):
+        self.por_id: dict[str, T] = {}
+        self.por_sigla: dict[str, T] = {}
+        chaves: list[tuple[str, int]] = []
+        self._itens: list[T] = []
+
+        for item in itens:
+            self.por_id[id(item)] = item
+            if (chave := normalizar(sigla(item))):
+                self.por_sigla.setdefault(chave, item)
+
+            posicao = len(self._itens)
+            self._itens.append(item)
+            palavras = normalizar(nome(item)).split()
+            # Uma chave a partir de cada palavra, para que "financas" encontre
+            # "Departamento de Finanças".
+            for inicio in range(len(palavras)):
+                chaves.append((" ".join(palavras[inicio:]), posicao))
+
+        chaves.sort()
+        self._chaves = [chave for chave, _ in chaves]
+        self._posicoes = [posicao for _, posicao in chaves]
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def get(self, valor: str) -> T | None:
+        """Busca por identificador ou, se não encontrado, por sigla"""
+        item = self.por_id.get(valor)
+        if item is None:
+            item = self.por_sigla.get(normalizar(valor))
+        return item
+
+    def buscar(self, prefixo: str, limite: int = 10) -> list[T]:
+        """Itens cujo nome possui uma palavra que começa com `prefixo`"""
+        prefixo = normalizar(prefixo)
+        if not prefixo:
+            return []
+
+        encontrados: dict[int, None] = {}
+        i = bisect_left(self._chaves, prefixo)
+        while (
+            i < len(self._chaves)
+            and self._chaves[i].startswith(prefixo)
+            and len(encontrados) < limite
+        ):
+            encontrados[self._posicoes[i]] = None
+            i += 1
+        return [self._itens[posicao] for posicao in encontrados]
+
+
+@dataclass
+class _Snapshot:
+    unidades: Tabela[Unidade]
+    usuarios: Tabela[Usuario]
+    series: Tabela[Serie]
+    marcadores: Tabela[Marcador]
+    atualizado_em: float = field(default_factory=time.time)
+
+
+class ReferenceIndex:
+    """
+    Índice das unidades, séries e, para as unidades em `unidades`, dos usuários e
+    marcadores. `atualizar` substitui o índice inteiro de uma vez, de modo que as
+    consultas nunca veem um índice parcialmente atualizado.
+
+    `iniciar` atualiza o índice periodicamente em uma thread; se uma atualização
+    falhar, o índice anterior continua em uso.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        unidades: Iterable[str] = (),
+        intervalo: float = DEFAULT_INTERVALO,
+    ):
+        self.client = client
+        self.unidades = list(unidades)
+        self.intervalo = intervalo
+        self.ultimo_erro: Exception | None = None
+        self._snapshot: _Snapshot | None = None
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def atualizar(self) -> None:
+        unidades = self.client.listar_unidades()
+        series = self.client.listar_series()
+        usuarios: dict[str, Usuario] = {}
+        marcadores: dict[str, Marcador] = {}
+        for id_unidade in self.unidades:
+            for usuario in self.client.listar_usuarios(id_unidade):
+                usuarios[usuario.id_usuario] = usuario
+            for marcador in self.client.listar_marcadores_unidade(id_unidade):
+                marcadores[marcador.id_marcador] = marcador
+
+        self._snapshot = _Snapshot(
+            unidades=Tabela(
+                unidades, lambda u: u.id_unidade, lambda u: u.sigla, lambda u: u.descricao
+            ),
+            usuarios=Tabela(
+                usuarios.values(), lambda u: u.id_usuario, lambda u: u.sigla, lambda u: u.nome
+            ),
+            series=Tabela(series, lambda s: s.id_serie, lambda s: s.nome, lambda s: s.nome),
+            marcadores=Tabela(
+                marcadores.values(), lambda m: m.id_marcador, lambda m: m.nome, lambda m: m.nome
+            ),
+        )
+        self.ultimo_erro = None
+
+    @property
+    def atualizado_em(self) -> float | None:
+        snapshot = self._snapshot
+        return None if snapshot is None else snapshot.atualizado_em
+
+    def _atual(self) -> _Snapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self.atualizar()
+                snapshot = self._snapshot
+        return snapshot
+
+    def iniciar(self) -> None:
+        """Atualiza o índice agora e depois a cada `intervalo` segundos"""
+        if self._thread is not None:
+            return
+        self._atual()
+        self._parar.clear()
+        self._thread = threading.Thread(
+            target=self._executar, name="python_sei-index", daemon=True
+        )
+        self._thread.start()
+
+    def parar(self) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _executar(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.atualizar()
+            except Exception as e:
+                self.ultimo_erro = e
+                logger.warning("Falha ao atualizar o índice de referência: %s", e)
+
+    def unidade(self, id_ou_sigla: str) -> Unidade | None:
+        return self._atual().unidades.get(id_ou_sigla)
+
+    def resolver_unidade(self, id_ou_sigla: str) -> str:
+        """
+        Retorna o `id_unidade` da unidade com o identificador ou a sigla informada.
+        Identificadores numéricos ausentes do índice (por exemplo, de unidades
+        criadas depois da última atualização) são retornados sem alteração.
+        """
+        unidade = self.unidade(id_ou_sigla)
+        if unidade is not None:
+            return unidade.id_unidade
+        if id_ou_sigla.strip().isdigit():
+            return id_ou_sigla.strip()
+        raise KeyError(f"Unidade não encontrada: {id_ou_sigla}")
+
+    def buscar_unidades(self, prefixo: str, limite: int = 10) -> list[Unidade]:
+        return self._atual().unidades.buscar(prefixo, limite)
+
+    def usuario(self, id_ou_sigla: str) -> Usuario | None:
+        return self._atual().usuarios.get(id_ou_sigla)
+
+    def buscar_usuarios(self, prefixo: str, limite: int = 10) -> list[Usuario]:
+        return self._atual().usuarios.buscar(prefixo, limite)
+
+    def serie(self, id_ou_nome: str) -> Serie | None:
+        return self._atual().series.get(id_ou_nome)
+
+    def resolver_serie(self, id_ou_nome: str) -> str:
+        serie = self.serie(id_ou_nome)
+        if serie is None:
+            raise KeyError(f"Série não encontrada: {id_ou_nome}")
+        return serie.id_serie
+
+    def buscar_series(self, prefixo: str, limite: int = 10) -> list[Serie]:
+        return self._atual().series.buscar(prefixo, limite)
+
+    def marcador(self, id_ou_nome: str) -> Marcador | None:
+        return self._atual().marcadores.get(id_ou_nome)
+
+    def buscar_marcadores(self, prefixo: str, limite: int = 10) -> list[Marcador]:
+        return self._atual().marcadores.buscar(prefixo, limite)
@@ -1,26 +1,131 @@
+import pickle
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
-from typing import OrderedDict, Self
+from datetime import datetime
+from typing import Any, Callable, ClassVar, Literal, OrderedDict, Self
 
+from .dates import parse_data_hora
 from .enums import Aplicabilidade, NivelAcesso
 from .sin import decode_sin, encode_sin
 
 
+RawMode = Literal["full", "compact", "none"]
+
+_raw_mode: ContextVar[RawMode] = ContextVar("raw_mode", default="full")
+
+
+@contextmanager
+def raw_mode(mode: RawMode):
+    """
+    Define como os modelos criados no contexto guardam o registro de origem:
+    `full` mantém o registro, `compact` mantém o registro serializado com `pickle`,
+    decodificado sob demanda por `raw_value`, e `none` descarta o registro.
+
+    No modo `compact` apenas o objeto principal guarda o registro: os objetos
+    aninhados fazem parte dele e têm `raw_value` igual a `None`.
+    """
+    token = _raw_mode.set(mode)
+    try:
+        yield
+    finally:
+        _raw_mode.reset(token)
+
+
+def retain_raw(record: OrderedDict | None) -> OrderedDict | bytes | None:
+    match _raw_mode.get():
+        case "full":
+            return record
+        case "compact":
+            return pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        case _:
+            return None
+
+
+def _nested_raw_mode() -> RawMode:
+    """Modo dos objetos aninhados no objeto que está sendo criado"""
+    mode = _raw_mode.get()
+    return "none" if mode == "compact" else mode
+
+
+def intern_str(value: str | None) -> str | None:
+    """
+    Compartilha uma única cópia de códigos que se repetem em muitos registros,
+    como siglas e identificadores de tarefas
+    """
+    return None if value is None else sys.intern(value)
+
+
 class Model:
-    _raw_value: OrderedDict | None = None
+    __slots__ = ("_raw_value",)
+
+    _lazy_fields: ClassVar[dict[str, Callable[[OrderedDict], Any]]] = {}
+    """
+    Campos com objetos aninhados, decodificados a partir do registro. No modo
+    preguiçoso (`from_record(record, lazy=True)`) são decodificados apenas no
+    primeiro acesso.
+    """
 
     @staticmethod
     def from_record(record: OrderedDict) -> Self: ...
 
     @classmethod
-    def from_many_records(cls, records: list[dict]) -> list[Self]:
-        return [cls.from_record(record) for record in records]
+    def from_many_records(cls, records: list[dict], **kwargs) -> list[Self]:
+        return [cls.from_record(record, **kwargs) for record in records]
+
+    @classmethod
+    def _build(cls, record: OrderedDict, lazy: bool, **fields) -> Self:
+        """Cria o modelo com os campos simples `fields` e os campos de `_lazy_fields`"""
+        if lazy:
+            instance = cls.__new__(cls)
+            for name, value in fields.items():
+                setattr(instance, name, value)
+        else:
+            with raw_mode(_nested_raw_mode()):
+                for name, decode in cls._lazy_fields.items():
+                    fields[name] = decode(record)
+            instance = cls(**fields)
+
+        instance._raw_value = retain_raw(record)
+        return instance
+
+    def __getattr__(self, name):
+        # Chamado apenas para atributos ainda não definidos, ou seja, campos
+        # preguiçosos que ainda não foram acessados.
+        decode = type(self)._lazy_fields.get(name)
+        if decode is None:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+
+        raw = self._raw_value
+        if isinstance(raw, bytes):
+            # O registro serializado é do objeto principal; os objetos
+            # aninhados não guardam uma cópia dele.
+            with raw_mode("none"):
+                value = decode(pickle.loads(raw))
+        else:
+            value = decode(raw)
+
+        setattr(self, name, value)
+        return value
 
     @property
-    def raw_value(self):
-        return self._raw_value
+    def raw_value(self) -> OrderedDict | None:
+        raw = getattr(self, "_raw_value", None)
+        if isinstance(raw, bytes):
+            return pickle.loads(raw)
+        return raw
+
+
+def _optional(model: type[Model], key: str) -> Callable[[OrderedDict], Any]:
+    return lambda record: (
+        None if record[key] is None else model.from_record(record[key])
+    )
 
 
-@dataclass
+@dataclass(slots=True)
 class Assinatura(Model):
     nome: str
     cargo_funcao: str
@@ -38,15 +143,19 @@ class Assinatura(Model):
             data_hora=record["DataHora"],
             id_usuario=record["IdUsuario"],
             id_origem=record["IdOrigem"],
-            id_orgao=record["IdOrgao"],
-            sigla=record["Sigla"],
+            id_orgao=intern_str(record["IdOrgao"]),
+            sigla=intern_str(record["Sigla"]),
         )
 
-        assinatura._raw_value = record
+        assinatura._raw_value = retain_raw(record)
         return assinatura
 
+    @property
+    def data_hora_datetime(self) -> datetime | None:
+        return parse_data_hora(self.data_hora)
+
 
-@dataclass
+@dataclass(slots=True)
 class Campo(Model):
     nome: str
     valor: str
@@ -58,11 +167,11 @@ class Campo(Model):
             valor=record["Valor"],
         )
 
-        campo._raw_value = record
+        campo._raw_value = retain_raw(record)
         return campo
 
 
-@dataclass
+@dataclass(slots=True)
 class Unidade(Model):
     id_unidade: str
     sigla: str
@@ -75,18 +184,18 @@ class Unidade(Model):
     def from_record(record):
         unidade = Unidade(
             id_unidade=record["IdUnidade"],
-            sigla=record["Sigla"],
+            sigla=intern_str(record["Sigla"]),
             descricao=record["Descricao"],
             protocolo=decode_sin(record["SinProtocolo"]),
             arquivamento=decode_sin(record["SinArquivamento"]),
             ouvidoria=decode_sin(record["SinOuvidoria"]),
         )
 
-        unidade._raw_value = record
+        unidade._raw_value = retain_raw(record)
         return unidade
 
 
-@dataclass
+@dataclass(slots=True)
 class Usuario(Model):
     id_usuario: str
     sigla: str
@@ -96,14 +205,14 @@ class Usuario(Model):
     def from_record(record):
         usuario = Usuario(
             id_usuario=record["IdUsuario"],
-            sigla=record["Sigla"],
+            sigla=intern_str(record["Sigla"]),
             nome=record["Nome"],
         )
-        usuario._raw_value = record
+        usuario._raw_value = retain_raw(record)
         return usuario
 
 
-@dataclass
+@dataclass(slots=True)
 class AtributoAndamento(Model):
     nome: str
     valor: str
@@ -117,11 +226,11 @@ class AtributoAndamento(Model):
             id_origem=record["IdOrigem"],
         )
 
-        atributo._raw_value = record
+        atributo._raw_value = retain_raw(record)
         return atributo
 
 
-@dataclass
+@dataclass(slots=True)
 class Assunto(Model):
     codigo_estruturado: str | None
     descricao: str | None
@@ -133,11 +242,11 @@ class Assunto(Model):
             descricao=record["Descricao"],
         )
 
-        assunto._raw_value = record
+        assunto._raw_value = retain_raw(record)
         return assunto
 
 
-@dataclass
+@dataclass(slots=True)
 class ProcedimentoResumido(Model):
     id_tipo_procedimento: str
     procedimento_formatado: str
@@ -151,11 +260,11 @@ class ProcedimentoResumido(Model):
             tipo_procedimento=record["TipoProcedimento"],
         )
 
-        procedimento._raw_value = record
+        procedimento._raw_value = retain_raw(record)
         return procedimento
 
 
-@dataclass
+@dataclass(slots=True)
 class Observacao(Model):
     descricao: str
     unidade: Unidade
@@ -167,11 +276,11 @@ class Observacao(Model):
             unidade=Unidade.from_record(record["Unidade"]),
         )
 
-        observacao._raw_value = record
+        observacao._raw_value = retain_raw(record)
         return observacao
 
 
-@dataclass
+@dataclass(slots=True)
 class Interessado(Model):
     sigla: str
     nome: str
@@ -179,15 +288,15 @@ class Interessado(Model):
     @staticmethod
     def from_record(record):
         interessado = Interessado(
-            sigla=record["Sigla"],
+            sigla=intern_str(record["Sigla"]),
             nome=record["Nome"],
         )
 
-        interessado._raw_value = record
+        interessado._raw_value = retain_raw(record)
         return interessado
 
 
-@dataclass
+@dataclass(slots=True)
 class Andamento(Model):
     id_andamento: str
     id_tarefa: str
@@ -198,51 +307,41 @@ class Andamento(Model):
     usuario: Usuario | None
     atributos: list[AtributoAndamento] | None
 
+    _lazy_fields = {
+        "unidade": _optional(Unidade, "Unidade"),
+        "usuario": _optional(Usuario, "Usuario"),
+        "atributos": lambda record: (
+            None
+            if record["Atributos"] is None
+            else AtributoAndamento.from_many_records(record["Atributos"])
+        ),
+    }
+
     @staticmethod
-    def from_record(record):
+    def from_record(record, lazy: bool = False):
         if Andamento.is_blank(record):
             return None
 
-        andamento = Andamento(
+        return Andamento._build(
+            record,
+            lazy,
             id_andamento=record["IdAndamento"],
-            id_tarefa=record["IdTarefa"],
-            id_tarefa_modulo=record["IdTarefaModulo"],
+            id_tarefa=intern_str(record["IdTarefa"]),
+            id_tarefa_modulo=intern_str(record["IdTarefaModulo"]),
             descricao=record["Descricao"],
             data_hora=record["DataHora"],
-            unidade=None,
-            usuario=None,
-            atributos=None,
         )
 
-        if record["Unidade"] is not None:
-            andamento.unidade = Unidade.from_record(record["Unidade"])
-
-        if record["Usuario"] is not None:
-            andamento.usuario = Usuario.from_record(record["Usuario"])
-
-        if record["Atributos"] is not None:
-            andamento.atributos = AtributoAndamento.from_many_records(
-                record["Atributos"]
-            )
-
-        andamento._raw_value = record
-        return andamento
-
     @staticmethod
-    def is_blank(record: OrderedDict) -> bool:
-        return record == {
-            "IdAndamento": None,
-            "IdTarefa": None,
-            "IdTarefaModulo": None,
-            "Descricao": None,
-            "DataHora": None,
-            "Unidade": None,
-            "Usuario": None,
-            "Atributos": None,
-        }
+    def is_blank(record: OrderedDict | None) -> bool:
+        return record is None or all(value is None for value in record.values())
+
+    @property
+    def data_hora_datetime(self) -> datetime | None:
+        return parse_data_hora(self.data_hora)
 
 
-@dataclass
+@dataclass(slots=True)
 class Marcador(Model):
     id_marcador: str
     nome: str
@@ -258,11 +357,11 @@ class Marcador(Model):
             ativo=decode_sin(record["SinAtivo"]),
         )
 
-        marcador._raw_value = record
+        marcador._raw_value = retain_raw(record)
         return marcador
 
 
-@dataclass
+@dataclass(slots=True)
 class ArquivoExtensao(Model):
     id_andamento_marcador: str
     texto: str
@@ -278,11 +377,15 @@ class ArquivoExtensao(Model):
             usuario=Usuario.from_record(record["Usuario"]),
         )
 
-        extensao._raw_value = record
+        extensao._raw_value = retain_raw(record)
         return extensao
 
+    @property
+    def data_hora_datetime(self) -> datetime | None:
+        return parse_data_hora(self.data_hora)
+
 
-@dataclass
+@dataclass(slots=True)
 class DefinicaoControlePrazo(Model):
     protocolo_procedimento: str
     data_prazo: str
@@ -298,7 +401,7 @@ class DefinicaoControlePrazo(Model):
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Serie(Model):
     id_serie: str
     nome: str
@@ -315,11 +418,11 @@ class Serie(Model):
         if record["Aplicabilidade"] is not None:
             serie.aplicabilidade = Aplicabilidade.from_str(record["Aplicabilidade"])
 
-        serie._raw_value = record
+        serie._raw_value = retain_raw(record)
         return serie
 
 
-@dataclass
+@dataclass(slots=True)
 class TipoProcedimento(Model):
     id_tipo_procedimento: str
     nome: str
@@ -331,11 +434,11 @@ class TipoProcedimento(Model):
             nome=record["Nome"],
         )
 
-        tipo_procedimento._raw_value = record
+        tipo_procedimento._raw_value = retain_raw(record)
         return tipo_procedimento
 
 
-@dataclass
+@dataclass(slots=True)
 class UnidadeProcedimentoAberto(Model):
     unidade: Unidade
     usuario_atribuido: Usuario
@@ -347,11 +450,11 @@ class UnidadeProcedimentoAberto(Model):
             usuario_atribuido=Usuario.from_record(record["UsuarioAtribuicao"]),
         )
 
-        unidade._raw_value = record
+        unidade._raw_value = retain_raw(record)
         return unidade
 
 
-@dataclass
+@dataclass(slots=True)
 class Publicacao(Model):
     id_publicacao: str
     id_documento: str
@@ -387,24 +490,19 @@ class Publicacao(Model):
         )
 
     @staticmethod
-    def is_empty(record: OrderedDict) -> bool:
-        return record == {
-            "IdPublicacao": None,
-            "IdDocumento": None,
-            "StaMotivo": None,
-            "Resumo": None,
-            "IdVeiculoPublicacao": None,
-            "NomeVeiculo": None,
-            "StaTipoVeiculo": None,
-            "Numero": None,
-            "DataDisponibilizacao": None,
-            "DataPublicacao": None,
-            "Estado": None,
-            "ImprensaNacional": None,
-        }
+    def is_empty(record: OrderedDict | None) -> bool:
+        return record is None or all(value is None for value in record.values())
 
+    @property
+    def data_disponibilizacao_datetime(self) -> datetime | None:
+        return parse_data_hora(self.data_disponibilizacao)
+
+    @property
+    def data_publicacao_datetime(self) -> datetime | None:
+        return parse_data_hora(self.data_publicacao)
 
-@dataclass
+
+@dataclass(slots=True)
 class RetornoConsultaProcedimento(Model):
     id_procedimento: str
     procedimento_formatado: str
@@ -424,9 +522,40 @@ class RetornoConsultaProcedimento(Model):
     procedimentos_relacionados: list[ProcedimentoResumido]
     procedimentos_anexados: list[ProcedimentoResumido]
 
+    _lazy_fields = {
+        "tipo_procedimento": lambda record: TipoProcedimento.from_record(
+            record["TipoProcedimento"]
+        ),
+        "andamento_geracao": lambda record: Andamento.from_record(
+            record["AndamentoGeracao"]
+        ),
+        "andamento_conclusao": lambda record: Andamento.from_record(
+            record["AndamentoConclusao"]
+        ),
+        "ultimo_andamento": lambda record: Andamento.from_record(
+            record["UltimoAndamento"]
+        ),
+        "unidades_procedimento_aberto": lambda record: UnidadeProcedimentoAberto.from_many_records(
+            record["UnidadesProcedimentoAberto"]
+        ),
+        "assuntos": lambda record: Assunto.from_many_records(record["Assuntos"]),
+        "observacoes": lambda record: Observacao.from_many_records(record["Observacoes"]),
+        "interessados": lambda record: Interessado.from_many_records(
+            record["Interessados"]
+        ),
+        "procedimentos_relacionados": lambda record: ProcedimentoResumido.from_many_records(
+            record["ProcedimentosRelacionados"]
+        ),
+        "procedimentos_anexados": lambda record: ProcedimentoResumido.from_many_records(
+            record["ProcedimentosAnexados"]
+        ),
+    }
+
     @staticmethod
-    def from_record(record):
-        procedimento = RetornoConsultaProcedimento(
+    def from_record(record, lazy: bool = False):
+        return RetornoConsultaProcedimento._build(
+            record,
+            lazy,
             id_procedimento=record["IdProcedimento"],
             procedimento_formatado=record["ProcedimentoFormatado"],
             especificacao=record["Especificacao"],
@@ -434,29 +563,14 @@ class RetornoConsultaProcedimento(Model):
             link_acesso=record["LinkAcesso"],
             nivel_acesso_local=NivelAcesso.from_str(record["NivelAcessoLocal"]),
             nivel_acesso_global=NivelAcesso.from_str(record["NivelAcessoGlobal"]),
-            tipo_procedimento=TipoProcedimento.from_record(record["TipoProcedimento"]),
-            andamento_geracao=Andamento.from_record(record["AndamentoGeracao"]),
-            andamento_conclusao=Andamento.from_record(record["AndamentoConclusao"]),
-            ultimo_andamento=Andamento.from_record(record["UltimoAndamento"]),
-            unidades_procedimento_aberto=UnidadeProcedimentoAberto.from_many_records(
-                record["UnidadesProcedimentoAberto"]
-            ),
-            assuntos=Assunto.from_many_records(record["Assuntos"]),
-            observacoes=Observacao.from_many_records(record["Observacoes"]),
-            interessados=Interessado.from_many_records(record["Interessados"]),
-            procedimentos_relacionados=ProcedimentoResumido.from_many_records(
-                record["ProcedimentosRelacionados"]
-            ),
-            procedimentos_anexados=ProcedimentoResumido.from_many_records(
-                record["ProcedimentosAnexados"]
-            ),
         )
 
-        procedimento._raw_value = record
-        return procedimento
+    @property
+    def data_autuacao_datetime(self) -> datetime | None:
+        return parse_data_hora(self.data_autuacao)
 
 
-@dataclass
+@dataclass(slots=True)
 class RetornoConsultaDocumento(Model):
     id_procedimento: str
     procedimento_formatado: str
@@ -476,9 +590,24 @@ class RetornoConsultaDocumento(Model):
     publicacao: Publicacao | None
     campos: list[Campo]
 
+    _lazy_fields = {
+        "serie": lambda record: Serie.from_record(record["Serie"]),
+        "unidade_elaboradora": lambda record: Unidade.from_record(
+            record["UnidadeElaboradora"]
+        ),
+        "andamento_geracao": lambda record: Andamento.from_record(
+            record["AndamentoGeracao"]
+        ),
+        "assinaturas": lambda record: Assinatura.from_many_records(record["Assinaturas"]),
+        "publicacao": lambda record: Publicacao.from_record(record["Publicacao"]),
+        "campos": lambda record: Campo.from_many_records(record["Campos"]),
+    }
+
     @staticmethod
-    def from_record(record):
-        documento = RetornoConsultaDocumento(
+    def from_record(record, lazy: bool = False):
+        return RetornoConsultaDocumento._build(
+            record,
+            lazy,
             id_procedimento=record["IdProcedimento"],
             procedimento_formatado=record["ProcedimentoFormatado"],
             id_documento=record["IdDocumento"],
@@ -486,17 +615,12 @@ class RetornoConsultaDocumento(Model):
             link_acesso=record["LinkAcesso"],
             nivel_acesso_local=NivelAcesso.from_str(record["NivelAcessoLocal"]),
             nivel_acesso_global=NivelAcesso.from_str(record["NivelAcessoGlobal"]),
-            serie=Serie.from_record(record["Serie"]),
             numero=record["Numero"],
             nome_arvore=record["NomeArvore"],
             descricao=record["Descricao"],
             data=record["Data"],
-            unidade_elaboradora=Unidade.from_record(record["UnidadeElaboradora"]),
-            andamento_geracao=Andamento.from_record(record["AndamentoGeracao"]),
-            assinaturas=Assinatura.from_many_records(record["Assinaturas"]),
-            publicacao=Publicacao.from_record(record["Publicacao"]),
-            campos=Campo.from_many_records(record["Campos"]),
         )
 
-        documento._raw_value = record
-        return documento
+    @property
+    def data_datetime(self) -> datetime | None:
+        return parse_data_hora(self.data)
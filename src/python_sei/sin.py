@@ -1,18 +1,17 @@
 from typing import Literal
 
+_DECODE_SIN = {"S": True, "s": True, "N": False, "n": False}
+
 
 def decode_sin(value: str | None) -> bool | None:
     """Transforma uma string com valores S/N em bool"""
     if value is None:
         return None
 
-    match value.lower():
-        case "n":
-            return False
-        case "s":
-            return True
-        case _:
-            raise ValueError("Invalid SIN")
+    try:
+        return _DECODE_SIN[value]
+    except KeyError:
+        raise ValueError("Invalid SIN") from None
 
 
 def encode_sin(value: bool | None) -> Literal["S", "N"] | None:
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    """Chamadas efetivamente enviadas ao SEI."""
+    coalesced: int = 0
+    """Chamadas atendidas por uma chamada idêntica já em andamento."""
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas idênticas e simultâneas feitas por várias threads: a primeira
+    executa a função e as demais aguardam e recebem o mesmo resultado (ou erro).
+    """
+
+    def __init__(self):
+        self.stats = SingleFlightStats()
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.stats.calls += 1
+            else:
+                self.stats.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """Equivalente de `SingleFlight` para corrotinas de um mesmo event loop"""
+
+    def __init__(self):
+        self.stats = SingleFlightStats()
+        self._calls: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is not None:
+            self.stats.coalesced += 1
+        else:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self.stats.calls += 1
+
+        # O cancelamento de quem aguarda não cancela a chamada compartilhada.
+        return await asyncio.shield(task)
@@ -0,0 +1,260 @@
+"""
+Sincronização incremental dos andamentos dos processos com um armazenamento local.
+
+O SEI não permite listar apenas os andamentos posteriores a um identificador: o
+parâmetro `Andamentos` de `listarAndamentos` seleciona identificadores exatos.
+Por isso cada processo é verificado primeiro com `consultar_procedimento`, que
+retorna apenas o último andamento; a lista completa só é percorrida quando há
+andamentos novos, e apenas os posteriores ao último conhecido são armazenados.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from .batch import DEFAULT_MAX_CONCORRENCIA, ResultadoLote, executar_lote
+from .client import Client
+from .models import Andamento
+from .wsdl import DEFAULT_CACHE_DIR
+
+
+@dataclass
+class SyncStats:
+    verificacoes: int = 0
+    """Processos verificados."""
+    sem_alteracao: int = 0
+    """Processos descartados apenas pelo último andamento."""
+    listagens: int = 0
+    """Processos cujos andamentos foram listados."""
+    novos: int = 0
+    """Andamentos novos armazenados."""
+
+
+class AndamentoStore:
+    """
+    Andamentos já conhecidos de cada processo, em um banco SQLite local. Os
+    andamentos são armazenados com `pickle`, junto com o momento em que foram
+    obtidos.
+    """
+
+    def __init__(self, path: str | os.PathLike | None = None):
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_DIR / "andamentos.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS andamentos (
+                    protocolo_procedimento TEXT NOT NULL,
+                    id_andamento INTEGER NOT NULL,
+                    sincronizado_em REAL NOT NULL,
+                    andamento BLOB NOT NULL,
+                    PRIMARY KEY (protocolo_procedimento, id_andamento)
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS andamentos_sincronizado_em
+                ON andamentos (sincronizado_em)
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS procedimentos (
+                    protocolo_procedimento TEXT PRIMARY KEY,
+                    ultimo_id_andamento INTEGER,
+                    sincronizado_em REAL NOT NULL
+                )
+                """
+            )
+
+    def ultimo_id_andamento(self, protocolo_procedimento: str) -> int | None:
+        """
+        Maior `id_andamento` conhecido do processo, ou `None` se nenhum andamento
+        é conhecido, seja porque o processo nunca foi sincronizado ou porque não
+        tinha andamentos (ver `sincronizado_em`)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ultimo_id_andamento FROM procedimentos WHERE protocolo_procedimento = ?",
+                (protocolo_procedimento,),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def sincronizado_em(self, protocolo_procedimento: str) -> datetime | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sincronizado_em FROM procedimentos WHERE protocolo_procedimento = ?",
+                (protocolo_procedimento,),
+            ).fetchone()
+        return None if row is None else datetime.fromtimestamp(row[0])
+
+    def adicionar(
+        self,
+        protocolo_procedimento: str,
+        andamentos: list[Andamento],
+        sincronizado_em: float | None = None,
+    ) -> int:
+        """
+        Armazena os `andamentos` do processo e registra a sincronização, mesmo se
+        não houver andamentos. Retorna a quantidade de andamentos novos.
+        """
+        sincronizado_em = time.time() if sincronizado_em is None else sincronizado_em
+        rows = [
+            (
+                protocolo_procedimento,
+                int(andamento.id_andamento),
+                sincronizado_em,
+                pickle.dumps(andamento, protocol=pickle.HIGHEST_PROTOCOL),
+            )
+            for andamento in andamentos
+        ]
+        with self._lock, self._conn:
+            novos = self._conn.executemany(
+                "INSERT OR IGNORE INTO andamentos VALUES (?, ?, ?, ?)", rows
+            ).rowcount
+            self._conn.execute(
+                """
+                INSERT INTO procedimentos VALUES (
+                    ?,
+                    (SELECT MAX(id_andamento) FROM andamentos WHERE protocolo_procedimento = ?),
+                    ?
+                )
+                ON CONFLICT (protocolo_procedimento) DO UPDATE SET
+                    ultimo_id_andamento = excluded.ultimo_id_andamento,
+                    sincronizado_em = excluded.sincronizado_em
+                """,
+                (protocolo_procedimento, protocolo_procedimento, sincronizado_em),
+            )
+        return novos
+
+    def andamentos(self, protocolo_procedimento: str) -> list[Andamento]:
+        """Andamentos conhecidos do processo, do mais antigo para o mais recente"""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT andamento FROM andamentos
+                WHERE protocolo_procedimento = ?
+                ORDER BY id_andamento
+                """,
+                (protocolo_procedimento,),
+            ).fetchall()
+        return [pickle.loads(row[0]) for row in rows]
+
+    def alteracoes_desde(
+        self,
+        desde: datetime,
+        protocolos_procedimentos: list[str] | None = None,
+    ) -> dict[str, list[Andamento]]:
+        """
+        Andamentos obtidos a partir de `desde`, agrupados por processo. Considera o
+        momento da sincronização, e não a data do andamento no SEI.
+        """
+        query = "SELECT protocolo_procedimento, andamento FROM andamentos WHERE sincronizado_em >= ?"
+        args: tuple = (desde.timestamp(),)
+        if protocolos_procedimentos is not None:
+            protocolos_procedimentos = tuple(protocolos_procedimentos)
+            query += (
+                f" AND protocolo_procedimento IN ({', '.join('?' * len(protocolos_procedimentos))})"
+            )
+            args += protocolos_procedimentos
+        query += " ORDER BY protocolo_procedimento, id_andamento"
+
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+
+        alteracoes: dict[str, list[Andamento]] = {}
+        for protocolo_procedimento, andamento in rows:
+            alteracoes.setdefault(protocolo_procedimento, []).append(pickle.loads(andamento))
+        return alteracoes
+
+    def remover(self, protocolo_procedimento: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM andamentos WHERE protocolo_procedimento = ?",
+                (protocolo_procedimento,),
+            )
+            self._conn.execute(
+                "DELETE FROM procedimentos WHERE protocolo_procedimento = ?",
+                (protocolo_procedimento,),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM andamentos")
+            self._conn.execute("DELETE FROM procedimentos")
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+@dataclass
+class Sincronizador:
+    """
+    Mantém `store` atualizado com os andamentos dos processos consultados pela
+    unidade `id_unidade`.
+
+    Com o cache de respostas do cliente ativo, um andamento pode levar até o TTL
+    de `consultarProcedimento` para ser detectado.
+    """
+
+    client: Client
+    id_unidade: str
+    store: AndamentoStore = field(default_factory=AndamentoStore)
+    stats: SyncStats = field(default_factory=SyncStats)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def _contar(self, campo: str, quantidade: int = 1) -> None:
+        # `sincronizar_lote` executa `sincronizar` em várias threads.
+        with self._lock:
+            setattr(self.stats, campo, getattr(self.stats, campo) + quantidade)
+
+    def sincronizar(self, protocolo_procedimento: str) -> list[Andamento]:
+        """Atualiza o processo e retorna os andamentos novos"""
+        self._contar("verificacoes")
+        sincronizado = self.store.sincronizado_em(protocolo_procedimento) is not None
+        ultimo_id = self.store.ultimo_id_andamento(protocolo_procedimento)
+
+        if sincronizado:
+            procedimento = self.client.consultar_procedimento(
+                self.id_unidade, protocolo_procedimento, retornar_ultimo_andamento=True
+            )
+            ultimo = procedimento.ultimo_andamento
+            if ultimo is None or (ultimo_id is not None and int(ultimo.id_andamento) <= ultimo_id):
+                self._contar("sem_alteracao")
+                self.store.adicionar(protocolo_procedimento, [])
+                return []
+
+        self._contar("listagens")
+        novos = [
+            andamento
+            for andamento in self.client.iterar_andamentos(
+                self.id_unidade, protocolo_procedimento, retornar_atributos=True
+            )
+            if ultimo_id is None or int(andamento.id_andamento) > ultimo_id
+        ]
+        self._contar("novos", self.store.adicionar(protocolo_procedimento, novos))
+        return novos
+
+    def sincronizar_lote(
+        self,
+        protocolos_procedimentos: list[str],
+        max_concorrencia: int = DEFAULT_MAX_CONCORRENCIA,
+    ) -> list[ResultadoLote[list[Andamento]]]:
+        """Sincroniza vários processos em paralelo; falhas são retornadas por item"""
+        return executar_lote(protocolos_procedimentos, self.sincronizar, max_concorrencia)
+
+    def alteracoes_desde(
+        self,
+        desde: datetime,
+        protocolos_procedimentos: list[str] | None = None,
+    ) -> dict[str, list[Andamento]]:
+        return self.store.alteracoes_desde(desde, protocolos_procedimentos)
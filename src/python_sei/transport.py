@@ -0,0 +1,125 @@
+import random
+import threading
+from dataclasses import dataclass, field
+
+import requests
+from requests.adapters import HTTPAdapter
+from zeep.transports import Transport
+
+
+@dataclass
+class TransportOptions:
+    """Configuração da conexão HTTP usada pelo cliente SOAP."""
+
+    pool_connections: int = 4
+    """Quantidade de hosts com pool de conexões mantido em memória."""
+    pool_maxsize: int = 16
+    """Quantidade máxima de conexões mantidas abertas por host."""
+    connect_timeout: float = 5.0
+    read_timeout: float = 60.0
+    keep_alive: bool = True
+    retries: int = 3
+    """Novas tentativas para operações idempotentes (`consultar*`/`listar*`)."""
+    backoff_factor: float = 0.5
+    backoff_max: float = 10.0
+
+    @property
+    def timeout(self) -> tuple[float, float]:
+        return (self.connect_timeout, self.read_timeout)
+
+    def backoff(self, tentativa: int) -> float:
+        """Tempo de espera antes da tentativa `tentativa + 1` (backoff exponencial com jitter)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_factor * 2**tentativa))
+
+
+@dataclass
+class TransportStats:
+    pool_hits: int = 0
+    """Requisições que reaproveitaram uma conexão aberta."""
+    pool_misses: int = 0
+    """Requisições que precisaram abrir uma nova conexão."""
+    retries: int = 0
+
+
+@dataclass
+class AtomicCounter:
+    value: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def increment(self) -> None:
+        with self._lock:
+            self.value += 1
+
+
+class PooledAdapter(HTTPAdapter):
+    """`HTTPAdapter` que expõe o uso dos pools de conexão do urllib3."""
+
+    keep_alive: bool = True
+
+    def pool_stats(self) -> tuple[int, int]:
+        """
+        Retorna `(hits, misses)` somados de todos os pools ativos. Sem keep-alive
+        o urllib3 reabre a conexão no mesmo objeto, que não é contado como uma
+        nova conexão; nesse caso toda requisição é um miss.
+        """
+        requests_count = 0
+        connections = 0
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            try:
+                pool = pools[key]
+            except KeyError:
+                continue
+            requests_count += pool.num_requests
+            connections += pool.num_connections
+        if not self.keep_alive:
+            return 0, requests_count
+        return requests_count - connections, connections
+
+
+def build_session(options: TransportOptions) -> tuple[requests.Session, PooledAdapter]:
+    session = requests.Session()
+    adapter = PooledAdapter(
+        pool_connections=options.pool_connections,
+        pool_maxsize=options.pool_maxsize,
+        pool_block=False,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    if not options.keep_alive:
+        session.headers["Connection"] = "close"
+        adapter.keep_alive = False
+
+    return session, adapter
+
+
+def build_transport(options: TransportOptions, cache=None) -> tuple[Transport, PooledAdapter]:
+    session, adapter = build_session(options)
+    transport = Transport(
+        cache=cache,
+        session=session,
+        timeout=options.timeout,
+        operation_timeout=options.timeout,
+    )
+    return transport, adapter
+
+
+def build_async_transport(options: TransportOptions, cache=None):
+    """
+    Cria o transporte assíncrono (httpx) do zeep. A leitura do WSDL continua
+    síncrona, pois acontece apenas na criação do cliente.
+    """
+    import httpx
+    from zeep.transports import AsyncTransport
+
+    timeout = httpx.Timeout(options.read_timeout, connect=options.connect_timeout)
+    limits = httpx.Limits(
+        max_connections=options.pool_maxsize,
+        max_keepalive_connections=options.pool_maxsize if options.keep_alive else 0,
+    )
+    return AsyncTransport(
+        client=httpx.AsyncClient(timeout=timeout, limits=limits),
+        wsdl_client=httpx.Client(timeout=timeout),
+        cache=cache,
+    )
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+import requests
+from lxml import etree
+from zeep.cache import Base
+
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("PYTHON_SEI_CACHE_DIR", Path.home() / ".cache" / "python_sei")
+)
+DEFAULT_TTL = 24 * 60 * 60
+
+_XSD = "http://www.w3.org/2001/XMLSchema"
+_WSDL = "http://schemas.xmlsoap.org/wsdl/"
+_IMPORTS = {
+    f"{{{_XSD}}}import": "schemaLocation",
+    f"{{{_XSD}}}include": "schemaLocation",
+    f"{{{_WSDL}}}import": "location",
+}
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def escrever_atomico(path: Path, data: bytes) -> None:
+    """Grava o arquivo de forma atômica, para que vários workers possam
+    compartilhar o mesmo diretório de cache."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class WsdlCache(Base):
+    """
+    Cache em disco dos documentos WSDL/XSD baixados pelo zeep.
+
+    Cada URL possui um índice em `urls/<sha256(url)>.json` que aponta para o hash
+    SHA-256 do conteúdo, gravado uma única vez em `blobs/<sha256(conteudo)>`. O
+    conteúdo é validado contra o hash na leitura e entradas mais antigas que
+    `timeout` segundos são ignoradas (`timeout=None` desativa a expiração).
+    """
+
+    def __init__(self, path: str | os.PathLike | None = None, timeout: int | None = DEFAULT_TTL):
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_DIR / "wsdl"
+        self.timeout = timeout
+        self._urls = self.path / "urls"
+        self._blobs = self.path / "blobs"
+        self._urls.mkdir(parents=True, exist_ok=True)
+        self._blobs.mkdir(parents=True, exist_ok=True)
+
+    def _indice(self, url: str) -> Path:
+        return self._urls / f"{_sha256(url.encode())}.json"
+
+    def add(self, url: str, content: bytes) -> None:
+        digest = _sha256(content)
+        blob = self._blobs / digest
+        if not blob.exists():
+            escrever_atomico(blob, content)
+
+        indice = {"url": url, "sha256": digest, "created": time.time()}
+        escrever_atomico(self._indice(url), json.dumps(indice).encode())
+
+    def get(self, url: str) -> bytes | None:
+        try:
+            indice = json.loads(self._indice(url).read_bytes())
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if indice["url"] != url:
+            return None
+        if self.timeout is not None and time.time() - indice["created"] > self.timeout:
+            return None
+
+        try:
+            content = (self._blobs / indice["sha256"]).read_bytes()
+        except FileNotFoundError:
+            return None
+
+        if _sha256(content) != indice["sha256"]:
+            return None
+        return content
+
+    def clear(self) -> None:
+        """Remove todas as entradas do cache."""
+        for directory in (self._urls, self._blobs):
+            for path in directory.iterdir():
+                path.unlink(missing_ok=True)
+
+
+def salvar_wsdl(url: str, destino: str | os.PathLike) -> Path:
+    """
+    Baixa o WSDL do SEI e os schemas que ele importa (por exemplo, o
+    `soapenc.xsd`) e os grava em `destino` e no mesmo diretório, com as
+    referências reescritas para os arquivos locais. Assim,
+    `Client(url, ..., wsdl=destino)` não acessa a rede na criação do cliente.
+    """
+    destino = Path(destino)
+    _salvar_documento(url, destino, {url: destino.name})
+    return destino
+
+
+def _salvar_documento(url: str, destino: Path, salvos: dict[str, str]) -> None:
+    """Grava o documento em `destino` depois de salvar, recursivamente, os que ele importa"""
+    response = requests.get(url, timeout=60)
+    response.raise_for_status()
+
+    raiz = etree.fromstring(response.content)
+    for elemento in raiz.iter(*_IMPORTS):
+        atributo = _IMPORTS[elemento.tag]
+        location = elemento.get(atributo)
+        if not location:
+            continue
+        absoluta = urljoin(url, location)
+        if absoluta not in salvos:
+            nome = Path(urlparse(absoluta).path).name or "schema.xsd"
+            if nome in salvos.values():
+                nome = f"{len(salvos)}-{nome}"
+            salvos[absoluta] = nome
+            _salvar_documento(absoluta, destino.parent / nome, salvos)
+        elemento.set(atributo, salvos[absoluta])
+
+    escrever_atomico(destino, etree.tostring(raiz, xml_declaration=True, encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    # python -m python_sei.wsdl <url> <destino>
+    print(salvar_wsdl(*sys.argv[1:3]))
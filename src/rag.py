@@ -0,0 +1,342 @@
+"""
+Índice semântico local dos documentos do SEI já convertidos.
+
+Os documentos são convertidos pelo `ConversaoCache`, divididos em chunks,
+transformados em vetores por um `Embedder` e gravados em um banco SQLite, com
+uma linha por chunk. Reindexar um documento substitui apenas os seus chunks, em
+uma única transação.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+
+from chunking import empacotar
+from conversao import ConversaoCache
+from python_sei.index import normalizar
+from python_sei.models import RetornoConsultaDocumento
+from python_sei.wsdl import DEFAULT_CACHE_DIR
+
+DEFAULT_CHUNK_TOKENS = 500
+DEFAULT_DIMENSAO = 1024
+
+
+class Embedder(Protocol):
+    nome: str
+    dimensao: int
+
+    def embed(self, textos: list[str]) -> np.ndarray:
+        """Retorna uma matriz `len(textos) x dimensao` com linhas de norma 1"""
+        ...
+
+
+def _normalizar_linhas(matriz: np.ndarray) -> np.ndarray:
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    normas[normas == 0] = 1
+    return matriz / normas
+
+
+@lru_cache(maxsize=1 << 18)
+def _hash_termo(termo: str) -> int:
+    return int.from_bytes(hashlib.blake2b(termo.encode(), digest_size=8).digest(), "little")
+
+
+class HashingEmbedder:
+    """
+    Embedder local e determinístico, sem modelos: palavras e pares de palavras
+    consecutivas, sem acentos, são mapeados por hash para `dimensao` posições,
+    com peso logarítmico. Captura sobreposição de vocabulário, não sinônimos.
+    """
+
+    def __init__(self, dimensao: int = DEFAULT_DIMENSAO):
+        self.dimensao = dimensao
+        self.nome = f"hashing-{dimensao}"
+
+    def embed(self, textos: list[str]) -> np.ndarray:
+        matriz = np.zeros((len(textos), self.dimensao), dtype=np.float32)
+        for linha, texto in enumerate(textos):
+            palavras = re.findall(r"\w+", normalizar(texto))
+            termos = palavras + [f"{a} {b}" for a, b in zip(palavras, palavras[1:])]
+            if not termos:
+                continue
+            hashes = np.fromiter(map(_hash_termo, termos), dtype=np.uint64, count=len(termos))
+            sinais = np.where(hashes >> np.uint64(63), 1.0, -1.0).astype(np.float32)
+            np.add.at(matriz[linha], (hashes % np.uint64(self.dimensao)).astype(np.intp), sinais)
+        matriz = np.sign(matriz) * np.log1p(np.abs(matriz))
+        return _normalizar_linhas(matriz)
+
+
+class SentenceTransformerEmbedder:
+    """Embedder com um modelo do `sentence-transformers`, que precisa estar instalado"""
+
+    def __init__(self, modelo: str):
+        from sentence_transformers import SentenceTransformer
+
+        self._modelo = SentenceTransformer(modelo)
+        self.dimensao = self._modelo.get_sentence_embedding_dimension()
+        self.nome = f"sentence-transformers:{modelo}"
+
+    def embed(self, textos: list[str]) -> np.ndarray:
+        vetores = self._modelo.encode(textos, convert_to_numpy=True, normalize_embeddings=True)
+        return vetores.astype(np.float32)
+
+
+@dataclass
+class Chunk:
+    id_documento: str
+    documento_formatado: str
+    procedimento_formatado: str
+    posicao: int
+    texto: str
+
+
+@dataclass
+class Resultado:
+    score: float
+    chunk: Chunk
+
+
+class IndiceVetorial:
+    """
+    Vetores dos chunks, persistidos em SQLite e mantidos em memória para a
+    busca, que é um produto interno com todos os vetores e leva poucos
+    milissegundos para dezenas de milhares de chunks.
+
+    O banco pode ser compartilhado por vários processos (por exemplo, os workers
+    do uvicorn). Cada gravação incrementa a geração do índice; um processo que
+    encontra no banco uma geração diferente da sua recarrega os vetores antes
+    de buscar.
+    """
+
+    def __init__(self, embedder: Embedder, path: str | os.PathLike | None = None):
+        self.embedder = embedder
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_DIR / "rag.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._geracao: int | None = None
+        self._vetores = np.zeros((0, self.embedder.dimensao), dtype=np.float32)
+        self._chunks: list[Chunk] = []
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS estado (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    embedder TEXT NOT NULL,
+                    geracao INTEGER NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS documentos (
+                    id_documento TEXT PRIMARY KEY,
+                    versao TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunks (
+                    id_documento TEXT NOT NULL,
+                    posicao INTEGER NOT NULL,
+                    documento_formatado TEXT NOT NULL,
+                    procedimento_formatado TEXT NOT NULL,
+                    texto TEXT NOT NULL,
+                    vetor BLOB NOT NULL,
+                    PRIMARY KEY (id_documento, posicao)
+                )
+                """
+            )
+            estado = self._conn.execute("SELECT embedder FROM estado").fetchone()
+            if estado is None or estado[0] != self.embedder.nome:
+                # Vetores de outro embedder não são comparáveis; o índice é refeito.
+                self._conn.execute("DELETE FROM chunks")
+                self._conn.execute("DELETE FROM documentos")
+                self._conn.execute(
+                    """
+                    INSERT INTO estado VALUES (0, ?, 0)
+                    ON CONFLICT (id) DO UPDATE SET embedder = excluded.embedder, geracao = geracao + 1
+                    """,
+                    (self.embedder.nome,),
+                )
+
+    def _atualizar(self) -> None:
+        """Recarrega os vetores, se o índice foi alterado por outro processo. Chamado com `_lock`."""
+        # Uma única transação de leitura, para que os chunks correspondam à geração lida.
+        self._conn.execute("BEGIN")
+        try:
+            geracao = self._conn.execute("SELECT geracao FROM estado").fetchone()[0]
+            if geracao == self._geracao:
+                return
+            chunks: list[Chunk] = []
+            vetores: list[np.ndarray] = []
+            for *campos, vetor in self._conn.execute(
+                """
+                SELECT id_documento, documento_formatado, procedimento_formatado, posicao, texto, vetor
+                FROM chunks ORDER BY id_documento, posicao
+                """
+            ):
+                chunks.append(Chunk(*campos))
+                vetores.append(np.frombuffer(vetor, dtype=np.float32))
+        finally:
+            self._conn.commit()
+
+        self._chunks = chunks
+        self._vetores = (
+            np.vstack(vetores)
+            if vetores
+            else np.zeros((0, self.embedder.dimensao), dtype=np.float32)
+        )
+        self._geracao = geracao
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._atualizar()
+            return len(self._chunks)
+
+    def versao(self, id_documento: str) -> str | None:
+        """Hash do conteúdo indexado do documento, ou `None` se não indexado"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT versao FROM documentos WHERE id_documento = ?", (id_documento,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def _gravar(
+        self, id_documento: str, versao: str | None, chunks: list[Chunk], vetores: np.ndarray
+    ) -> None:
+        """Substitui os chunks do documento; `versao=None` remove o documento"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM chunks WHERE id_documento = ?", (id_documento,))
+                if versao is None:
+                    self._conn.execute(
+                        "DELETE FROM documentos WHERE id_documento = ?", (id_documento,)
+                    )
+                else:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO documentos VALUES (?, ?)", (id_documento, versao)
+                    )
+                    self._conn.executemany(
+                        "INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?)",
+                        [
+                            (
+                                chunk.id_documento,
+                                chunk.posicao,
+                                chunk.documento_formatado,
+                                chunk.procedimento_formatado,
+                                chunk.texto,
+                                vetor.astype(np.float32).tobytes(),
+                            )
+                            for chunk, vetor in zip(chunks, vetores)
+                        ],
+                    )
+                geracao = self._conn.execute(
+                    "UPDATE estado SET geracao = geracao + 1 RETURNING geracao"
+                ).fetchone()[0]
+
+            if self._geracao is None or geracao != self._geracao + 1:
+                # Outro processo também alterou o índice: recarrega na próxima leitura.
+                self._geracao = None
+                return
+
+            manter = [
+                i for i, chunk in enumerate(self._chunks) if chunk.id_documento != id_documento
+            ]
+            self._vetores = np.concatenate([self._vetores[manter], vetores])
+            self._chunks = [self._chunks[i] for i in manter] + chunks
+            self._geracao = geracao
+
+    def upsert(self, id_documento: str, versao: str, chunks: list[Chunk]) -> None:
+        """Substitui os chunks do documento `id_documento` por `chunks`"""
+        if chunks:
+            vetores = self.embedder.embed([chunk.texto for chunk in chunks])
+        else:
+            vetores = np.zeros((0, self.embedder.dimensao), dtype=np.float32)
+        self._gravar(id_documento, versao, chunks, vetores)
+
+    def remover(self, id_documento: str) -> None:
+        self._gravar(
+            id_documento, None, [], np.zeros((0, self.embedder.dimensao), dtype=np.float32)
+        )
+
+    def buscar(
+        self,
+        consulta: str,
+        k: int = 5,
+        documentos_formatados: list[str] | None = None,
+    ) -> list[Resultado]:
+        """
+        Os `k` chunks mais próximos de `consulta`, opcionalmente apenas dos
+        documentos com os protocolos `documentos_formatados`
+        """
+        vetor = self.embedder.embed([consulta])[0]
+        with self._lock:
+            self._atualizar()
+            vetores, chunks = self._vetores, self._chunks
+
+        if documentos_formatados is not None:
+            filtro = set(documentos_formatados)
+            indices = np.array(
+                [i for i, chunk in enumerate(chunks) if chunk.documento_formatado in filtro],
+                dtype=np.intp,
+            )
+            vetores = vetores[indices]
+        else:
+            indices = np.arange(len(chunks))
+        if len(indices) == 0:
+            return []
+
+        scores = vetores @ vetor
+        k = min(k, len(indices))
+        melhores = np.argpartition(-scores, k - 1)[:k]
+        melhores = melhores[np.argsort(-scores[melhores])]
+        return [Resultado(float(scores[i]), chunks[indices[i]]) for i in melhores]
+
+
+class Ingestor:
+    """Converte, divide e indexa os documentos do SEI"""
+
+    def __init__(
+        self,
+        indice: IndiceVetorial,
+        conversoes: ConversaoCache,
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    ):
+        self.indice = indice
+        self.conversoes = conversoes
+        self.chunk_tokens = chunk_tokens
+
+    def ingerir(self, documento: RetornoConsultaDocumento) -> bool:
+        """
+        Indexa o documento, se o conteúdo ainda não estiver indexado. Retorna se
+        o índice foi alterado.
+        """
+        conversao = self.conversoes.converter(documento.id_documento, documento.link_acesso)
+        if self.indice.versao(documento.id_documento) == conversao.sha256:
+            return False
+
+        textos, _ = empacotar(conversao.chunks, self.chunk_tokens)
+        chunks = [
+            Chunk(
+                id_documento=documento.id_documento,
+                documento_formatado=documento.documento_formatado,
+                procedimento_formatado=documento.procedimento_formatado,
+                posicao=posicao,
+                texto=texto,
+            )
+            for posicao, texto in enumerate(textos)
+        ]
+        self.indice.upsert(documento.id_documento, conversao.sha256, chunks)
+        return True
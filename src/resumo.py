@@ -0,0 +1,179 @@
+"""
+Resumo de documentos com map-reduce sobre os trechos convertidos pelo Docling.
+
+Os trechos são resumidos em paralelo (map), os resumos são agrupados em árvore
+até caberem no orçamento de tokens (collapse) e combinados em um único resumo
+(reduce). O cliente do LLM e as chains são criados uma única vez por processo e
+compartilhados entre as requisições.
+"""
+
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import Callable, TypeVar
+
+from langchain_community.chat_models import ChatOCIGenAI
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable
+
+from chunking import ContadorTokens, contar_tokens_aproximado, empacotar
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PROMPT_MAP = "crie um breve resumo do seguinte documento: {context}"
+PROMPT_REDUCE = "combine esses resumos: {context}"
+PROMPT_COLLAPSE = (
+    "junte esse conteudo em um resumo conciso, depois traduza para portugues do brasil: {context}"
+)
+
+SEPARADOR = "\n\n"
+
+
+@cache
+def get_llm() -> BaseChatModel:
+    settings = get_settings()
+    return ChatOCIGenAI(
+        model_id=settings.llm_model_id,
+        service_endpoint=settings.llm_service_endpoint,
+        compartment_id=settings.compartment_id,
+        auth_type=settings.oci_auth_type.upper(),
+        auth_profile=settings.oci_profile,
+        model_kwargs={"temperature": settings.llm_temperature},
+    )
+
+
+@cache
+def _chain(template: str) -> Runnable:
+    return PromptTemplate.from_template(template) | get_llm() | StrOutputParser()
+
+
+def get_chain() -> Runnable:
+    """Cria as chains usadas nos resumos, para que não sejam criadas na primeira requisição"""
+    for template in (PROMPT_MAP, PROMPT_COLLAPSE, PROMPT_REDUCE):
+        _chain(template)
+    return _chain(PROMPT_MAP)
+
+
+def is_rate_limit(erro: Exception) -> bool:
+    """Indica se o erro é uma resposta 429 (limite de requisições) do serviço"""
+    for status in (
+        getattr(erro, "status", None),
+        getattr(erro, "status_code", None),
+        getattr(getattr(erro, "response", None), "status_code", None),
+    ):
+        if status == 429:
+            return True
+    return False
+
+
+def _com_backoff(funcao: Callable[[], T], tentativas: int, backoff: float, backoff_max: float) -> T:
+    for tentativa in range(tentativas):
+        try:
+            return funcao()
+        except Exception as e:
+            if not is_rate_limit(e) or tentativa == tentativas - 1:
+                raise
+            # Full jitter, como em `TransportOptions.backoff`.
+            time.sleep(random.uniform(0, min(backoff_max, backoff * 2**tentativa)))
+    raise AssertionError("unreachable")
+
+
+class Resumidor:
+    """
+    Executa o map-reduce com até `max_concorrencia` chamadas simultâneas ao LLM.
+    Os trechos são antes agrupados em chunks de até `chunk_tokens` tokens, e os
+    resumos intermediários são agrupados até que o total caiba em `token_max`
+    tokens, ambos contados com `contar_tokens`. Chamadas recusadas por limite de
+    requisições são repetidas até `tentativas` vezes, com espera exponencial.
+    """
+
+    def __init__(
+        self,
+        chain: Callable[[str], Runnable] = _chain,
+        max_concorrencia: int = 8,
+        chunk_tokens: int = 3000,
+        token_max: int = 3000,
+        contar_tokens: ContadorTokens = contar_tokens_aproximado,
+        tentativas: int = 5,
+        backoff: float = 1.0,
+        backoff_max: float = 30.0,
+    ):
+        if tentativas < 1:
+            raise ValueError(f"tentativas deve ser positivo: {tentativas}")
+        self.chain = chain
+        self.max_concorrencia = max_concorrencia
+        self.chunk_tokens = chunk_tokens
+        self.token_max = token_max
+        self.contar_tokens = contar_tokens
+        self.tentativas = tentativas
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+    def _invocar(self, template: str, context: str) -> str:
+        chain = self.chain(template)
+        return _com_backoff(
+            lambda: chain.invoke({"context": context}),
+            self.tentativas,
+            self.backoff,
+            self.backoff_max,
+        )
+
+    def _invocar_todos(self, executor: ThreadPoolExecutor, template: str, contexts: list[str]) -> list[str]:
+        return list(executor.map(lambda context: self._invocar(template, context), contexts))
+
+    def _agrupar(self, resumos: list[str]) -> list[list[str]]:
+        """Agrupa resumos consecutivos em grupos de até `token_max` tokens"""
+        grupos: list[list[str]] = []
+        tokens_grupo = 0
+        for resumo in resumos:
+            tokens = self.contar_tokens(resumo)
+            if grupos and tokens_grupo + tokens <= self.token_max:
+                grupos[-1].append(resumo)
+                tokens_grupo += tokens
+            else:
+                grupos.append([resumo])
+                tokens_grupo = tokens
+        return grupos
+
+    def resumir(self, trechos: list[str]) -> str:
+        chunks, estatisticas = empacotar(trechos, self.chunk_tokens, self.contar_tokens)
+        logger.info("Chunks do resumo: %s", estatisticas)
+        if not chunks:
+            return ""
+
+        with ThreadPoolExecutor(max_workers=self.max_concorrencia) as executor:
+            resumos = self._invocar_todos(executor, PROMPT_MAP, chunks)
+
+            while sum(map(self.contar_tokens, resumos)) > self.token_max:
+                grupos = self._agrupar(resumos)
+                if len(grupos) == len(resumos):
+                    # Nenhum par de resumos cabe junto no orçamento; agrupar mais
+                    # não reduziria o total.
+                    break
+                resumos = self._invocar_todos(
+                    executor, PROMPT_COLLAPSE, [SEPARADOR.join(grupo) for grupo in grupos]
+                )
+
+        return self._invocar(PROMPT_REDUCE, SEPARADOR.join(resumos))
+
+
+@cache
+def get_resumidor() -> Resumidor:
+    settings = get_settings()
+    return Resumidor(
+        max_concorrencia=settings.resumo_max_concorrencia,
+        chunk_tokens=settings.resumo_chunk_tokens,
+        token_max=settings.resumo_token_max,
+        tentativas=settings.resumo_tentativas,
+    )
+
+
+def resumir(trechos: list[str]) -> str:
+    return get_resumidor().resumir(trechos)
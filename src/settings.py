@@ -0,0 +1,118 @@
+"""
+Configuração da API do agente, lida das variáveis de ambiente `SEI_IA_*`.
+Variáveis ausentes usam os valores do ambiente de homologação, exceto as
+credenciais e os identificadores da OCI, que não têm valor padrão e são
+conferidos por `Settings.validar` na inicialização.
+"""
+
+import os
+from dataclasses import dataclass, fields
+from functools import cache
+from typing import get_type_hints
+
+PREFIXO = "SEI_IA_"
+
+
+@dataclass(frozen=True)
+class Settings:
+    # SEI
+    sei_url: str = "https://homologacaoia.sei.sp.gov.br/sei/controlador_ws.php?servico=sei"
+    sei_sigla_sistema: str = "ORACLE"
+    sei_identificacao_servico: str = ""
+    """Chave do serviço cadastrado no SEI (obrigatória)."""
+    sei_id_usuario: str = "00029443830"
+    """Usuário em nome do qual o agente consulta o SEI."""
+    sei_id_unidade: str = "110047993"
+    """Unidade padrão das consultas do agente."""
+    unidades_indice: tuple[str, ...] = ()
+    """
+    Unidades cujos usuários e marcadores são indexados (separadas por vírgula);
+    vazio indexa apenas `sei_id_unidade`.
+    """
+
+    # OCI
+    oci_auth_type: str = "api_key"
+    oci_profile: str = ""
+    """Perfil do arquivo de configuração da OCI (obrigatório com `oci_auth_type` api_key ou security_token)."""
+    oci_region: str = "sa-saopaulo-1"
+    compartment_id: str = ""
+    """OCID do compartimento do agente e do LLM (obrigatório)."""
+    agent_endpoint_id: str = ""
+    """OCID do endpoint do agente (obrigatório)."""
+
+    # LLM usado nos resumos
+    llm_model_id: str = "meta.llama-3.3-70b-instruct"
+    llm_service_endpoint: str = (
+        "https://inference.generativeai.sa-saopaulo-1.oci.oraclecloud.com"
+    )
+    llm_temperature: float = 0.0
+    resumo_max_concorrencia: int = 8
+    """Chamadas simultâneas ao LLM na etapa de map de cada resumo."""
+    resumo_chunk_tokens: int = 3000
+    """Tamanho alvo, em tokens, dos chunks enviados na etapa de map."""
+    resumo_token_max: int = 3000
+    """Tokens dos resumos intermediários a partir dos quais eles são agrupados."""
+    resumo_tentativas: int = 5
+    """Tentativas de cada chamada recusada por limite de requisições (429)."""
+
+    # Conversão de documentos
+    conversao_workers: int = 2
+    conversao_max_fila: int = 8
+    conversao_timeout: float = 300.0
+
+    # Jobs em segundo plano (POST /jobs)
+    jobs_workers: int = 4
+    jobs_max_fila: int = 32
+    jobs_validade: float = 3600.0
+    """Segundos durante os quais um job concluído é reaproveitado por pedidos repetidos."""
+    jobs_lease: float = 60.0
+    """Segundos sem renovação depois dos quais o job de um worker parado é dado como interrompido."""
+
+    # Índice semântico (RAG)
+    rag_chunk_tokens: int = 500
+    """Tamanho alvo, em tokens, dos chunks indexados."""
+    rag_dimensao: int = 1024
+    """Dimensão dos vetores do `HashingEmbedder`."""
+    rag_modelo: str = ""
+    """Modelo do sentence-transformers; vazio usa o `HashingEmbedder`."""
+
+    # API
+    host: str = "0.0.0.0"
+    port: int = 8000
+    chat_max_concorrencia: int = 64
+    """Execuções simultâneas do agente por worker da API; as demais aguardam."""
+
+    @classmethod
+    def from_env(cls, environ: dict[str, str] | None = None) -> "Settings":
+        environ = os.environ if environ is None else environ
+        tipos = get_type_hints(cls)
+        valores = {}
+        for campo in fields(cls):
+            valor = environ.get(PREFIXO + campo.name.upper())
+            if valor is None:
+                continue
+            tipo = tipos[campo.name]
+            if tipo == tuple[str, ...]:
+                valores[campo.name] = tuple(v.strip() for v in valor.split(",") if v.strip())
+            else:
+                valores[campo.name] = tipo(valor)
+        return cls(**valores)
+
+    def faltando(self) -> list[str]:
+        """Variáveis de ambiente obrigatórias que não foram definidas"""
+        obrigatorios = ["sei_identificacao_servico", "compartment_id", "agent_endpoint_id"]
+        # Os demais tipos de autenticação (instance_principal, resource_principal)
+        # não usam o arquivo de configuração.
+        if self.oci_auth_type in ("api_key", "security_token"):
+            obrigatorios.append("oci_profile")
+        return [PREFIXO + nome.upper() for nome in obrigatorios if not getattr(self, nome)]
+
+    def validar(self) -> None:
+        faltando = self.faltando()
+        if faltando:
+            raise ValueError(f"Variáveis de ambiente obrigatórias não definidas: {', '.join(faltando)}")
+
+
+@cache
+def get_settings() -> Settings:
+    return Settings.from_env()
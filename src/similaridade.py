@@ -0,0 +1,354 @@
+"""
+Similaridade entre documentos e entre processos do SEI, sem chamadas ao LLM.
+
+Documentos são comparados por MinHash dos shingles (sequências de palavras) do
+texto convertido; a similaridade estimada é a de Jaccard entre os conjuntos de
+shingles. As assinaturas ficam em um banco SQLite e são indexadas por LSH, de
+modo que encontrar os documentos parecidos com um documento não exige
+comparar com todos os armazenados.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from python_sei.index import normalizar
+from python_sei.models import RetornoConsultaProcedimento
+from python_sei.wsdl import DEFAULT_CACHE_DIR
+
+DEFAULT_TAMANHO_SHINGLE = 5
+DEFAULT_PERMUTACOES = 128
+DEFAULT_BANDAS = 32
+"""Com 128 permutações, 32 bandas de 4 linhas: pares com Jaccard acima de ~0,4
+tendem a cair em um mesmo bucket."""
+
+_PRIMO = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_BLOCO = 4096
+
+
+def shingles(texto: str, tamanho: int = DEFAULT_TAMANHO_SHINGLE) -> np.ndarray:
+    """
+    Hashes de 32 bits das sequências de `tamanho` palavras do texto, sem acentos
+    nem diferença entre maiúsculas e minúsculas
+    """
+    palavras = re.findall(r"\w+", normalizar(texto))
+    if len(palavras) < tamanho:
+        sequencias = [" ".join(palavras)] if palavras else []
+    else:
+        sequencias = [
+            " ".join(palavras[i : i + tamanho]) for i in range(len(palavras) - tamanho + 1)
+        ]
+    return np.unique(
+        np.fromiter(
+            (zlib.crc32(s.encode()) for s in sequencias), dtype=np.uint64, count=len(sequencias)
+        )
+    )
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    """Similaridade de Jaccard exata entre dois conjuntos de shingles"""
+    if len(a) == 0 and len(b) == 0:
+        return 0.0
+    intersecao = len(np.intersect1d(a, b, assume_unique=True))
+    return intersecao / (len(a) + len(b) - intersecao)
+
+
+class MinHash:
+    """Assinaturas MinHash com `permutacoes` funções de hash fixas"""
+
+    def __init__(self, permutacoes: int = DEFAULT_PERMUTACOES, semente: int = 1):
+        gerador = np.random.default_rng(semente)
+        # Coeficientes menores que 2**29 mantêm a * x + b abaixo de 2**62.
+        self.a = gerador.integers(1, 1 << 29, size=permutacoes, dtype=np.uint64)
+        self.b = gerador.integers(0, 1 << 29, size=permutacoes, dtype=np.uint64)
+        self.permutacoes = permutacoes
+
+    def assinatura(self, hashes: np.ndarray) -> np.ndarray:
+        assinatura = np.full(self.permutacoes, _MAX_HASH, dtype=np.uint64)
+        for inicio in range(0, len(hashes), _BLOCO):
+            bloco = hashes[inicio : inicio + _BLOCO, None]
+            valores = (bloco * self.a + self.b) % _PRIMO & _MAX_HASH
+            np.minimum(assinatura, valores.min(axis=0), out=assinatura)
+        return assinatura
+
+    @staticmethod
+    def vazia(assinatura: np.ndarray) -> bool:
+        """Se a assinatura é de um conjunto sem shingles (texto vazio)"""
+        return bool(np.all(assinatura == _MAX_HASH))
+
+    @staticmethod
+    def similaridade(a: np.ndarray, b: np.ndarray) -> float:
+        """
+        Estimativa da similaridade de Jaccard a partir das assinaturas; 0 se
+        algum dos conjuntos é vazio, como em `jaccard`
+        """
+        if MinHash.vazia(a) or MinHash.vazia(b):
+            return 0.0
+        return float(np.mean(a == b))
+
+
+@dataclass
+class Semelhante:
+    id_documento: str
+    rotulo: str
+    similaridade: float
+
+
+class IndiceSimilaridade:
+    """
+    Assinaturas MinHash dos documentos, persistidas em SQLite, com buckets LSH
+    em memória. `versao` identifica o conteúdo assinado (por exemplo, o hash da
+    conversão), para que documentos inalterados não sejam assinados de novo.
+
+    Vários processos (os workers da API) podem compartilhar o mesmo banco: cada
+    gravação incrementa a geração do índice, e o processo que encontra no banco
+    uma geração diferente da sua recarrega as assinaturas antes de consultar.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike | None = None,
+        minhash: MinHash | None = None,
+        bandas: int = DEFAULT_BANDAS,
+        tamanho_shingle: int = DEFAULT_TAMANHO_SHINGLE,
+    ):
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_DIR / "similaridade.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.minhash = minhash if minhash is not None else MinHash()
+        if self.minhash.permutacoes % bandas:
+            raise ValueError("O número de permutações deve ser múltiplo do número de bandas")
+        self.bandas = bandas
+        self.tamanho_shingle = tamanho_shingle
+
+        self._lock = threading.Lock()
+        self._geracao: int | None = None
+        self._assinaturas: dict[str, np.ndarray] = {}
+        self._versoes: dict[str, str] = {}
+        self._rotulos: dict[str, str] = {}
+        self._buckets: dict[tuple[int, bytes], set[str]] = {}
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS estado (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    geracao INTEGER NOT NULL
+                )
+                """
+            )
+            self._conn.execute("INSERT OR IGNORE INTO estado VALUES (0, 0)")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS assinaturas (
+                    id_documento TEXT PRIMARY KEY,
+                    versao TEXT NOT NULL,
+                    rotulo TEXT NOT NULL,
+                    assinatura BLOB NOT NULL
+                )
+                """
+            )
+
+    def _atualizar(self) -> None:
+        """Recarrega as assinaturas, se o índice foi alterado por outro processo. Chamado com `_lock`."""
+        # Uma única transação de leitura, para que as assinaturas correspondam à geração lida.
+        self._conn.execute("BEGIN")
+        try:
+            geracao = self._conn.execute("SELECT geracao FROM estado").fetchone()[0]
+            if geracao == self._geracao:
+                return
+            linhas = self._conn.execute(
+                "SELECT id_documento, versao, rotulo, assinatura FROM assinaturas"
+            ).fetchall()
+        finally:
+            self._conn.commit()
+
+        self._assinaturas = {}
+        self._versoes = {}
+        self._rotulos = {}
+        self._buckets = {}
+        for id_documento, versao, rotulo, assinatura in linhas:
+            assinatura = np.frombuffer(assinatura, dtype=np.uint64)
+            if len(assinatura) == self.minhash.permutacoes:
+                self._indexar(id_documento, versao, rotulo, assinatura)
+        self._geracao = geracao
+
+    def _bandas(self, assinatura: np.ndarray) -> list[tuple[int, bytes]]:
+        return [
+            (banda, linhas.tobytes())
+            for banda, linhas in enumerate(np.split(assinatura, self.bandas))
+        ]
+
+    def _indexar(
+        self, id_documento: str, versao: str, rotulo: str, assinatura: np.ndarray
+    ) -> None:
+        self._remover_buckets(id_documento)
+        self._assinaturas[id_documento] = assinatura
+        self._versoes[id_documento] = versao
+        self._rotulos[id_documento] = rotulo
+        if MinHash.vazia(assinatura):
+            # Todos os textos vazios teriam a mesma assinatura e cairiam nos mesmos buckets.
+            return
+        for chave in self._bandas(assinatura):
+            self._buckets.setdefault(chave, set()).add(id_documento)
+
+    def _remover_buckets(self, id_documento: str) -> None:
+        anterior = self._assinaturas.get(id_documento)
+        if anterior is None or MinHash.vazia(anterior):
+            return
+        for chave in self._bandas(anterior):
+            bucket = self._buckets.get(chave)
+            if bucket is not None:
+                bucket.discard(id_documento)
+                if not bucket:
+                    del self._buckets[chave]
+
+    def versao(self, id_documento: str) -> str | None:
+        with self._lock:
+            self._atualizar()
+            return self._versoes.get(id_documento)
+
+    def assinar(self, texto: str) -> np.ndarray:
+        return self.minhash.assinatura(shingles(texto, self.tamanho_shingle))
+
+    def adicionar(
+        self, id_documento: str, versao: str, texto: str, rotulo: str = ""
+    ) -> np.ndarray:
+        """
+        Assina e indexa o documento, se a versão ainda não estiver indexada.
+        `rotulo` identifica o documento nos resultados, por exemplo o protocolo.
+        """
+        with self._lock:
+            self._atualizar()
+            if self._versoes.get(id_documento) == versao:
+                return self._assinaturas[id_documento]
+
+        assinatura = self.assinar(texto)
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO assinaturas VALUES (?, ?, ?, ?)",
+                    (id_documento, versao, rotulo, assinatura.tobytes()),
+                )
+                geracao = self._conn.execute(
+                    "UPDATE estado SET geracao = geracao + 1 RETURNING geracao"
+                ).fetchone()[0]
+
+            if self._geracao is None or geracao != self._geracao + 1:
+                # Outro processo também alterou o índice: recarrega na próxima leitura.
+                self._geracao = None
+            else:
+                self._indexar(id_documento, versao, rotulo, assinatura)
+                self._geracao = geracao
+        return assinatura
+
+    def similaridade(self, id_a: str, id_b: str) -> float:
+        with self._lock:
+            self._atualizar()
+            return MinHash.similaridade(self._assinaturas[id_a], self._assinaturas[id_b])
+
+    def semelhantes(
+        self, id_documento: str, limite: int = 10, minimo: float = 0.0
+    ) -> list[Semelhante]:
+        """
+        Documentos que compartilham ao menos um bucket LSH com `id_documento`,
+        ordenados pela similaridade estimada
+        """
+        with self._lock:
+            self._atualizar()
+            assinatura = self._assinaturas[id_documento]
+            candidatos = set()
+            for chave in self._bandas(assinatura):
+                candidatos |= self._buckets.get(chave, set())
+            candidatos.discard(id_documento)
+            resultados = [
+                Semelhante(
+                    candidato,
+                    self._rotulos[candidato],
+                    MinHash.similaridade(assinatura, self._assinaturas[candidato]),
+                )
+                for candidato in candidatos
+            ]
+
+        resultados = [r for r in resultados if r.similaridade >= minimo]
+        resultados.sort(key=lambda r: r.similaridade, reverse=True)
+        return resultados[:limite]
+
+
+@dataclass
+class SecaoComum:
+    similaridade: float
+    trecho_a: str
+    trecho_b: str
+
+
+def secoes_em_comum(
+    trechos_a: list[str],
+    trechos_b: list[str],
+    minimo: float = 0.3,
+    limite: int = 5,
+    tamanho_shingle: int = DEFAULT_TAMANHO_SHINGLE,
+) -> list[SecaoComum]:
+    """
+    Pares de trechos (por exemplo, os chunks do Docling) dos dois documentos
+    com similaridade de Jaccard de pelo menos `minimo`, dos mais parecidos para
+    os menos parecidos
+    """
+    shingles_b = [shingles(trecho, tamanho_shingle) for trecho in trechos_b]
+    pares = []
+    for trecho_a in trechos_a:
+        atual = shingles(trecho_a, tamanho_shingle)
+        if len(atual) == 0:
+            continue
+        for trecho_b, outro in zip(trechos_b, shingles_b):
+            similaridade = jaccard(atual, outro)
+            if similaridade >= minimo:
+                pares.append(SecaoComum(similaridade, trecho_a, trecho_b))
+
+    pares.sort(key=lambda par: par.similaridade, reverse=True)
+    return pares[:limite]
+
+
+def _conjunto_jaccard(a: set[str], b: set[str]) -> float | None:
+    if not a and not b:
+        return None
+    return len(a & b) / len(a | b)
+
+
+def similaridade_processos(
+    a: RetornoConsultaProcedimento, b: RetornoConsultaProcedimento
+) -> dict[str, float | None]:
+    """
+    Similaridade dos metadados de dois processos, consultados com assuntos e
+    interessados: Jaccard por campo e a média dos campos preenchidos em `geral`
+    """
+    campos = {
+        "tipo_procedimento": _conjunto_jaccard(
+            {a.tipo_procedimento.id_tipo_procedimento} if a.tipo_procedimento else set(),
+            {b.tipo_procedimento.id_tipo_procedimento} if b.tipo_procedimento else set(),
+        ),
+        "assuntos": _conjunto_jaccard(
+            {x.codigo_estruturado or normalizar(x.descricao) for x in a.assuntos or []},
+            {x.codigo_estruturado or normalizar(x.descricao) for x in b.assuntos or []},
+        ),
+        "interessados": _conjunto_jaccard(
+            {normalizar(x.sigla or x.nome) for x in a.interessados or []},
+            {normalizar(x.sigla or x.nome) for x in b.interessados or []},
+        ),
+        "especificacao": jaccard(
+            shingles(a.especificacao or "", 2), shingles(b.especificacao or "", 2)
+        )
+        if a.especificacao or b.especificacao
+        else None,
+    }
+    preenchidos = [valor for valor in campos.values() if valor is not None]
+    campos["geral"] = sum(preenchidos) / len(preenchidos) if preenchidos else None
+    return campos
@@ -0,0 +1,21 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(RAIZ / "src"), str(RAIZ)]
+
+# Os caches em disco padrão (WSDL, respostas, conversões) ficam fora do
+# diretório do usuário durante os testes.
+os.environ.setdefault("PYTHON_SEI_CACHE_DIR", tempfile.mkdtemp(prefix="python_sei-testes-"))
+
+from tests.fake_sei import FakeSei  # noqa: E402
+
+
+@pytest.fixture
+def sei():
+    with FakeSei() as sei:
+        yield sei
@@ -0,0 +1,202 @@
+"""
+Servidor SOAP falso do SEI, usado pelos testes e pelos benchmarks.
+
+Serve o WSDL de `data/sei.wsdl` e responde cada operação com o envelope RPC/encoded
+de `data/respostas/<operacao>.xml`, no mesmo formato produzido pelo SoapServer do
+PHP usado pelo SEI. As respostas podem ser trocadas em `FakeSei.respostas`.
+"""
+
+import http.server
+import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+DATA = Path(__file__).with_name("data")
+
+_OPERACAO = re.compile(rb"<(?:[\w-]+:)?((?:listar|consultar|definir)\w+)[\s>]")
+
+ENVELOPE_INICIO = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<SOAP-ENV:Envelope xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"'
+    ' xmlns:ns1="Sei" xmlns:xsd="http://www.w3.org/2001/XMLSchema"'
+    ' xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"'
+    ' xmlns:SOAP-ENC="http://schemas.xmlsoap.org/soap/encoding/"'
+    ' SOAP-ENV:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/"><SOAP-ENV:Body>'
+)
+ENVELOPE_FIM = "</SOAP-ENV:Body></SOAP-ENV:Envelope>"
+
+FAULT = (
+    ENVELOPE_INICIO
+    + "<SOAP-ENV:Fault><faultcode>SOAP-ENV:Server</faultcode>"
+    + "<faultstring>Unidade invalida</faultstring></SOAP-ENV:Fault>"
+    + ENVELOPE_FIM
+).encode()
+
+
+def _unidade(id_unidade: str, sigla: str) -> str:
+    return (
+        '<Unidade xsi:type="ns1:Unidade">'
+        f'<IdUnidade xsi:type="xsd:string">{id_unidade}</IdUnidade>'
+        f'<Sigla xsi:type="xsd:string">{sigla}</Sigla>'
+        f'<Descricao xsi:type="xsd:string">Unidade {sigla}</Descricao>'
+        '<SinProtocolo xsi:type="xsd:string">N</SinProtocolo>'
+        '<SinArquivamento xsi:type="xsd:string">N</SinArquivamento>'
+        '<SinOuvidoria xsi:type="xsd:string">N</SinOuvidoria>'
+        "</Unidade>"
+    )
+
+
+def andamento(i: int, data_hora: str | None = None) -> str:
+    """Item de `listarAndamentos`, com unidade, usuário e um atributo"""
+    data_hora = data_hora or f"{i % 28 + 1:02d}/{i % 12 + 1:02d}/2024 10:{i % 60:02d}:00"
+    return (
+        '<item xsi:type="ns1:Andamento">'
+        f'<IdAndamento xsi:type="xsd:string">{i}</IdAndamento>'
+        f'<IdTarefa xsi:type="xsd:string">{i % 5}</IdTarefa>'
+        '<IdTarefaModulo xsi:nil="true"/>'
+        f'<Descricao xsi:type="xsd:string">Andamento {i}</Descricao>'
+        f'<DataHora xsi:type="xsd:string">{data_hora}</DataHora>'
+        + _unidade("110047993", "SGA-DTI")
+        + '<Usuario xsi:type="ns1:Usuario"><IdUsuario xsi:type="xsd:string">7</IdUsuario>'
+        '<Sigla xsi:type="xsd:string">fulano</Sigla><Nome xsi:type="xsd:string">Fulano</Nome></Usuario>'
+        '<Atributos SOAP-ENC:arrayType="ns1:AtributoAndamento[1]" xsi:type="SOAP-ENC:Array">'
+        '<item xsi:type="ns1:AtributoAndamento"><Nome xsi:type="xsd:string">DOCUMENTO</Nome>'
+        f'<Valor xsi:type="xsd:string">{i:07d}</Valor><IdOrigem xsi:type="xsd:string">{i}</IdOrigem></item>'
+        "</Atributos></item>"
+    )
+
+
+def resposta_andamentos(n: int, datas: dict[int, str] | None = None) -> bytes:
+    """Resposta de `listarAndamentos` com `n` andamentos; `datas` troca o `DataHora` de alguns itens"""
+    datas = datas or {}
+    itens = "".join(andamento(i, datas.get(i)) for i in range(n))
+    return (
+        ENVELOPE_INICIO
+        + "<ns1:listarAndamentosResponse>"
+        + f'<parametros SOAP-ENC:arrayType="ns1:Andamento[{n}]" xsi:type="SOAP-ENC:Array">'
+        + itens
+        + "</parametros></ns1:listarAndamentosResponse>"
+        + ENVELOPE_FIM
+    ).encode()
+
+
+class FakeSei:
+    """
+    Servidor HTTP em uma porta livre de localhost. `latencia` é o tempo, em
+    segundos, de cada resposta às operações SOAP. Requisições cujo corpo contém
+    `FAULT` recebem um SOAP Fault. `falhas[operacao]` é uma lista de status HTTP
+    devolvidos, um por vez, antes da resposta normal; o status 0 fecha a conexão
+    sem resposta.
+
+        with FakeSei() as sei:
+            client = Client(sei.url, "SEI", "chave", wsdl_cache=False)
+    """
+
+    def __init__(self, latencia: float = 0.0):
+        self.latencia = latencia
+        self.respostas: dict[str, bytes] = {
+            path.stem: path.read_bytes() for path in (DATA / "respostas").glob("*.xml")
+        }
+        self.chamadas: Counter[str] = Counter()
+        self.corpos: dict[str, bytes] = {}
+        """Corpo da última requisição de cada operação."""
+        self.falhas: dict[str, list[int]] = {}
+        self.downloads: Counter[str] = Counter()
+        """Requisições GET (WSDL e schemas) por caminho."""
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self._server.server_port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Endereço do WSDL"""
+        return f"{self.base}/wsdl"
+
+    @property
+    def endereco(self) -> str:
+        """Endereço do serviço SOAP"""
+        return f"{self.base}/ws"
+
+    def wsdl(self) -> bytes:
+        return (DATA / "sei.wsdl").read_text().replace("__BASE__", self.base).encode()
+
+    def salvar_wsdl(self, diretorio: Path) -> Path:
+        """
+        Grava o WSDL e o `soapenc.xsd` em `diretorio`, como
+        `python_sei.wsdl.salvar_wsdl`, para uso com `Client(..., wsdl=...)`
+        """
+        diretorio = Path(diretorio)
+        (diretorio / "soapenc.xsd").write_bytes((DATA / "soapenc.xsd").read_bytes())
+        path = diretorio / "sei.wsdl"
+        path.write_bytes(self.wsdl().replace(f"{self.base}/soapenc.xsd".encode(), b"soapenc.xsd"))
+        return path
+
+    def _handler(self):
+        sei = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _responder(self, status: int, body: bytes, content_type: str = "text/xml; charset=utf-8"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with sei._lock:
+                    sei.downloads[self.path] += 1
+                if self.path.endswith("soapenc.xsd"):
+                    self._responder(200, (DATA / "soapenc.xsd").read_bytes())
+                    return
+                self._responder(200, sei.wsdl())
+
+            def do_POST(self):
+                corpo = self.rfile.read(int(self.headers["Content-Length"]))
+                if sei.latencia:
+                    time.sleep(sei.latencia)
+
+                match = _OPERACAO.search(corpo)
+                operacao = match.group(1).decode() if match else ""
+                with sei._lock:
+                    sei.chamadas[operacao] += 1
+                    sei.corpos[operacao] = corpo
+                    falhas = sei.falhas.get(operacao)
+                    falha = falhas.pop(0) if falhas else None
+
+                if falha == 0:
+                    self.close_connection = True
+                    return
+                if falha is not None:
+                    self._responder(falha, b"", "text/plain")
+                    return
+                if b"FAULT" in corpo:
+                    self._responder(500, FAULT)
+                elif operacao in sei.respostas:
+                    self._responder(200, sei.respostas[operacao])
+                else:
+                    self._responder(404, b"", "text/plain")
+
+        return Handler
+
+    def start(self) -> "FakeSei":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeSei":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("oci.addons.adk")
+
+import agent  # noqa: E402
+from conversao import ConversaoCache, PoolConversao  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from jobs import JobManager  # noqa: E402
+from settings import get_settings  # noqa: E402
+
+
+class AgenteFalso:
+    """Como o ADK, entrega ao LLM o erro da ferramenta em vez de propagá-lo"""
+
+    def run(self, input, session_id):
+        try:
+            resultado = agent.convert_documento("110047993", "0000001")
+        except Exception as e:
+            resultado = f"Erro na ferramenta: {e}"
+        return types.SimpleNamespace(final_output=str(resultado)[:50], session_id=session_id)
+
+
+@pytest.fixture
+def api(sei, tmp_path, monkeypatch):
+    monkeypatch.setenv("SEI_IA_SEI_URL", sei.url)
+    get_settings.cache_clear()
+    sei.respostas["consultarDocumento"] = sei.respostas["consultarDocumento"].replace(
+        b"https://sei.exemplo.gov.br/sei/controlador.php?acao=documento_conteudo&amp;id_documento=900001",
+        f"{sei.base}/documento".encode(),
+    )
+
+    pool = PoolConversao(max_workers=1, max_fila=1)
+    monkeypatch.setattr(agent, "agent", AgenteFalso(), raising=False)
+    monkeypatch.setattr(agent, "indice", types.SimpleNamespace(resolver_unidade=lambda id: id), raising=False)
+    monkeypatch.setattr(agent, "conversoes", ConversaoCache(tmp_path, conversor=pool.converter), raising=False)
+    with TestClient(agent.app) as client:
+        yield client, pool
+    get_settings.cache_clear()
+
+
+def test_chat_com_conversao_ocupada_retorna_503(api):
+    client, pool = api
+    # Ocupa a única vaga da fila de conversão.
+    assert pool._vagas.acquire(blocking=False)
+
+    response = client.post("/chat", json={"message": "converta o documento", "session_id": "s"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+    assert "Fila de conversão cheia" in response.json()["detail"]
+
+    with client.stream("POST", "/chat/stream", json={"message": "converta", "session_id": "s"}) as response:
+        eventos = "".join(response.iter_text())
+    assert "event: erro" in eventos
+    assert '"status": 503' in eventos
+
+
+def test_jobs_resolvem_a_sigla_da_unidade(api, tmp_path, monkeypatch):
+    client, _ = api
+    siglas = {"SGA": "110047993"}
+    monkeypatch.setattr(agent, "indice", types.SimpleNamespace(resolver_unidade=lambda id: siglas.get(id, id)))
+    monkeypatch.setattr(agent, "jobs", JobManager({"resumo": lambda id_unidade, protocolo: "ok"}, path=tmp_path / "jobs.sqlite3"), raising=False)
+
+    por_sigla = client.post("/jobs", json={"tipo": "resumo", "id_unidade": "SGA", "protocolo": "0000001"}).json()
+    por_id = client.post("/jobs", json={"tipo": "resumo", "id_unidade": "110047993", "protocolo": "0000001"}).json()
+    assert por_sigla["id_unidade"] == "110047993"
+    assert por_id["id"] == por_sigla["id"]
+    agent.jobs.shutdown()
+
+
+def test_chat_stream_cancela_a_execucao_quando_o_cliente_desconecta(monkeypatch):
+    liberar = threading.Event()
+    erros = []
+
+    class AgenteLento:
+        def run(self, input, session_id):
+            liberar.wait(10)
+            try:
+                agent.get_usuario("110047993", "100000001")
+            except Exception as e:
+                erros.append(e)
+            return types.SimpleNamespace(final_output="ok", session_id=session_id)
+
+    async def desconectado():
+        return True
+
+    async def executar():
+        monkeypatch.setattr(agent, "agent", AgenteLento(), raising=False)
+        monkeypatch.setattr(agent, "loop_api", asyncio.get_running_loop(), raising=False)
+        monkeypatch.setattr(agent, "chat_executor", ThreadPoolExecutor(max_workers=1), raising=False)
+        monkeypatch.setattr(agent, "chat_semaforo", asyncio.Semaphore(1), raising=False)
+        monkeypatch.setattr(agent, "SSE_VERIFICAR_DESCONEXAO", 0.05)
+
+        request = types.SimpleNamespace(is_disconnected=desconectado)
+        eventos = [e async for e in agent._eventos_chat(agent.Message(message="m", session_id="s"), request)]
+        # Deixa o cancelamento chegar à execução antes de liberar o agente.
+        await asyncio.sleep(0.05)
+        liberar.set()
+        agent.chat_executor.shutdown(wait=True)
+        return eventos
+
+    eventos = asyncio.run(executar())
+    assert len(eventos) == 1 and eventos[0].startswith("event: inicio")
+    assert len(erros) == 1 and isinstance(erros[0], agent.ExecucaoCancelada)
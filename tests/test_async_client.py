@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+import zeep.exceptions
+
+from python_sei import AsyncClient, Client
+from python_sei.client import BaseClient
+
+PROTOCOLO = "00001.000001/2024-01"
+
+
+async def _coletar(iterador) -> list:
+    return [item async for item in iterador]
+
+
+def _clientes(sei, tmp_path, origem: str, **kwargs) -> tuple[Client, AsyncClient]:
+    if origem == "url":
+        args = (sei.url, "SEI", "chave")
+    else:
+        args = (sei.endereco, "SEI", "chave")
+        kwargs["wsdl"] = sei.salvar_wsdl(tmp_path)
+    return Client(*args, wsdl_cache=False, **kwargs), AsyncClient(*args, wsdl_cache=False, **kwargs)
+
+
+def test_base_client_abstrato():
+    with pytest.raises(TypeError):
+        BaseClient("http://sei/wsdl", "SEI", "chave")
+
+
+@pytest.mark.parametrize("fast_decode", [False, True])
+@pytest.mark.parametrize("origem", ["url", "arquivo"])
+def test_mesmos_resultados(sei, tmp_path, origem, fast_decode):
+    client, async_client = _clientes(sei, tmp_path, origem, fast_decode=fast_decode)
+    chamadas = {
+        "listar_unidades": (),
+        "listar_usuarios": ("110047993",),
+        "listar_andamentos": ("110047993", PROTOCOLO, True),
+        "consultar_procedimento": ("110047993", PROTOCOLO),
+        "consultar_documento": ("110047993", "0000001"),
+    }
+
+    async def assincronos():
+        async with async_client:
+            return {
+                nome: await getattr(async_client, nome)(*args) for nome, args in chamadas.items()
+            } | {"iterar_andamentos": await _coletar(async_client.iterar_andamentos("110047993", PROTOCOLO))}
+
+    sincronos = {nome: getattr(client, nome)(*args) for nome, args in chamadas.items()}
+    sincronos["iterar_andamentos"] = list(client.iterar_andamentos("110047993", PROTOCOLO))
+
+    assert asyncio.run(assincronos()) == sincronos
+
+
+def test_mesmo_erro(sei):
+    client = Client(sei.url, "SEI", "FAULT", wsdl_cache=False)
+    async_client = AsyncClient(sei.url, "SEI", "FAULT", wsdl_cache=False)
+
+    with pytest.raises(zeep.exceptions.Fault, match="Unidade invalida"):
+        client.listar_unidades()
+
+    async def assincrono():
+        async with async_client:
+            await async_client.listar_unidades()
+
+    with pytest.raises(zeep.exceptions.Fault, match="Unidade invalida"):
+        asyncio.run(assincrono())
+
+
+def test_aclose_fecha_os_clientes_http(sei):
+    async_client = AsyncClient(sei.url, "SEI", "chave", wsdl_cache=False)
+    transport = async_client.client.transport
+    asyncio.run(async_client.aclose())
+    assert transport.client.is_closed
+    assert transport.wsdl_client.is_closed
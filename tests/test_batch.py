@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from python_sei import AsyncClient, Client
+from python_sei.batch import executar_lote, executar_lote_async
+
+PROCESSOS = ["00001.000001/2024-01", "00001.000002/2024-02", "00001.000001/2024-01", "00001.000003/2024-03"]
+
+
+def _protocolos(resultados) -> list[str]:
+    return [r.protocolo for r in resultados]
+
+
+def test_consultar_procedimentos_em_lote(sei):
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=False, coalesce=False)
+    resultados = client.consultar_procedimentos_em_lote("110047993", [*PROCESSOS, "FAULT"], max_concorrencia=3)
+
+    assert _protocolos(resultados) == [*PROCESSOS, "FAULT"]
+    # O protocolo repetido é consultado uma única vez.
+    assert sei.chamadas["consultarProcedimento"] == 4
+    assert resultados[0] is resultados[2]
+    assert all(r.ok and r.resultado.procedimento_formatado for r in resultados[:4])
+    assert not resultados[4].ok and "Unidade invalida" in str(resultados[4].erro)
+
+
+def test_consultar_documentos_em_lote_async(sei):
+    documentos = ["0000001", "FAULT", "0000002", "0000001"]
+
+    async def consultar():
+        async with AsyncClient(sei.url, "SEI", "chave", wsdl_cache=False, coalesce=False) as client:
+            return await client.consultar_documentos_em_lote("110047993", documentos, max_concorrencia=2)
+
+    resultados = asyncio.run(consultar())
+    assert _protocolos(resultados) == documentos
+    assert sei.chamadas["consultarDocumento"] == 3
+    assert [r.ok for r in resultados] == [True, False, True, True]
+    assert resultados[0].resultado.documento_formatado
+
+
+def test_consultar_documentos_em_lote(sei):
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=False, coalesce=False)
+    resultados = client.consultar_documentos_em_lote("110047993", ["0000002", "0000001", "0000002"])
+    assert _protocolos(resultados) == ["0000002", "0000001", "0000002"]
+    assert sei.chamadas["consultarDocumento"] == 2
+
+
+@pytest.mark.parametrize("max_concorrencia", [0, -1])
+def test_concorrencia_invalida(max_concorrencia):
+    with pytest.raises(ValueError):
+        executar_lote(["1"], str, max_concorrencia)
+    with pytest.raises(ValueError):
+        asyncio.run(executar_lote_async(["1"], asyncio.sleep, max_concorrencia))
+    # Mesmo sem protocolos.
+    with pytest.raises(ValueError):
+        executar_lote([], str, max_concorrencia)
@@ -0,0 +1,156 @@
+import re
+import threading
+
+import pytest
+import zeep
+
+from python_sei import Client, MemoryBackend, ResponseCache, SqliteBackend
+from python_sei.models import DefinicaoControlePrazo
+
+from tests.fake_sei import FAULT, FakeSei
+
+PROTOCOLO = "00001.000001/2024-01"
+OUTRO_PROTOCOLO = "00001.000002/2024-02"
+
+
+def test_mesma_chamada_usa_o_cache(sei):
+    cache = ResponseCache(MemoryBackend())
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=False, cache=cache)
+
+    assert client.listar_unidades() == client.listar_unidades()
+    assert sei.chamadas["listarUnidades"] == 1
+    assert cache.stats.hits == 1
+
+
+def test_credenciais_diferentes_nao_compartilham_respostas(sei):
+    cache = ResponseCache(MemoryBackend())
+    Client(sei.url, "SEI", "chave-a", wsdl_cache=False, cache=cache).listar_unidades()
+    Client(sei.url, "SEI", "chave-b", wsdl_cache=False, cache=cache).listar_unidades()
+    assert sei.chamadas["listarUnidades"] == 2
+
+
+def test_ambientes_diferentes_nao_compartilham_respostas(tmp_path):
+    cache = ResponseCache(SqliteBackend(tmp_path / "respostas.sqlite3"))
+    with FakeSei() as homologacao, FakeSei() as producao:
+        for sei in (homologacao, producao, homologacao):
+            Client(sei.url, "SEI", "chave", wsdl_cache=False, cache=cache).listar_unidades()
+
+        assert homologacao.chamadas["listarUnidades"] == 1
+        assert producao.chamadas["listarUnidades"] == 1
+
+
+def test_identificacao_nao_e_gravada(tmp_path):
+    path = tmp_path / "respostas.sqlite3"
+    cache = ResponseCache(SqliteBackend(path))
+    cache.set("listarUnidades", {"IdentificacaoServico": "segredo"}, [], "http://sei/ws")
+
+    assert cache.get("listarUnidades", {"IdentificacaoServico": "segredo"}, "http://sei/ws") == (True, [])
+    # Inclui o arquivo -wal do SQLite.
+    assert all(b"segredo" not in arquivo.read_bytes() for arquivo in tmp_path.iterdir())
+
+
+def test_contadores_sob_concorrencia():
+    cache = ResponseCache(MemoryBackend())
+    cache.set("listarUnidades", {}, [])
+
+    def consultar():
+        for _ in range(2000):
+            cache.get("listarUnidades", {})
+            cache.get("listarSeries", {})
+
+    threads = [threading.Thread(target=consultar) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (cache.stats.hits, cache.stats.misses) == (16000, 16000)
+
+
+def test_escrita_invalida_as_consultas_do_processo(sei):
+    cache = ResponseCache(MemoryBackend())
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=False, cache=cache)
+    for protocolo in (PROTOCOLO, OUTRO_PROTOCOLO):
+        client.consultar_procedimento("110047993", protocolo)
+        client.listar_andamentos("110047993", protocolo)
+
+    client.definir_controle_prazo(
+        "110047993",
+        [DefinicaoControlePrazo(PROTOCOLO, data_prazo="31/12/2024", dias="", dias_uteis=False)],
+    )
+    assert sei.chamadas["definirControlePrazo"] == 1
+    assert cache.stats.invalidations == 2
+
+    for protocolo in (PROTOCOLO, OUTRO_PROTOCOLO):
+        client.consultar_procedimento("110047993", protocolo)
+        client.listar_andamentos("110047993", protocolo)
+    # Apenas as consultas do processo alterado são refeitas.
+    assert sei.chamadas["consultarProcedimento"] == 3
+    assert sei.chamadas["listarAndamentos"] == 3
+
+
+def test_escrita_com_falha_nao_invalida(sei):
+    cache = ResponseCache(MemoryBackend())
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=False, cache=cache)
+    client.consultar_procedimento("110047993", PROTOCOLO)
+
+    sei.respostas["definirControlePrazo"] = FAULT
+    with pytest.raises(zeep.exceptions.Fault):
+        client.definir_controle_prazo(
+            "110047993", [DefinicaoControlePrazo(PROTOCOLO, "31/12/2024", "", False)]
+        )
+    client.consultar_procedimento("110047993", PROTOCOLO)
+    assert sei.chamadas["consultarProcedimento"] == 1
+
+
+def _flags(corpo: bytes) -> dict[str, str]:
+    return {
+        nome.decode(): valor.decode()
+        for nome, valor in re.findall(rb"<(SinRetornar\w+)[^>]*>([SN])<", corpo)
+    }
+
+
+def test_subconjunto_das_flags_usa_a_entrada_existente(sei):
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=False, cache=ResponseCache(MemoryBackend()))
+    completo = client.consultar_procedimento(
+        "110047993", PROTOCOLO, retornar_assuntos=True, retornar_interessados=True
+    )
+    assert completo.assuntos and completo.interessados
+
+    parcial = client.consultar_procedimento("110047993", PROTOCOLO, retornar_assuntos=True)
+    assert sei.chamadas["consultarProcedimento"] == 1
+    assert parcial.assuntos == completo.assuntos
+    assert parcial.interessados == []
+
+    nenhum = client.consultar_procedimento("110047993", PROTOCOLO)
+    assert (nenhum.assuntos, nenhum.interessados) == ([], [])
+    assert nenhum.procedimento_formatado == completo.procedimento_formatado
+
+    # As cópias projetadas não alteram o modelo armazenado.
+    novamente = client.consultar_procedimento(
+        "110047993", PROTOCOLO, retornar_assuntos=True, retornar_interessados=True
+    )
+    assert novamente is completo
+    assert novamente.interessados
+    assert sei.chamadas["consultarProcedimento"] == 1
+
+
+def test_flag_nova_busca_a_uniao_e_substitui_a_entrada(sei):
+    cache = ResponseCache(MemoryBackend())
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=False, cache=cache)
+    client.consultar_procedimento("110047993", PROTOCOLO, retornar_assuntos=True)
+
+    resultado = client.consultar_procedimento("110047993", PROTOCOLO, retornar_interessados=True)
+    assert sei.chamadas["consultarProcedimento"] == 2
+    flags = _flags(sei.corpos["consultarProcedimento"])
+    assert flags["SinRetornarAssuntos"] == flags["SinRetornarInteressados"] == "S"
+    assert flags["SinRetornarObservacoes"] == "N"
+    # A resposta é projetada para as flags pedidas.
+    assert resultado.assuntos == [] and resultado.interessados
+
+    for retornar in ({"retornar_assuntos": True}, {"retornar_interessados": True}, {}):
+        client.consultar_procedimento("110047993", PROTOCOLO, **retornar)
+    client.consultar_procedimento(
+        "110047993", PROTOCOLO, retornar_assuntos=True, retornar_interessados=True
+    )
+    assert sei.chamadas["consultarProcedimento"] == 2
+    assert len(cache.backend._entries) == 1
@@ -0,0 +1,56 @@
+from chunking import SEPARADOR, EstatisticasChunks, empacotar
+
+
+def palavras(texto: str) -> int:
+    return len(texto.split())
+
+
+def _trecho(n: int, prefixo: str = "p") -> str:
+    return " ".join(f"{prefixo}{i}" for i in range(n))
+
+
+def test_trechos_consecutivos_agrupados_no_orcamento():
+    trechos = [_trecho(4, "a"), _trecho(4, "b"), _trecho(4, "c"), _trecho(4, "d"), _trecho(3, "e")]
+    chunks, estatisticas = empacotar(trechos, 10, contar_tokens=palavras)
+
+    # O separador não tem palavras: 4 + 4 cabem em 10, um terceiro não.
+    assert chunks == [
+        SEPARADOR.join(trechos[0:2]),
+        SEPARADOR.join(trechos[2:4]),
+        trechos[4],
+    ]
+    assert all(palavras(chunk) <= 10 for chunk in chunks)
+    assert estatisticas == EstatisticasChunks(
+        trechos=5, chunks=3, divididos=0, tokens_total=19, tokens_min=3, tokens_max=8, tokens_medio=19 / 3
+    )
+
+
+def test_separador_conta_no_orcamento():
+    # Com ~4 caracteres por token, dois trechos de 20 caracteres não cabem em 11 tokens.
+    trechos = ["a" * 20, "b" * 20]
+    chunks, _ = empacotar(trechos, 11)
+    assert chunks == trechos
+    chunks, _ = empacotar(trechos, 13)
+    assert chunks == [SEPARADOR.join(trechos)]
+
+
+def test_apenas_trechos_grandes_sao_divididos():
+    grande = _trecho(25, "g")
+    trechos = [_trecho(3, "a"), grande, _trecho(3, "b"), _trecho(10, "c")]
+    chunks, estatisticas = empacotar(trechos, 10, contar_tokens=palavras)
+
+    partes = chunks[1:-2]
+    assert chunks[0] == trechos[0]
+    assert " ".join(partes).split() == grande.split()
+    assert len(partes) == 3 and all(palavras(parte) <= 10 for parte in partes)
+    # Um trecho do tamanho exato do orçamento não é dividido.
+    assert chunks[-2:] == [trechos[2], trechos[3]]
+    assert estatisticas.divididos == 1
+    assert estatisticas.chunks == len(chunks)
+    assert estatisticas.tokens_max == 10
+
+
+def test_sem_trechos():
+    chunks, estatisticas = empacotar([], 10, contar_tokens=palavras)
+    assert chunks == []
+    assert estatisticas == EstatisticasChunks(0, 0, 0, 0, 0, 0, 0.0)
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from datetime import datetime
+
+import pytest
+import requests
+import zeep
+
+from python_sei import AsyncClient, Client
+from python_sei.models import DefinicaoControlePrazo
+from python_sei.transport import TransportOptions
+from tests.fake_sei import resposta_andamentos
+
+PROTOCOLO = "00001.000001/2024-01"
+
+
+def test_iterar_andamentos_ignora_data_invalida(sei, caplog):
+    sei.respostas["listarAndamentos"] = resposta_andamentos(5, datas={2: "31/02/2024 10:00:00"})
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=False)
+    desde = datetime(2024, 1, 1)
+
+    with caplog.at_level(logging.WARNING, logger="python_sei.client"):
+        ids = [a.id_andamento for a in client.iterar_andamentos("110047993", PROTOCOLO, desde=desde)]
+
+    assert ids == ["0", "1", "3", "4"]
+    assert "Andamento 2 ignorado" in caplog.text
+
+    # Sem filtro de data o item é retornado normalmente.
+    assert len(list(client.iterar_andamentos("110047993", PROTOCOLO))) == 5
+
+
+def test_iterar_andamentos_async_ignora_data_invalida(sei):
+    sei.respostas["listarAndamentos"] = resposta_andamentos(3, datas={0: "data"})
+
+    async def listar():
+        async with AsyncClient(sei.url, "SEI", "chave", wsdl_cache=False) as client:
+            iterador = client.iterar_andamentos("110047993", PROTOCOLO, ate=datetime(2030, 1, 1))
+            return [a.id_andamento async for a in iterador]
+
+    assert asyncio.run(listar()) == ["1", "2"]
+
+
+def _client(sei, **opcoes) -> Client:
+    opcoes = {"retries": 3, "backoff_factor": 0, **opcoes}
+    return Client(sei.url, "SEI", "chave", wsdl_cache=False, transport_options=TransportOptions(**opcoes))
+
+
+@pytest.mark.parametrize("falha", [0, 502, 503, 504])
+def test_leituras_repetidas_em_falhas_transitorias(sei, falha):
+    sei.falhas["listarUnidades"] = [falha, falha]
+    client = _client(sei)
+
+    assert [u.sigla for u in client.listar_unidades()] == ["SGA-DTI", "SGA-PROT"]
+    assert sei.chamadas["listarUnidades"] == 3
+    assert client.transport_stats.retries == 2
+
+
+def test_leitura_desiste_depois_das_tentativas(sei):
+    sei.falhas["listarUnidades"] = [503] * 5
+    client = _client(sei, retries=2)
+
+    with pytest.raises(zeep.exceptions.TransportError):
+        client.listar_unidades()
+    assert sei.chamadas["listarUnidades"] == 3
+    assert client.transport_stats.retries == 2
+
+
+def test_404_nao_e_repetido(sei):
+    sei.falhas["listarUnidades"] = [404]
+    client = _client(sei)
+
+    with pytest.raises(zeep.exceptions.TransportError):
+        client.listar_unidades()
+    assert sei.chamadas["listarUnidades"] == 1
+    assert client.transport_stats.retries == 0
+
+
+@pytest.mark.parametrize("falha", [0, 503])
+def test_escrita_nunca_e_repetida(sei, falha):
+    sei.falhas["definirControlePrazo"] = [falha]
+    client = _client(sei)
+
+    with pytest.raises((requests.ConnectionError, zeep.exceptions.TransportError)):
+        client.definir_controle_prazo("110047993", [DefinicaoControlePrazo(PROTOCOLO, "31/12/2024", "", False)])
+    assert sei.chamadas["definirControlePrazo"] == 1
+    assert client.transport_stats.retries == 0
+
+
+def test_conexoes_reaproveitadas(sei):
+    client = _client(sei)
+    inicial = client.transport_stats
+    for _ in range(5):
+        client.listar_unidades()
+
+    stats = client.transport_stats
+    assert stats.pool_hits - inicial.pool_hits == 5
+    assert stats.pool_misses == inicial.pool_misses
+
+    # Sem keep-alive, cada requisição abre uma conexão.
+    client = _client(sei, keep_alive=False)
+    inicial = client.transport_stats
+    for _ in range(3):
+        client.listar_unidades()
+    assert client.transport_stats.pool_misses - inicial.pool_misses == 3
+
+
+def test_async_leituras_repetidas_e_escritas_nao(sei):
+    sei.falhas["listarUnidades"] = [0, 503]
+    sei.falhas["definirControlePrazo"] = [503]
+
+    async def executar():
+        opcoes = TransportOptions(retries=3, backoff_factor=0)
+        async with AsyncClient(sei.url, "SEI", "chave", wsdl_cache=False, transport_options=opcoes) as client:
+            unidades = await client.listar_unidades()
+            with pytest.raises(zeep.exceptions.TransportError):
+                await client.definir_controle_prazo(
+                    "110047993", [DefinicaoControlePrazo(PROTOCOLO, "31/12/2024", "", False)]
+                )
+            return unidades, client.transport_stats.retries
+
+    unidades, retries = asyncio.run(executar())
+    assert len(unidades) == 2
+    assert retries == 2
+    assert sei.chamadas["listarUnidades"] == 3
+    assert sei.chamadas["definirControlePrazo"] == 1
@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from conversao import ConversorOcupado, PoolConversao, TempoConversaoEsgotado
+
+
+def _converter_devagar(nome: str, conteudo: bytes) -> tuple[str, list[str]]:
+    """Conversor de teste: espera `nome` segundos e devolve o próprio conteúdo"""
+    time.sleep(float(nome))
+    return conteudo.decode(), [nome]
+
+
+@pytest.fixture
+def pool():
+    pool = PoolConversao(max_workers=1, max_fila=2, timeout=1, conversor=_converter_devagar)
+    yield pool
+    pool.shutdown()
+
+
+def test_fila_cheia_recusa_a_conversao(pool):
+    primeira = pool.submeter("0.5", b"primeira")
+    segunda = pool.submeter("0.5", b"segunda")
+    with pytest.raises(ConversorOcupado, match="Fila de conversão cheia"):
+        pool.converter("0", b"terceira")
+
+    assert primeira.result() == ("primeira", ["0.5"])
+    assert segunda.result() == ("segunda", ["0.5"])
+    # As vagas são devolvidas quando os workers terminam.
+    assert pool.converter("0", b"quarta") == ("quarta", ["0"])
+
+
+def test_conversao_demorada_e_interrompida(pool):
+    inicio = time.perf_counter()
+    with pytest.raises(TempoConversaoEsgotado):
+        pool.converter("30", b"demorada")
+    assert time.perf_counter() - inicio < 10
+
+    # O worker interrompido continua atendendo as próximas conversões.
+    assert pool.converter("0", b"seguinte") == ("seguinte", ["0"])
+    assert pool._vagas.acquire(blocking=False)
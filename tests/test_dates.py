@@ -0,0 +1,99 @@
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import pytest
+
+from python_sei.dates import (
+    agrupar_andamentos,
+    ordenar_andamentos,
+    parse_data,
+    parse_data_hora,
+    somar_dias,
+)
+
+
+@dataclass
+class AndamentoFalso:
+    id_andamento: str
+    data_hora: str | None
+
+    @property
+    def data_hora_datetime(self) -> datetime | None:
+        return parse_data_hora(self.data_hora)
+
+
+@pytest.mark.parametrize(
+    ("valor", "esperado"),
+    [
+        ("05/03/2024 14:07:09", datetime(2024, 3, 5, 14, 7, 9)),
+        ("05/03/2024", datetime(2024, 3, 5)),
+        # Formatos fora das posições fixas usam o strptime.
+        ("05/03/2024 14:07", datetime(2024, 3, 5, 14, 7)),
+        ("5/3/2024", datetime(2024, 3, 5)),
+        ("5/3/2024 9:07:09", datetime(2024, 3, 5, 9, 7, 9)),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_parse_data_hora(valor, esperado):
+    assert parse_data_hora(valor) == esperado
+
+
+@pytest.mark.parametrize("valor", ["31/02/2024 10:00:00", "31/02/2024", "data", "2024-03-05", "05/03/2024 25:00:00"])
+def test_parse_data_hora_invalida(valor):
+    with pytest.raises(ValueError, match="Data inválida"):
+        parse_data_hora(valor)
+
+
+def test_parse_data():
+    assert parse_data("05/03/2024 14:07:09") == date(2024, 3, 5)
+    assert parse_data("05/03/2024") == date(2024, 3, 5)
+    assert parse_data(None) is None
+    with pytest.raises(ValueError):
+        parse_data("32/01/2024")
+
+
+def test_datas_invalidas_sao_ignoradas(caplog):
+    andamentos = [
+        AndamentoFalso("1", "10/01/2024 10:00:00"),
+        AndamentoFalso("2", "31/02/2024 10:00:00"),
+        AndamentoFalso("3", None),
+        AndamentoFalso("4", "09/01/2024 08:00:00"),
+        AndamentoFalso("5", "data"),
+    ]
+    with caplog.at_level(logging.WARNING, logger="python_sei.dates"):
+        ordenados = ordenar_andamentos(andamentos)
+        grupos = agrupar_andamentos(andamentos, "mes")
+
+    assert [a.id_andamento for a in ordenados] == ["4", "1", "3"]
+    assert [a.id_andamento for a in ordenar_andamentos(andamentos, reverso=True)] == ["1", "4", "3"]
+    assert {inicio: [a.id_andamento for a in grupo] for inicio, grupo in grupos.items()} == {
+        date(2024, 1, 1): ["4", "1"]
+    }
+    assert "Andamento 2 ignorado" in caplog.text
+    assert "Andamento 5 ignorado" in caplog.text
+
+
+@pytest.mark.parametrize(
+    ("inicio", "dias", "esperado"),
+    [
+        # Sexta-feira + 1 dia útil = segunda-feira.
+        (date(2024, 3, 8), 1, date(2024, 3, 11)),
+        (date(2024, 3, 8), 5, date(2024, 3, 15)),
+        # Sábado + 1 dia útil = segunda-feira.
+        (date(2024, 3, 9), 1, date(2024, 3, 11)),
+        (date(2024, 3, 8), 0, date(2024, 3, 8)),
+        # Segunda-feira - 1 dia útil = sexta-feira anterior.
+        (date(2024, 3, 11), -1, date(2024, 3, 8)),
+        (date(2024, 3, 15), -5, date(2024, 3, 8)),
+        (date(2024, 3, 10), -1, date(2024, 3, 8)),
+    ],
+)
+def test_somar_dias_uteis(inicio, dias, esperado):
+    assert somar_dias(inicio, dias, dias_uteis=True) == esperado
+
+
+def test_somar_dias_corridos():
+    assert somar_dias(date(2024, 2, 28), 2) == date(2024, 3, 1)
+    assert somar_dias(date(2024, 3, 1), -2) == date(2024, 2, 28)
@@ -0,0 +1,79 @@
+"""
+Conformidade do decodificador lxml (`python_sei.decoder`) com o zeep nas
+respostas RPC/encoded do SEI: campos nulos, estruturas nulas, listas vazias ou
+nulas e estruturas aninhadas.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from zeep.helpers import serialize_object
+
+from python_sei import Client
+from python_sei.decoder import ArrayStreamParser, parse_response
+from tests.fake_sei import DATA, resposta_andamentos
+
+OPERACOES = sorted(path.stem for path in (DATA / "respostas").glob("*.xml"))
+
+PROTOCOLO = "00001.000001/2024-01"
+
+
+@pytest.fixture
+def client(sei):
+    return Client(sei.url, "SEI", "chave", wsdl_cache=False)
+
+
+def _zeep(client: Client, operacao: str, content: bytes):
+    """Decodifica `content` pelo zeep, como em uma chamada normal"""
+    binding = client._service._binding
+    response = SimpleNamespace(
+        status_code=200,
+        content=content,
+        headers={"Content-Type": "text/xml; charset=utf-8"},
+        encoding="utf-8",
+    )
+    return serialize_object(binding.process_reply(client.client, binding.get(operacao), response))
+
+
+@pytest.mark.parametrize("operacao", OPERACOES)
+def test_decoder_igual_ao_zeep(client, sei, operacao):
+    content = sei.respostas[operacao]
+    assert parse_response(content, client._response_shape(operacao)) == _zeep(client, operacao, content)
+
+
+def test_estruturas_e_listas_nulas(client, sei):
+    content = sei.respostas["listarAndamentos"]
+    andamento = parse_response(content, client._response_shape("listarAndamentos"))[2]
+
+    # <Usuario xsi:nil="true"/> e <Atributos xsi:nil="true"/>
+    assert andamento["Usuario"] == {"IdUsuario": None, "Sigla": None, "Nome": None}
+    assert andamento["Atributos"] == []
+    # Sem o formato, o decodificador não sabe que são estrutura e lista.
+    assert parse_response(content)[2]["Usuario"] is None
+
+
+def test_respostas_grandes(client):
+    content = resposta_andamentos(500)
+    assert parse_response(content, client._response_shape("listarAndamentos")) == _zeep(
+        client, "listarAndamentos", content
+    )
+
+
+def test_stream_igual_a_resposta_completa(sei):
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=False)
+    fast = Client(sei.url, "SEI", "chave", wsdl_cache=False, fast_decode=True)
+
+    andamentos = client.listar_andamentos("110047993", PROTOCOLO, True)
+    assert fast.listar_andamentos("110047993", PROTOCOLO, True) == andamentos
+    assert list(client.iterar_andamentos("110047993", PROTOCOLO, True)) == andamentos
+
+
+def test_stream_em_trechos_pequenos():
+    content = resposta_andamentos(20)
+    parser = ArrayStreamParser()
+    ids = [
+        item.findtext("IdAndamento")
+        for i in range(0, len(content), 7)
+        for item in parser.feed(content[i : i + 7])
+    ]
+    assert ids == [str(i) for i in range(20)]
@@ -0,0 +1,69 @@
+import pytest
+
+from python_sei.enums import Aplicabilidade, NivelAcesso
+from python_sei.models import intern_str
+from python_sei.sin import decode_sin, encode_sin
+
+
+@pytest.mark.parametrize(
+    "codigo, valor",
+    [("0", NivelAcesso.PUBLICO), ("1", NivelAcesso.RESTRITO), ("2", NivelAcesso.SIGILOSO)],
+)
+def test_nivel_acesso(codigo, valor):
+    assert NivelAcesso.from_str(codigo) is valor
+    assert valor.to_str() == codigo
+
+
+@pytest.mark.parametrize(
+    "codigo, valor",
+    [
+        ("T", Aplicabilidade.DOCUMENTOS_INTERNOS_EXTERNOS),
+        ("I", Aplicabilidade.DOCUMENTOS_INTERNOS),
+        ("E", Aplicabilidade.DOCUMENTOS_EXTERNOS),
+        ("F", Aplicabilidade.FORMULARIOS),
+    ],
+)
+def test_aplicabilidade(codigo, valor):
+    assert Aplicabilidade.from_str(codigo) is valor
+    assert valor.to_str() == codigo
+
+
+def test_todos_os_membros_tem_codigo():
+    for enum in (NivelAcesso, Aplicabilidade):
+        for valor in enum:
+            assert enum.from_str(valor.to_str()) is valor
+
+
+@pytest.mark.parametrize("codigo", ["3", "", " 1", "t", "X", None])
+def test_codigo_desconhecido(codigo):
+    with pytest.raises(ValueError, match="Invalid NivelAcesso"):
+        NivelAcesso.from_str(codigo)
+    with pytest.raises(ValueError, match="Invalid Aplicabilidade"):
+        Aplicabilidade.from_str(codigo)
+
+
+@pytest.mark.parametrize("codigo, valor", [("S", True), ("N", False), (None, None)])
+def test_sin(codigo, valor):
+    assert decode_sin(codigo) is valor
+    assert encode_sin(valor) == codigo
+
+
+@pytest.mark.parametrize("codigo, valor", [("s", True), ("n", False)])
+def test_sin_minusculas(codigo, valor):
+    assert decode_sin(codigo) is valor
+    assert encode_sin(valor) == codigo.upper()
+
+
+@pytest.mark.parametrize("codigo", ["", "Sim", "X", " S", "SN"])
+def test_sin_desconhecido(codigo):
+    with pytest.raises(ValueError, match="Invalid SIN"):
+        decode_sin(codigo)
+
+
+def test_intern_str():
+    a = "".join(["SGA", "-DTI"])
+    b = "".join(["SGA-", "DTI"])
+    assert a is not b
+    assert intern_str(a) is intern_str(b)
+    assert intern_str(a) == "SGA-DTI"
+    assert intern_str(None) is None
@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+from python_sei.index import ReferenceIndex
+from python_sei.models import Unidade, Usuario
+from settings import Settings
+
+
+class ClienteFalso:
+    def __init__(self):
+        self.unidades = [
+            Unidade("110047993", "SGA-DTI", "Diretoria de Tecnologia da Informação", False, False, False)
+        ]
+        self.usuarios = []
+        self.erro: Exception | None = None
+
+    def listar_unidades(self):
+        if self.erro is not None:
+            raise self.erro
+        return list(self.unidades)
+
+    def listar_series(self):
+        return []
+
+    def listar_usuarios(self, id_unidade):
+        return list(self.usuarios)
+
+    def listar_marcadores_unidade(self, id_unidade):
+        return []
+
+
+def test_resolver_unidade():
+    indice = ReferenceIndex(ClienteFalso(), unidades=["110047993"])
+
+    assert indice.resolver_unidade("110047993") == "110047993"
+    assert indice.resolver_unidade("sga-dti") == "110047993"
+    # Identificador ainda não indexado
+    assert indice.resolver_unidade("110000001") == "110000001"
+    with pytest.raises(KeyError):
+        indice.resolver_unidade("SGA-NOVA")
+
+
+def test_unidade_padrao_do_agente():
+    settings = Settings.from_env({"SEI_IA_SEI_ID_UNIDADE": "110000001"})
+    assert settings.sei_id_unidade == "110000001"
+    assert settings.unidades_indice == ()
+
+    settings = Settings.from_env({"SEI_IA_UNIDADES_INDICE": "1, 2"})
+    assert settings.unidades_indice == ("1", "2")
+
+
+def _aguardar(condicao) -> None:
+    for _ in range(200):
+        if condicao():
+            return
+        time.sleep(0.01)
+    raise AssertionError("Condição não atingida")
+
+
+def test_busca_por_prefixo_sem_acentos_nem_maiusculas():
+    cliente = ClienteFalso()
+    cliente.unidades.append(Unidade("110000002", "SGA-DF", "Departamento de Finanças", False, False, False))
+    cliente.usuarios = [Usuario("1", "jsilva", "José da Silva"), Usuario("2", "msouza", "Maria Souza")]
+    indice = ReferenceIndex(cliente, unidades=["110047993"])
+
+    assert [u.sigla for u in indice.buscar_unidades("FINAN")] == ["SGA-DF"]
+    assert [u.sigla for u in indice.buscar_unidades("tecnologia da inf")] == ["SGA-DTI"]
+    assert {u.sigla for u in indice.buscar_unidades("d")} == {"SGA-DF", "SGA-DTI"}
+    assert [u.nome for u in indice.buscar_usuarios("jose")] == ["José da Silva"]
+    assert [u.nome for u in indice.buscar_usuarios("SOU")] == ["Maria Souza"]
+    assert indice.buscar_unidades("  ") == []
+    assert indice.usuario("JSILVA").id_usuario == "1"
+
+
+def test_atualizacao_substitui_o_indice_inteiro():
+    cliente = ClienteFalso()
+    indice = ReferenceIndex(cliente, unidades=["110047993"], intervalo=0.01)
+    indice.iniciar()
+    try:
+        anterior = indice._snapshot
+        cliente.unidades = [Unidade("110000003", "SGA-NOVA", "Nova Unidade", False, False, False)]
+        _aguardar(lambda: indice.unidade("SGA-NOVA") is not None)
+
+        assert indice.resolver_unidade("sga-nova") == "110000003"
+        assert indice.unidade("SGA-DTI") is None
+        # O índice anterior, ainda em uso por uma consulta, não é alterado.
+        assert anterior.unidades.get("SGA-DTI").id_unidade == "110047993"
+        assert anterior.unidades.get("SGA-NOVA") is None
+    finally:
+        indice.parar()
+
+
+def test_falha_na_atualizacao_mantem_o_indice_anterior():
+    cliente = ClienteFalso()
+    indice = ReferenceIndex(cliente, unidades=["110047993"], intervalo=0.01)
+    indice.iniciar()
+    try:
+        cliente.erro = ConnectionError("SEI indisponível")
+        _aguardar(lambda: indice.ultimo_erro is not None)
+        anterior = indice._snapshot
+        time.sleep(0.05)
+
+        assert indice.ultimo_erro is cliente.erro
+        assert indice._snapshot is anterior
+        assert indice.resolver_unidade("sga-dti") == "110047993"
+
+        # A próxima atualização bem-sucedida limpa o erro.
+        cliente.erro = None
+        _aguardar(lambda: indice.ultimo_erro is None)
+        assert indice._snapshot is not anterior
+    finally:
+        indice.parar()
@@ -0,0 +1,98 @@
+import threading
+import time
+
+from jobs import CONCLUIDO, ERRO, EXECUTANDO, JobManager
+
+
+class Executor:
+    """Executor de jobs que aguarda `liberar` antes de concluir"""
+
+    def __init__(self):
+        self.liberar = threading.Event()
+        self.chamadas = 0
+
+    def __call__(self, id_unidade: str, protocolo: str) -> str:
+        self.chamadas += 1
+        self.liberar.wait(10)
+        return f"resumo de {protocolo}"
+
+
+def _aguardar(manager: JobManager, id: str, status: str) -> None:
+    for _ in range(200):
+        if manager.obter(id).status == status:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"Job {id} não chegou a {status}: {manager.obter(id)}")
+
+
+def test_workers_compartilham_o_job_em_andamento(tmp_path):
+    executor = Executor()
+    a = JobManager({"resumo": executor}, path=tmp_path / "jobs.sqlite3")
+    job = a.submeter("resumo", "110047993", "0000001")
+    _aguardar(a, job.id, EXECUTANDO)
+
+    # Um worker iniciado depois não interrompe o job do outro e o reaproveita.
+    b = JobManager({"resumo": executor}, path=tmp_path / "jobs.sqlite3")
+    assert b.obter(job.id).status == EXECUTANDO
+    assert b.submeter("resumo", "110047993", "0000001").id == job.id
+
+    executor.liberar.set()
+    _aguardar(b, job.id, CONCLUIDO)
+    assert b.obter(job.id).resultado == "resumo de 0000001"
+    assert executor.chamadas == 1
+    a.shutdown()
+    b.shutdown()
+
+
+def test_job_inserido_por_outro_worker_depois_da_consulta(tmp_path, monkeypatch):
+    executor = Executor()
+    a = JobManager({"resumo": executor}, path=tmp_path / "jobs.sqlite3")
+    b = JobManager({"resumo": executor}, path=tmp_path / "jobs.sqlite3")
+    job = a.submeter("resumo", "110047993", "0000001")
+
+    # Simula a corrida: b consulta antes de a inserir o job.
+    consultar = b._existente
+    chamadas = iter([None])
+    monkeypatch.setattr(b, "_existente", lambda *alvo: next(chamadas, None) or consultar(*alvo))
+    assert b.submeter("resumo", "110047993", "0000001").id == job.id
+    assert b._vagas.acquire(blocking=False)
+
+    executor.liberar.set()
+    _aguardar(a, job.id, CONCLUIDO)
+    a.shutdown()
+    b.shutdown()
+
+
+def test_jobs_com_lease_vencido_sao_interrompidos(tmp_path):
+    executor = Executor()
+    a = JobManager({"resumo": executor}, path=tmp_path / "jobs.sqlite3", lease=0.2)
+    job = a.submeter("resumo", "110047993", "0000001")
+    _aguardar(a, job.id, EXECUTANDO)
+    # O worker para sem concluir o job nem renovar o lease.
+    a._parar.set()
+    time.sleep(0.3)
+
+    b = JobManager({"resumo": executor}, path=tmp_path / "jobs.sqlite3")
+    assert b.obter(job.id).status == ERRO
+    novo = b.submeter("resumo", "110047993", "0000001")
+    assert novo.id != job.id
+
+    executor.liberar.set()
+    _aguardar(b, novo.id, CONCLUIDO)
+    a.shutdown()
+    b.shutdown()
+
+
+def test_lease_renovado_enquanto_o_worker_esta_ativo(tmp_path):
+    executor = Executor()
+    a = JobManager({"resumo": executor}, path=tmp_path / "jobs.sqlite3", lease=0.2)
+    job = a.submeter("resumo", "110047993", "0000001")
+    time.sleep(0.5)
+
+    b = JobManager({"resumo": executor}, path=tmp_path / "jobs.sqlite3")
+    assert b.obter(job.id).status == EXECUTANDO
+
+    executor.liberar.set()
+    _aguardar(a, job.id, CONCLUIDO)
+    a.shutdown()
+    b.shutdown()
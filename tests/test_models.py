@@ -0,0 +1,39 @@
+import pytest
+
+from python_sei import Client
+
+PROTOCOLO = "00001.000001/2024-01"
+
+
+def _consultas(client: Client) -> dict:
+    return {
+        "procedimento": client.consultar_procedimento("110047993", PROTOCOLO),
+        "documento": client.consultar_documento("110047993", "0000001"),
+        "andamentos": client.listar_andamentos("110047993", PROTOCOLO, True),
+    }
+
+
+@pytest.mark.parametrize("keep_raw", ["full", "compact"])
+def test_decodificacao_preguicosa_igual_a_completa(sei, keep_raw):
+    completos = _consultas(Client(sei.url, "SEI", "chave", wsdl_cache=False, keep_raw=keep_raw))
+    preguicosos = _consultas(
+        Client(sei.url, "SEI", "chave", wsdl_cache=False, keep_raw=keep_raw, lazy=True)
+    )
+
+    procedimento = preguicosos["procedimento"]
+    with pytest.raises(AttributeError):
+        object.__getattribute__(procedimento, "andamento_geracao")
+
+    assert preguicosos == completos
+    assert procedimento.raw_value == completos["procedimento"].raw_value
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_modo_compacto_guarda_apenas_o_registro_principal(sei, lazy):
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=False, keep_raw="compact", lazy=lazy)
+    andamento = client.listar_andamentos("110047993", PROTOCOLO, True)[0]
+
+    assert isinstance(andamento._raw_value, bytes)
+    assert andamento.raw_value["Unidade"]["Sigla"] == andamento.unidade.sigla
+    assert andamento.unidade.raw_value is None
+    assert all(atributo.raw_value is None for atributo in andamento.atributos)
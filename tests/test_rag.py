@@ -0,0 +1,68 @@
+import multiprocessing
+
+from rag import Chunk, HashingEmbedder, IndiceVetorial
+
+
+def _chunks(id_documento: str, *textos: str) -> list[Chunk]:
+    return [
+        Chunk(id_documento, f"DOC {id_documento}", "00001.000001/2024-01", posicao, texto)
+        for posicao, texto in enumerate(textos)
+    ]
+
+
+def _indexar(path, inicio: int, quantidade: int) -> None:
+    indice = IndiceVetorial(HashingEmbedder(64), path)
+    for i in range(inicio, inicio + quantidade):
+        indice.upsert(str(i), "v1", _chunks(str(i), f"documento numero {i}"))
+
+
+def test_upsert_substitui_apenas_o_documento(tmp_path):
+    indice = IndiceVetorial(HashingEmbedder(64), tmp_path / "rag.sqlite3")
+    indice.upsert("1", "v1", _chunks("1", "licitação de obras", "contrato de obras"))
+    indice.upsert("2", "v1", _chunks("2", "férias do servidor"))
+    indice.upsert("1", "v2", _chunks("1", "pregão eletrônico"))
+
+    assert len(indice) == 2
+    assert indice.versao("1") == "v2"
+    assert indice.buscar("pregão eletrônico", k=1)[0].chunk.texto == "pregão eletrônico"
+    assert indice.buscar("ferias servidor", k=1)[0].chunk.id_documento == "2"
+
+    indice.remover("1")
+    assert indice.versao("1") is None
+    assert {r.chunk.id_documento for r in indice.buscar("obras", k=5)} == {"2"}
+
+
+def test_instancias_compartilham_o_banco(tmp_path):
+    path = tmp_path / "rag.sqlite3"
+    a = IndiceVetorial(HashingEmbedder(64), path)
+    b = IndiceVetorial(HashingEmbedder(64), path)
+    a.upsert("1", "v1", _chunks("1", "licitação"))
+    b.upsert("2", "v1", _chunks("2", "férias"))
+    a.upsert("3", "v1", _chunks("3", "diárias"))
+
+    for indice in (a, b, IndiceVetorial(HashingEmbedder(64), path)):
+        assert len(indice) == 3
+        assert indice.buscar("ferias", k=1)[0].chunk.id_documento == "2"
+
+
+def test_processos_concorrentes_nao_perdem_documentos(tmp_path):
+    path = tmp_path / "rag.sqlite3"
+    IndiceVetorial(HashingEmbedder(64), path)
+    contexto = multiprocessing.get_context("spawn")
+    processos = [contexto.Process(target=_indexar, args=(path, i * 20, 20)) for i in range(3)]
+    for processo in processos:
+        processo.start()
+    for processo in processos:
+        processo.join(60)
+        assert processo.exitcode == 0
+
+    assert len(IndiceVetorial(HashingEmbedder(64), path)) == 60
+
+
+def test_outro_embedder_refaz_o_indice(tmp_path):
+    path = tmp_path / "rag.sqlite3"
+    IndiceVetorial(HashingEmbedder(64), path).upsert("1", "v1", _chunks("1", "licitação"))
+
+    indice = IndiceVetorial(HashingEmbedder(32), path)
+    assert len(indice) == 0
+    assert indice.versao("1") is None
@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from resumo import PROMPT_COLLAPSE, PROMPT_MAP, PROMPT_REDUCE, Resumidor, _com_backoff
+
+
+class LimiteRequisicoes(Exception):
+    status_code = 429
+
+
+class LLMFalso:
+    """
+    Runnable que registra as chamadas e o máximo de chamadas simultâneas, e
+    recusa as primeiras `recusas` chamadas com 429.
+    """
+
+    def __init__(self, recusas: int = 0, latencia: float = 0.02):
+        self.recusas = recusas
+        self.latencia = latencia
+        self.chamadas: list[tuple[str, str]] = []
+        self.simultaneas = 0
+        self.max_simultaneas = 0
+        self._lock = threading.Lock()
+
+    def chain(self, template: str) -> "_Chain":
+        return _Chain(self, template)
+
+    def invoke(self, template: str, context: str) -> str:
+        with self._lock:
+            self.chamadas.append((template, context))
+            if self.recusas > 0:
+                self.recusas -= 1
+                raise LimiteRequisicoes("Too many requests")
+            self.simultaneas += 1
+            self.max_simultaneas = max(self.max_simultaneas, self.simultaneas)
+        try:
+            time.sleep(self.latencia)
+            return f"resumo de {len(context.split())} palavras"
+        finally:
+            with self._lock:
+                self.simultaneas -= 1
+
+
+class _Chain:
+    def __init__(self, llm: LLMFalso, template: str):
+        self.llm = llm
+        self.template = template
+
+    def invoke(self, entrada: dict) -> str:
+        return self.llm.invoke(self.template, entrada["context"])
+
+
+def _resumidor(llm: LLMFalso, **kwargs) -> Resumidor:
+    opcoes = dict(
+        chain=llm.chain,
+        chunk_tokens=10,
+        token_max=1000,
+        contar_tokens=lambda texto: len(texto.split()),
+        backoff=0.001,
+        backoff_max=0.01,
+    )
+    return Resumidor(**(opcoes | kwargs))
+
+
+def _trechos(n: int) -> list[str]:
+    return [" ".join(f"palavra{i}" for i in range(8)) for _ in range(n)]
+
+
+def test_map_limitado_a_max_concorrencia():
+    llm = LLMFalso()
+    resumo = _resumidor(llm, max_concorrencia=4).resumir(_trechos(20))
+
+    templates = [template for template, _ in llm.chamadas]
+    assert templates.count(PROMPT_MAP) == 20
+    assert templates[-1] == PROMPT_REDUCE
+    assert 1 < llm.max_simultaneas <= 4
+    assert resumo.startswith("resumo de")
+
+
+def test_repete_chamadas_recusadas_com_429():
+    llm = LLMFalso(recusas=3)
+    _resumidor(llm, max_concorrencia=1, tentativas=5).resumir(_trechos(2))
+
+    # 3 recusas + 2 map + 1 reduce
+    assert len(llm.chamadas) == 6
+
+
+def test_desiste_depois_das_tentativas():
+    llm = LLMFalso(recusas=10)
+    with pytest.raises(LimiteRequisicoes):
+        _resumidor(llm, max_concorrencia=1, tentativas=3).resumir(_trechos(1))
+    assert len(llm.chamadas) == 3
+
+
+@pytest.mark.parametrize("tentativas", [0, -1])
+def test_tentativas_invalidas(tentativas):
+    with pytest.raises(ValueError, match="tentativas deve ser positivo"):
+        _resumidor(LLMFalso(), tentativas=tentativas)
+
+
+def test_outros_erros_nao_sao_repetidos():
+    chamadas = []
+
+    def falhar():
+        chamadas.append(1)
+        raise ValueError("erro do modelo")
+
+    with pytest.raises(ValueError):
+        _com_backoff(falhar, tentativas=5, backoff=0.001, backoff_max=0.01)
+    assert len(chamadas) == 1
+
+
+def test_resumos_agrupados_ate_caber_no_orcamento():
+    llm = LLMFalso()
+    # Cada resumo tem 4 palavras; 10 resumos não cabem em 20 tokens.
+    _resumidor(llm, token_max=20).resumir(_trechos(10))
+
+    templates = [template for template, _ in llm.chamadas]
+    assert templates.count(PROMPT_MAP) == 10
+    assert templates.count(PROMPT_COLLAPSE) >= 2
+    assert templates[-1] == PROMPT_REDUCE
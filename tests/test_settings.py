@@ -0,0 +1,38 @@
+import pytest
+
+from settings import Settings
+
+OBRIGATORIAS = {
+    "SEI_IA_SEI_IDENTIFICACAO_SERVICO": "chave",
+    "SEI_IA_COMPARTMENT_ID": "ocid1.compartment.oc1..teste",
+    "SEI_IA_AGENT_ENDPOINT_ID": "ocid1.genaiagentendpoint.oc1..teste",
+    "SEI_IA_OCI_PROFILE": "TESTE",
+}
+
+
+def test_credenciais_nao_tem_valor_padrao():
+    settings = Settings.from_env({})
+    assert settings.faltando() == [
+        "SEI_IA_SEI_IDENTIFICACAO_SERVICO",
+        "SEI_IA_COMPARTMENT_ID",
+        "SEI_IA_AGENT_ENDPOINT_ID",
+        "SEI_IA_OCI_PROFILE",
+    ]
+    with pytest.raises(ValueError, match="SEI_IA_SEI_IDENTIFICACAO_SERVICO, SEI_IA_COMPARTMENT_ID"):
+        settings.validar()
+
+
+def test_configuracao_completa():
+    settings = Settings.from_env(OBRIGATORIAS)
+    settings.validar()
+    assert settings.sei_identificacao_servico == "chave"
+    assert settings.oci_profile == "TESTE"
+
+
+def test_perfil_exigido_apenas_com_api_key():
+    ambiente = {**OBRIGATORIAS, "SEI_IA_OCI_AUTH_TYPE": "instance_principal"}
+    del ambiente["SEI_IA_OCI_PROFILE"]
+    assert Settings.from_env(ambiente).faltando() == []
+
+    del ambiente["SEI_IA_OCI_AUTH_TYPE"]
+    assert Settings.from_env(ambiente).faltando() == ["SEI_IA_OCI_PROFILE"]
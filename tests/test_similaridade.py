@@ -0,0 +1,49 @@
+from similaridade import IndiceSimilaridade, MinHash
+
+TEXTO = " ".join(f"clausula {i} do contrato administrativo de prestacao de servicos" for i in range(20))
+
+
+def test_textos_vazios_nao_sao_semelhantes(tmp_path):
+    indice = IndiceSimilaridade(tmp_path / "similaridade.sqlite3")
+    indice.adicionar("1", "v1", "")
+    indice.adicionar("2", "v1", "   \n\t ")
+    indice.adicionar("3", "v1", TEXTO)
+    indice.adicionar("4", "v1", TEXTO + " aditivo")
+
+    assert indice.similaridade("1", "2") == 0.0
+    assert indice.similaridade("1", "3") == 0.0
+    assert indice.semelhantes("1") == []
+    assert [s.id_documento for s in indice.semelhantes("3")] == ["4"]
+    assert not any(len(bucket) > 1 and "1" in bucket for bucket in indice._buckets.values())
+
+    # Recarregados do banco, continuam fora dos buckets.
+    recarregado = IndiceSimilaridade(tmp_path / "similaridade.sqlite3")
+    assert recarregado.versao("2") == "v1"
+    assert recarregado.semelhantes("2") == []
+    assert [s.id_documento for s in recarregado.semelhantes("4")] == ["3"]
+
+
+def test_similaridade_com_assinatura_vazia():
+    minhash = MinHash()
+    vazia = minhash.assinatura(minhash.a[:0])
+    assert MinHash.vazia(vazia)
+    assert MinHash.similaridade(vazia, vazia) == 0.0
+    assert MinHash.similaridade(vazia, minhash.assinatura(minhash.a[:10])) == 0.0
+
+
+def test_indices_do_mesmo_banco_veem_os_documentos_um_do_outro(tmp_path):
+    a = IndiceSimilaridade(tmp_path / "similaridade.sqlite3")
+    b = IndiceSimilaridade(tmp_path / "similaridade.sqlite3")
+    a.adicionar("1", "v1", TEXTO, rotulo="0000001")
+    assert [s.id_documento for s in b.semelhantes("1")] == []
+
+    # Documento adicionado por outro worker depois da última leitura de `a`.
+    b.adicionar("2", "v1", TEXTO + " aditivo", rotulo="0000002")
+    assert a.versao("2") == "v1"
+    assert [s.rotulo for s in a.semelhantes("1")] == ["0000002"]
+
+    # Nova versão do documento, gravada por `a`, substitui a anterior em `b`.
+    a.adicionar("2", "v2", "texto completamente diferente do contrato original")
+    assert b.versao("2") == "v2"
+    assert b.semelhantes("1") == []
+    assert b.similaridade("1", "2") < 0.5
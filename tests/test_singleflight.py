@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from python_sei import AsyncClient, Client
+from python_sei.models import DefinicaoControlePrazo
+from python_sei.singleflight import AsyncSingleFlight, SingleFlight
+
+PROTOCOLO = "00001.000001/2024-01"
+
+
+def _em_threads(n: int, funcao) -> list:
+    resultados: list = [None] * n
+    barreira = threading.Barrier(n)
+
+    def executar(i):
+        barreira.wait()
+        try:
+            resultados[i] = funcao()
+        except Exception as e:
+            resultados[i] = e
+
+    threads = [threading.Thread(target=executar, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return resultados
+
+
+def test_chamadas_simultaneas_executam_uma_vez():
+    inflight = SingleFlight()
+    chamadas = []
+
+    def buscar():
+        chamadas.append(1)
+        time.sleep(0.1)
+        return "resultado"
+
+    resultados = _em_threads(8, lambda: inflight.do("chave", buscar))
+    assert resultados == ["resultado"] * 8
+    assert len(chamadas) == 1
+    assert (inflight.stats.calls, inflight.stats.coalesced) == (1, 7)
+
+    # Terminada a chamada, a próxima é executada de novo.
+    assert inflight.do("chave", buscar) == "resultado"
+    assert len(chamadas) == 2
+    assert (inflight.stats.calls, inflight.stats.coalesced) == (2, 7)
+
+
+def test_erro_do_lider_chega_a_todos():
+    inflight = SingleFlight()
+
+    def falhar():
+        time.sleep(0.1)
+        raise ValueError("falhou")
+
+    resultados = _em_threads(5, lambda: inflight.do("chave", falhar))
+    assert all(isinstance(r, ValueError) and str(r) == "falhou" for r in resultados)
+    assert inflight.stats.calls == 1
+
+
+def test_chaves_diferentes_nao_sao_agrupadas():
+    inflight = SingleFlight()
+    resultados = _em_threads(4, lambda: inflight.do(threading.current_thread().name, lambda: time.sleep(0.05)))
+    assert resultados == [None] * 4
+    assert (inflight.stats.calls, inflight.stats.coalesced) == (4, 0)
+
+
+def test_async_chamadas_simultaneas_executam_uma_vez():
+    async def executar():
+        inflight = AsyncSingleFlight()
+        chamadas = []
+
+        async def buscar():
+            chamadas.append(1)
+            await asyncio.sleep(0.05)
+            return "resultado"
+
+        resultados = await asyncio.gather(*(inflight.do("chave", buscar) for _ in range(8)))
+        return resultados, chamadas, inflight.stats
+
+    resultados, chamadas, stats = asyncio.run(executar())
+    assert resultados == ["resultado"] * 8
+    assert len(chamadas) == 1
+    assert (stats.calls, stats.coalesced) == (1, 7)
+
+
+def test_async_erro_do_lider_chega_a_todos():
+    async def executar():
+        inflight = AsyncSingleFlight()
+
+        async def falhar():
+            await asyncio.sleep(0.05)
+            raise ValueError("falhou")
+
+        return await asyncio.gather(*(inflight.do("chave", falhar) for _ in range(3)), return_exceptions=True)
+
+    resultados = asyncio.run(executar())
+    assert all(isinstance(r, ValueError) for r in resultados)
+
+
+def test_async_cancelar_um_aguardando_nao_cancela_a_chamada():
+    async def executar():
+        inflight = AsyncSingleFlight()
+        concluidas = []
+
+        async def buscar():
+            await asyncio.sleep(0.1)
+            concluidas.append(1)
+            return "resultado"
+
+        primeiro = asyncio.create_task(inflight.do("chave", buscar))
+        segundo = asyncio.create_task(inflight.do("chave", buscar))
+        await asyncio.sleep(0.01)
+        primeiro.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await primeiro
+        return await segundo, concluidas
+
+    assert asyncio.run(executar()) == ("resultado", [1])
+
+
+def test_client_agrupa_leituras_simultaneas(sei):
+    sei.latencia = 0.1
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=False)
+    resultados = _em_threads(6, lambda: client.consultar_procedimento("110047993", PROTOCOLO))
+
+    assert all(r.procedimento_formatado == resultados[0].procedimento_formatado for r in resultados)
+    assert sei.chamadas["consultarProcedimento"] == 1
+    assert (client.inflight.stats.calls, client.inflight.stats.coalesced) == (1, 5)
+
+
+def test_client_sem_coalesce(sei):
+    sei.latencia = 0.1
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=False, coalesce=False)
+    _em_threads(4, lambda: client.consultar_procedimento("110047993", PROTOCOLO))
+
+    assert client.inflight is None
+    assert sei.chamadas["consultarProcedimento"] == 4
+
+
+def test_escritas_nao_sao_agrupadas(sei):
+    sei.latencia = 0.1
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=False)
+    definicoes = [DefinicaoControlePrazo(PROTOCOLO, "31/12/2024", "", False)]
+    _em_threads(4, lambda: client.definir_controle_prazo("110047993", definicoes))
+
+    assert sei.chamadas["definirControlePrazo"] == 4
+    assert (client.inflight.stats.calls, client.inflight.stats.coalesced) == (0, 0)
+
+
+def test_async_client_agrupa_leituras_simultaneas(sei):
+    sei.latencia = 0.1
+
+    async def executar():
+        async with AsyncClient(sei.url, "SEI", "chave", wsdl_cache=False) as client:
+            await asyncio.gather(*(client.consultar_procedimento("110047993", PROTOCOLO) for _ in range(6)))
+            definicoes = [DefinicaoControlePrazo(PROTOCOLO, "31/12/2024", "", False)]
+            await asyncio.gather(*(client.definir_controle_prazo("110047993", definicoes) for _ in range(3)))
+            return client.inflight.stats
+
+    stats = asyncio.run(executar())
+    assert sei.chamadas["consultarProcedimento"] == 1
+    assert sei.chamadas["definirControlePrazo"] == 3
+    assert (stats.calls, stats.coalesced) == (1, 5)
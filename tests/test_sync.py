@@ -0,0 +1,100 @@
+import re
+import time
+from datetime import datetime
+
+import pytest
+
+from python_sei import Client
+from python_sei.sync import AndamentoStore, Sincronizador, SyncStats
+from tests.fake_sei import andamento, resposta_andamentos
+
+PROTOCOLO = "00001.000001/2024-01"
+OUTRO_PROTOCOLO = "00001.000002/2024-02"
+
+
+def test_estatisticas_do_lote(sei, tmp_path):
+    sei.latencia = 0.01
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=False)
+    sincronizador = Sincronizador(client, "110047993", AndamentoStore(tmp_path / "andamentos.sqlite3"))
+    protocolos = [f"00001.{i:06d}/2024-01" for i in range(40)]
+
+    resultados = sincronizador.sincronizar_lote(protocolos, max_concorrencia=16)
+
+    assert all(resultado.ok for resultado in resultados)
+    assert sincronizador.stats.verificacoes == 40
+    assert sincronizador.stats.listagens == 40
+    assert sincronizador.stats.novos == 40 * 3
+
+
+def _ultimo_andamento(sei, id_andamento: int | None) -> None:
+    """Troca o `UltimoAndamento` da resposta de `consultarProcedimento`"""
+    resposta = sei.respostas["consultarProcedimento"].decode()
+    if id_andamento is None:
+        ultimo = '<UltimoAndamento xsi:nil="true"/>'
+    else:
+        item = andamento(id_andamento)
+        ultimo = '<UltimoAndamento xsi:type="ns1:Andamento">' + item[item.index(">") + 1 : -len("</item>")] + "</UltimoAndamento>"
+    resposta = re.sub(r"<UltimoAndamento[^>/]*(?:/>|>.*?</UltimoAndamento>)", ultimo, resposta, count=1, flags=re.S)
+    sei.respostas["consultarProcedimento"] = resposta.encode()
+
+
+@pytest.fixture
+def sincronizador(sei, tmp_path):
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=False)
+    return Sincronizador(client, "110047993", AndamentoStore(tmp_path / "andamentos.sqlite3"))
+
+
+def _ids(andamentos) -> list[str]:
+    return [a.id_andamento for a in andamentos]
+
+
+def test_sem_alteracao_custa_apenas_a_consulta(sei, sincronizador):
+    sei.respostas["listarAndamentos"] = resposta_andamentos(3)
+    _ultimo_andamento(sei, 2)
+
+    assert _ids(sincronizador.sincronizar(PROTOCOLO)) == ["0", "1", "2"]
+    assert sei.chamadas["consultarProcedimento"] == 0
+
+    assert sincronizador.sincronizar(PROTOCOLO) == []
+    assert sei.chamadas["consultarProcedimento"] == 1
+    assert sei.chamadas["listarAndamentos"] == 1
+    assert sincronizador.stats == SyncStats(verificacoes=2, sem_alteracao=1, listagens=1, novos=3)
+
+
+def test_processo_sem_andamentos_nao_e_listado_de_novo(sei, sincronizador):
+    sei.respostas["listarAndamentos"] = resposta_andamentos(0)
+    _ultimo_andamento(sei, None)
+
+    assert sincronizador.sincronizar(PROTOCOLO) == []
+    assert sincronizador.store.ultimo_id_andamento(PROTOCOLO) is None
+    assert sincronizador.store.sincronizado_em(PROTOCOLO) is not None
+
+    assert sincronizador.sincronizar(PROTOCOLO) == []
+    assert sei.chamadas["listarAndamentos"] == 1
+    assert sincronizador.stats.sem_alteracao == 1
+
+    # O primeiro andamento do processo é detectado.
+    sei.respostas["listarAndamentos"] = resposta_andamentos(1)
+    _ultimo_andamento(sei, 0)
+    assert _ids(sincronizador.sincronizar(PROTOCOLO)) == ["0"]
+
+
+def test_armazena_apenas_andamentos_novos_e_alteracoes_desde(sei, sincronizador):
+    sei.respostas["listarAndamentos"] = resposta_andamentos(3)
+    sincronizador.sincronizar(PROTOCOLO)
+    sincronizador.sincronizar(OUTRO_PROTOCOLO)
+    desde = datetime.now()
+    time.sleep(0.01)
+
+    sei.respostas["listarAndamentos"] = resposta_andamentos(5)
+    _ultimo_andamento(sei, 4)
+    assert _ids(sincronizador.sincronizar(PROTOCOLO)) == ["3", "4"]
+    assert _ids(sincronizador.store.andamentos(PROTOCOLO)) == ["0", "1", "2", "3", "4"]
+    assert sincronizador.stats.novos == 3 + 3 + 2
+
+    alteracoes = sincronizador.alteracoes_desde(desde)
+    assert {protocolo: _ids(andamentos) for protocolo, andamentos in alteracoes.items()} == {
+        PROTOCOLO: ["3", "4"]
+    }
+    assert sincronizador.alteracoes_desde(desde, [OUTRO_PROTOCOLO]) == {}
+    assert set(sincronizador.alteracoes_desde(datetime.fromtimestamp(0))) == {PROTOCOLO, OUTRO_PROTOCOLO}
@@ -0,0 +1,49 @@
+from python_sei import Client
+from python_sei.wsdl import WsdlCache, salvar_wsdl
+
+
+def test_cache_valida_conteudo_e_expira(tmp_path):
+    cache = WsdlCache(tmp_path, timeout=None)
+    cache.add("http://sei/wsdl", b"<wsdl/>")
+    assert cache.get("http://sei/wsdl") == b"<wsdl/>"
+    assert cache.get("http://sei/outro") is None
+
+    blob = next((tmp_path / "blobs").iterdir())
+    blob.write_bytes(b"corrompido")
+    assert cache.get("http://sei/wsdl") is None
+
+    cache.add("http://sei/wsdl", b"<wsdl/>")
+    assert WsdlCache(tmp_path, timeout=-1).get("http://sei/wsdl") is None
+
+    cache.clear()
+    assert cache.get("http://sei/wsdl") is None
+
+
+def test_cache_quente_nao_baixa_o_wsdl(sei, tmp_path):
+    cache = WsdlCache(tmp_path)
+    Client(sei.url, "SEI", "chave", wsdl_cache=cache)
+    assert sei.downloads == {"/wsdl": 1, "/soapenc.xsd": 1}
+
+    client = Client(sei.url, "SEI", "chave", wsdl_cache=cache)
+    assert sum(sei.downloads.values()) == 2
+    assert [u.sigla for u in client.listar_unidades()] == ["SGA-DTI", "SGA-PROT"]
+
+
+def test_wsdl_local(sei, tmp_path):
+    wsdl = salvar_wsdl(sei.url, tmp_path / "sei.wsdl")
+    assert sei.downloads == {"/wsdl": 1, "/soapenc.xsd": 1}
+    assert (tmp_path / "soapenc.xsd").exists()
+
+    # Criação a frio, sem cache: nenhum documento é baixado.
+    sei.downloads.clear()
+    client = Client(sei.endereco, "SEI", "chave", wsdl=wsdl, wsdl_cache=False)
+    assert sum(sei.downloads.values()) == 0
+    assert len(client.listar_usuarios("110047993")) == 3
+
+
+def test_wsdl_local_sem_acesso_ao_servidor(sei, tmp_path):
+    wsdl = salvar_wsdl(sei.url, tmp_path / "sei.wsdl")
+    sei.stop()
+
+    client = Client("http://127.0.0.1:9/ws", "SEI", "chave", wsdl=wsdl, wsdl_cache=False)
+    assert client.endpoint == "http://127.0.0.1:9/ws"